@@ -2,25 +2,48 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, authentication_classes, permission_classes
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.exceptions import ValidationError
+from rest_framework.reverse import reverse
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from django.conf import settings
 import logging
 import traceback
+import uuid
 from datetime import date, timedelta
+from .availability import AvailabilityConflict, apply_availability_changes, availability_matrix
+from .importer import IMPORT_FORMATS, detect_format, upload_storage
 from .models import Accommodation, AccommodationImage, Amenity, RoomAvailability
 from accounts.authentication import AdminJWTAuthentication
+from jobs.queue import enqueue
+from hotel_backend.exports import EXPORT_FORMAT_PATTERN, stream_export
+from hotel_backend.parsers import FastJSONParser
 from .serializers import (
     AdminAccommodationSerializer,
     AdminAmenitySerializer,
     AdminRoomAvailabilitySerializer,
-    AdminAccommodationImageSerializer
+    AdminAccommodationImageSerializer,
+    AvailabilityBatchSerializer,
+    AvailabilityCellSerializer,
+    AvailabilityRangeSerializer,
 )
 
 logger = logging.getLogger(__name__)
 
+# Longest date range the availability matrix returns
+MATRIX_MAX_DAYS = 366
+
+AVAILABILITY_EXPORT_FIELDS = [
+    ('id', 'id'),
+    ('accommodation', 'accommodation_id'),
+    ('accommodation_title', 'accommodation__title'),
+    ('date', 'date'),
+    ('status', 'status'),
+    ('price', 'price'),
+    ('updated_at', 'updated_at'),
+]
+
 
 @authentication_classes([AdminJWTAuthentication])
 @permission_classes([IsAdminUser])
@@ -28,7 +51,7 @@ class AdminAccommodationViewSet(viewsets.ModelViewSet):
     """Admin viewset for Accommodation CRUD operations"""
     queryset = Accommodation.objects.all()
     serializer_class = AdminAccommodationSerializer
-    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    parser_classes = [MultiPartParser, FormParser, FastJSONParser]
     
     def get_queryset(self):
         """Filter accommodations by search query if provided"""
@@ -77,6 +100,38 @@ class AdminAccommodationViewSet(viewsets.ModelViewSet):
         image.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
     
+    @action(detail=False, methods=['post'], url_path='import', url_name='import')
+    def import_file(self, request):
+        """Schedule a bulk import of accommodations from an uploaded CSV/JSON/NDJSON file"""
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response(
+                {'error': 'file is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        file_format = request.data.get('file_format') or detect_format(upload.name)
+        if file_format not in IMPORT_FORMATS.values():
+            return Response(
+                {'error': f'file_format must be one of: {", ".join(sorted(set(IMPORT_FORMATS.values())))}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Kept out of media storage; the worker reads it back and deletes it when done
+        name = upload_storage().save(f'{uuid.uuid4().hex}.{file_format}', upload)
+        job = enqueue('accommodations.import_accommodations', {
+            'name': name,
+            'file_format': file_format,
+            'create_missing_amenities': str(request.data.get('create_missing_amenities', '')).lower() in ('1', 'true', 'yes'),
+        })
+        
+        return Response({
+            'message': 'Import scheduled',
+            'job_id': job.id,
+            'job_status': job.status,
+            'status_url': reverse('admin-job-detail', kwargs={'pk': job.id}, request=request),
+        }, status=status.HTTP_202_ACCEPTED)
+    
     def create(self, request, *args, **kwargs):
         """Override create to add error handling"""
         try:
@@ -194,14 +249,84 @@ class AdminRoomAvailabilityViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('date', 'accommodation')
     
+    @action(detail=False, methods=['get'], url_path=rf'export/(?P<export_format>{EXPORT_FORMAT_PATTERN})')
+    def export(self, request, export_format=None):
+        """Stream all availability entries matching the list filters as CSV or NDJSON"""
+        return stream_export(self.get_queryset(), AVAILABILITY_EXPORT_FIELDS, export_format, 'room-availability')
+    
+    @action(detail=False, methods=['get'], url_path='matrix')
+    def matrix(self, request):
+        """
+        Columnar availability grid for all (or `accommodation=1,2,...`)
+        accommodations over [start_date, end_date), see availability_matrix
+        """
+        try:
+            start_date = date.fromisoformat(request.query_params.get('start_date', ''))
+            end_date = date.fromisoformat(request.query_params.get('end_date', ''))
+        except ValueError:
+            return Response(
+                {'error': 'start_date and end_date are required (YYYY-MM-DD)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if end_date <= start_date:
+            return Response(
+                {'error': 'end_date must be after start_date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if (end_date - start_date).days > MATRIX_MAX_DAYS:
+            return Response(
+                {'error': f'The date range is limited to {MATRIX_MAX_DAYS} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        accommodations = Accommodation.objects.order_by('id')
+        accommodation_ids = None
+        accommodation_param = request.query_params.get('accommodation')
+        if accommodation_param:
+            try:
+                accommodation_ids = [int(value) for value in accommodation_param.split(',') if value.strip()]
+            except ValueError:
+                return Response(
+                    {'error': 'accommodation must be a comma-separated list of ids'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            accommodations = accommodations.filter(id__in=accommodation_ids)
+        
+        rows = list(accommodations.values_list('id', 'title', 'price_per_night'))
+        return Response(availability_matrix(rows, start_date, end_date, accommodation_ids))
+    
+    @action(detail=False, methods=['post'], url_path='batch')
+    def batch(self, request):
+        """
+        Upsert many cells in one transaction: a list of patches or an
+        accommodations x dates rectangle. Responds 409 with the current
+        cells, writing nothing, if any cell changed since the client read it.
+        """
+        serializer = AvailabilityBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        context = {'request': request, 'default_prices': data['default_prices']}
+        
+        try:
+            entries = apply_availability_changes(data['changes'], data['unmodified_since'])
+        except AvailabilityConflict as e:
+            return Response({
+                'error': str(e),
+                'conflicts': AvailabilityCellSerializer(e.conflicts, many=True, context=context).data,
+            }, status=status.HTTP_409_CONFLICT)
+        
+        return Response({
+            'count': len(entries),
+            'cells': AvailabilityCellSerializer(entries, many=True, context=context).data,
+        })
+    
     @action(detail=False, methods=['post'], url_path='bulk-create')
     def bulk_create(self, request):
-        """Bulk create availability entries for a date range"""
+        """Schedule bulk creation of availability entries for a date range"""
         accommodation_id = request.data.get('accommodation')
         start_date_str = request.data.get('start_date')
         end_date_str = request.data.get('end_date')
-        status_value = request.data.get('status', 'available')
-        price = request.data.get('price', None)
         
         if not all([accommodation_id, start_date_str, end_date_str]):
             return Response(
@@ -230,24 +355,26 @@ class AdminRoomAvailabilityViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        created_count = 0
-        current_date = start_date
+        # Rejected here rather than in the worker, where the client would only see a failed job
+        values = AvailabilityRangeSerializer(data=request.data)
+        values.is_valid(raise_exception=True)
+        price = values.validated_data.get('price')
         
-        while current_date < end_date:
-            RoomAvailability.objects.update_or_create(
-                accommodation=accommodation,
-                date=current_date,
-                defaults={
-                    'status': status_value,
-                    'price': price if price is not None else None
-                }
-            )
-            created_count += 1
-            current_date += timedelta(days=1)
+        # Seeding long ranges is done by a background worker; the client polls
+        # /api/admin/jobs/<job_id>/ for progress
+        job = enqueue('accommodations.bulk_create_availability', {
+            'accommodation_id': accommodation.id,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'status': values.validated_data['status'],
+            'price': str(price) if price is not None else None,
+        })
+        day_count = (end_date - start_date).days
         
         return Response({
-            'message': f'{created_count} availability entries created',
-            'count': created_count
-        }, status=status.HTTP_201_CREATED)
-
-
+            'message': f'{day_count} availability entries scheduled',
+            'count': day_count,
+            'job_id': job.id,
+            'job_status': job.status,
+            'status_url': reverse('admin-job-detail', kwargs={'pk': job.id}, request=request),
+        }, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,240 @@
+"""
+Batch reads and writes of RoomAvailability cells (one accommodation on one date).
+"""
+import base64
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from reservations.models import Reservation
+from .models import RoomAvailability
+
+# Matrix status codes are indexes into this list
+STATUS_CODES = [status for status, _ in RoomAvailability.STATUS_CHOICES]
+# Reservation overlay codes; a confirmed stay wins over a pending one on the same night
+RESERVATION_CODES = {'pending': 1, 'confirmed': 2}
+
+
+class AvailabilityConflict(Exception):
+    """Some cells changed since the client read them; nothing was written"""
+
+    def __init__(self, conflicts):
+        super().__init__(f'{len(conflicts)} availability cells were modified concurrently')
+        self.conflicts = conflicts
+
+
+def _cells_query(keys):
+    """Q matching every (accommodation_id, date) in `keys`, one date range per accommodation"""
+    dates = {}
+    for accommodation_id, day in keys:
+        dates.setdefault(accommodation_id, []).append(day)
+    query = Q()
+    for accommodation_id, days in dates.items():
+        query |= Q(accommodation_id=accommodation_id, date__gte=min(days), date__lte=max(days))
+    return query
+
+
+def apply_availability_changes(changes, unmodified_since=None):
+    """
+    Upsert availability cells in one transaction and return the written entries.
+
+    `changes` maps (accommodation_id, date) to a dict with optional `price`
+    and `status` (missing keys keep the current value, or the defaults for
+    new cells) and an optional `updated_at`, the value the client last saw
+    (None: the cell must not exist yet). Cells without `updated_at` are
+    checked against `unmodified_since` when given.
+
+    Raises AvailabilityConflict, listing the current state of each stale
+    cell, if any check fails.
+    """
+    with transaction.atomic():
+        existing = {
+            (entry.accommodation_id, entry.date): entry
+            for entry in RoomAvailability.objects.select_for_update().filter(_cells_query(changes))
+        }
+
+        conflicts = []
+        for key, change in changes.items():
+            current = existing.get(key)
+            current_updated_at = current.updated_at if current else None
+            if 'updated_at' in change:
+                stale = current_updated_at != change['updated_at']
+            else:
+                stale = bool(unmodified_since and current_updated_at and current_updated_at > unmodified_since)
+            if stale:
+                conflicts.append(current or RoomAvailability(accommodation_id=key[0], date=key[1]))
+        if conflicts:
+            raise AvailabilityConflict(conflicts)
+
+        now = timezone.now()
+        entries = []
+        for (accommodation_id, day), change in changes.items():
+            current = existing.get((accommodation_id, day))
+            entries.append(RoomAvailability(
+                accommodation_id=accommodation_id,
+                date=day,
+                status=change.get('status', current.status if current else 'available'),
+                price=change['price'] if 'price' in change else (current.price if current else None),
+                updated_at=now,
+            ))
+        RoomAvailability.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['accommodation', 'date'],
+            update_fields=['status', 'price', 'updated_at'],
+            batch_size=1000,
+        )
+
+    for entry in entries:
+        current = existing.get((entry.accommodation_id, entry.date))
+        if current is not None:
+            # Not every backend returns ids from an upsert
+            entry.pk = current.pk
+            entry.created_at = current.created_at
+    return entries
+
+
+def availability_matrix(accommodations, start_date, end_date, accommodation_ids=None):
+    """
+    Columnar availability for many accommodations over [start_date, end_date).
+
+    `accommodations` is a list of (id, title, price_per_night) rows. Rows of
+    `status`, `price` and `reservation` follow the `accommodations` order
+    and hold one value per date. Days without an entry are 'available' at
+    the default price. `reservation` is 0 (none), 1 (pending) or
+    2 (confirmed). `accommodation_ids` limits the availability and
+    reservation queries (None: all accommodations).
+
+    Runs one query on RoomAvailability and one on Reservation.
+    """
+    days = (end_date - start_date).days
+    row_of = {accommodation_id: row for row, (accommodation_id, _, _) in enumerate(accommodations)}
+    code_of = {status: code for code, status in enumerate(STATUS_CODES)}
+    available = code_of['available']
+
+    statuses = [[available] * days for _ in accommodations]
+    prices = [[int(price)] * days for _, _, price in accommodations]
+    overlay = [[0] * days for _ in accommodations]
+
+    entries = RoomAvailability.objects.filter(date__gte=start_date, date__lt=end_date)
+    reservations = Reservation.objects.filter(
+        status__in=list(RESERVATION_CODES), check_in_date__lt=end_date, check_out_date__gt=start_date,
+    )
+    if accommodation_ids is not None:
+        entries = entries.filter(accommodation_id__in=accommodation_ids)
+        reservations = reservations.filter(accommodation_id__in=accommodation_ids)
+
+    for accommodation_id, day, status, price in entries.order_by().values_list(
+        'accommodation_id', 'date', 'status', 'price'
+    ):
+        row = row_of.get(accommodation_id)
+        if row is None:
+            continue
+        column = (day - start_date).days
+        statuses[row][column] = code_of.get(status, available)
+        if price is not None:
+            prices[row][column] = int(price)
+
+    for accommodation_id, check_in, check_out, status in reservations.order_by().values_list(
+        'accommodation_id', 'check_in_date', 'check_out_date', 'status'
+    ):
+        row = row_of.get(accommodation_id)
+        if row is None:
+            continue
+        code = RESERVATION_CODES[status]
+        for column in range(max((check_in - start_date).days, 0), min((check_out - start_date).days, days)):
+            overlay[row][column] = max(overlay[row][column], code)
+
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'dates': [(start_date + timedelta(days=offset)).isoformat() for offset in range(days)],
+        'accommodations': [accommodation_id for accommodation_id, _, _ in accommodations],
+        'titles': [title for _, title, _ in accommodations],
+        'default_prices': [int(price) for _, _, price in accommodations],
+        'status_codes': STATUS_CODES,
+        'status': statuses,
+        'price': prices,
+        'reservation': overlay,
+    }
+
+
+def encode_bitmap(flags):
+    """base64 of one bit per flag, least significant bit first within each byte"""
+    data = bytearray((len(flags) + 7) // 8)
+    for index, flag in enumerate(flags):
+        if flag:
+            data[index >> 3] |= 1 << (index & 7)
+    return base64.b64encode(bytes(data)).decode('ascii')
+
+
+def compact_calendar(default_price, start_date, end_date, entries, reservations):
+    """
+    Columnar form of one accommodation's availability calendar over
+    [start_date, end_date), one value per date in each array:
+
+    - `status`: index into `status_codes`; days without an entry are
+      'available', or 'reserved' when a stay covers them
+    - `price_delta`: custom price minus `default_price`, null when the day
+      has no custom price
+    - `reserved`: encode_bitmap of the days covered by a stay
+
+    A day is available when its status is 'available' and it is not
+    reserved. `entries` are the RoomAvailability rows in the range and
+    `reservations` the blocking stays overlapping it.
+    """
+    days = (end_date - start_date).days
+    code_of = {status: code for code, status in enumerate(STATUS_CODES)}
+    reserved = [False] * days
+    for reservation in reservations:
+        first = max((reservation.check_in_date - start_date).days, 0)
+        last = min((reservation.check_out_date - start_date).days, days)
+        reserved[first:last] = [True] * max(last - first, 0)
+
+    statuses = [code_of['reserved'] if day_reserved else code_of['available'] for day_reserved in reserved]
+    price_deltas = [None] * days
+    for entry in entries:
+        column = (entry.date - start_date).days
+        statuses[column] = code_of.get(entry.status, code_of['available'])
+        if entry.price is not None:
+            price_deltas[column] = int(entry.price - default_price)
+
+    return {
+        'status_codes': STATUS_CODES,
+        'status': statuses,
+        'price_delta': price_deltas,
+        'reserved': encode_bitmap(reserved),
+    }
+
+
+def availability_summaries(matrix):
+    """
+    Per-accommodation summary of an availability_matrix, in its order.
+
+    A night is bookable when its status is 'available' and no pending or
+    confirmed stay covers it. Each summary holds the number of bookable
+    nights, whether the whole range is bookable, the first bookable date
+    and the lowest bookable price (None when nothing is bookable).
+    """
+    available = matrix['status_codes'].index('available')
+    dates = matrix['dates']
+    summaries = []
+    for row, accommodation_id in enumerate(matrix['accommodations']):
+        prices = matrix['price'][row]
+        bookable = [
+            column
+            for column, (status, reservation) in enumerate(zip(matrix['status'][row], matrix['reservation'][row]))
+            if status == available and not reservation
+        ]
+        summaries.append({
+            'id': accommodation_id,
+            'title': matrix['titles'][row],
+            'default_price': str(matrix['default_prices'][row]),
+            'available_nights': len(bookable),
+            'is_available': len(bookable) == len(dates),
+            'first_available_date': dates[bookable[0]] if bookable else None,
+            'min_price': str(min(prices[column] for column in bookable)) if bookable else None,
+        })
+    return summaries
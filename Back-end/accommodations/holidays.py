@@ -0,0 +1,70 @@
+"""
+Holiday lookups against holidayapi.ir with caching.
+"""
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from jobs.queue import enqueue
+
+HOLIDAY_API_URL = 'https://holidayapi.ir/jalali/{year}/{month:02d}/{day:02d}'
+CACHE_KEY_PREFIX = 'holiday_'
+
+
+def _cache_key(year, month, day):
+    return f"{CACHE_KEY_PREFIX}{year}_{month}_{day}"
+
+
+def get_cached_holiday(year, month, day):
+    """Return the cached lookup result for a Jalali date, or None on a miss."""
+    return cache.get(_cache_key(year, month, day))
+
+
+def fetch_holiday(year, month, day):
+    """
+    Look up a Jalali date on holidayapi.ir and cache the result.
+
+    Returns a dict with `is_holiday` and `holiday_name`. Network and HTTP
+    errors (other than 404, which means "not a holiday") are raised to the
+    caller and never cached.
+    """
+    api_url = HOLIDAY_API_URL.format(year=year, month=month, day=day)
+    response = requests.get(api_url, timeout=5)
+
+    # If 404, the date is not a holiday
+    if response.status_code == 404:
+        result = {'is_holiday': False, 'holiday_name': ''}
+        cache.set(_cache_key(year, month, day), result, settings.HOLIDAY_CACHE_TTL)
+        return result
+
+    # For other status codes, raise exception
+    response.raise_for_status()
+    data = response.json()
+
+    # The API returns data if it's a holiday - if we got here, it's likely a holiday
+    # Try to extract holiday info if available
+    is_holiday = True
+    holiday_name = ''
+
+    if isinstance(data, dict):
+        holiday_name = data.get('description', '') or data.get('title', '') or data.get('name', '')
+        # Some APIs might have is_holiday flag
+        if 'is_holiday' in data:
+            is_holiday = bool(data.get('is_holiday', True))
+        elif 'events' in data and isinstance(data['events'], list) and len(data['events']) > 0:
+            event = data['events'][0]
+            holiday_name = event.get('description', '') or event.get('title', '')
+    elif isinstance(data, list) and len(data) > 0:
+        holiday_name = data[0].get('description', '') or data[0].get('title', '')
+
+    result = {'is_holiday': is_holiday, 'holiday_name': holiday_name}
+    cache.set(_cache_key(year, month, day), result, settings.HOLIDAY_CACHE_TTL)
+    return result
+
+
+def schedule_month_prefetch(year, month):
+    """Enqueue a background lookup of a whole month, at most once per cache TTL."""
+    if settings.JOBS_ALWAYS_EAGER:
+        # Prefetching inline would make the request slower, not faster
+        return
+    if cache.add(f"{CACHE_KEY_PREFIX}prefetch_{year}_{month}", True, settings.HOLIDAY_CACHE_TTL):
+        enqueue('accommodations.prefetch_holidays', {'year': year, 'month': month})
@@ -0,0 +1,191 @@
+"""
+Responsive image derivatives (thumbnails) for accommodation images.
+
+Every uploaded image gets resized copies at IMAGE_DERIVATIVE_WIDTHS in each
+of IMAGE_DERIVATIVE_FORMATS, stored next to the media files under
+`derivatives/<original name>/<width>w.<format>`. The original's full name
+(extension included) keeps `room.jpg` and `room.png` apart and lets a
+derivative name lead back to its original. Derivative names are
+deterministic, so serializers can build `srcset` values without touching
+storage.
+"""
+import io
+import logging
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_DIR = 'derivatives'
+
+PIL_FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+
+DERIVATIVE_NAME_RE = re.compile(
+    rf'^{DERIVATIVE_DIR}/(?P<base>.+)/(?P<width>\d+)w\.(?P<fmt>{"|".join(PIL_FORMATS)})$'
+)
+
+
+def derivative_name(name, width, fmt):
+    """Storage name of the `width`-pixel `fmt` derivative of `name`"""
+    return f"{DERIVATIVE_DIR}/{name}/{width}w.{fmt}"
+
+
+def derivative_names(name):
+    """All derivative names for an original, as {format: [(width, name), ...]}"""
+    return {
+        fmt: [(width, derivative_name(name, width, fmt)) for width in settings.IMAGE_DERIVATIVE_WIDTHS]
+        for fmt in settings.IMAGE_DERIVATIVE_FORMATS
+    }
+
+
+def build_srcset(name, url_for):
+    """
+    Return {'webp': 'url 320w, url 640w, ...', 'jpeg': ...} for an original.
+
+    `url_for` turns a storage name into a URL (absolute or not).
+    """
+    return {
+        fmt: ', '.join(f"{url_for(variant)} {width}w" for width, variant in variants)
+        for fmt, variants in derivative_names(name).items()
+    }
+
+
+def _render(image, width, fmt):
+    """Resize an opened image to `width` (never upscaling) and encode it"""
+    resized = image.copy()
+    if resized.width > width:
+        height = round(resized.height * width / resized.width)
+        resized = resized.resize((width, height), Image.LANCZOS)
+
+    if fmt == 'jpeg' and resized.mode not in ('RGB', 'L'):
+        resized = resized.convert('RGB')
+
+    buffer = io.BytesIO()
+    resized.save(
+        buffer,
+        PIL_FORMATS[fmt],
+        quality=settings.IMAGE_DERIVATIVE_QUALITY,
+        optimize=True,
+    )
+    return buffer.getvalue()
+
+
+def _open_original(name, storage):
+    with storage.open(name, 'rb') as f:
+        image = Image.open(f)
+        image.load()
+    # Respect camera orientation before resizing
+    return ImageOps.exif_transpose(image)
+
+
+def _store(variant, content, storage, replace=False):
+    """
+    Write a derivative without exposing a partial or missing file.
+
+    Concurrent writers of one variant render the same bytes. On the file
+    system the file is written under a temporary name and renamed into
+    place. Other storages cannot rename, so an existing file counts
+    as done unless `replace`, and a copy saved under another name because
+    the variant appeared meanwhile is discarded.
+    """
+    if isinstance(storage, FileSystemStorage):
+        path = storage.path(variant)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.chmod(temporary, storage.file_permissions_mode or 0o644)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        return
+
+    if storage.exists(variant):
+        if not replace:
+            return
+        storage.delete(variant)
+    saved = storage.save(variant, ContentFile(content))
+    if saved != variant:
+        storage.delete(saved)
+
+
+def generate_derivatives(name, force=False, storage=None):
+    """
+    Create every missing derivative of the stored image `name`.
+
+    Returns the list of derivative names written. Missing or unreadable
+    originals are logged and skipped.
+    """
+    storage = storage or default_storage
+    pending = [
+        (width, fmt, variant)
+        for fmt, variants in derivative_names(name).items()
+        for width, variant in variants
+        if force or not storage.exists(variant)
+    ]
+    if not pending:
+        return []
+
+    try:
+        image = _open_original(name, storage)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Cannot create derivatives for {name}: {e}")
+        return []
+
+    written = []
+    for width, fmt, variant in pending:
+        _store(variant, _render(image, width, fmt), storage, replace=force)
+        written.append(variant)
+    logger.info(f"Created {len(written)} derivatives for {name}")
+    return written
+
+
+def ensure_derivative(variant, storage=None):
+    """
+    Create a single derivative on demand from its storage name.
+
+    Returns True if the derivative exists afterwards. Names that do not
+    match a configured width/format are rejected so arbitrary sizes cannot
+    be requested.
+    """
+    storage = storage or default_storage
+    match = DERIVATIVE_NAME_RE.match(variant)
+    if not match:
+        return False
+
+    width = int(match.group('width'))
+    fmt = match.group('fmt')
+    if width not in settings.IMAGE_DERIVATIVE_WIDTHS or fmt not in settings.IMAGE_DERIVATIVE_FORMATS:
+        return False
+    if storage.exists(variant):
+        return True
+
+    original = match.group('base')
+    if '..' in original.split('/') or original.startswith(f'{DERIVATIVE_DIR}/'):
+        return False
+    try:
+        if not storage.exists(original):
+            return False
+    except SuspiciousFileOperation:
+        return False
+
+    try:
+        image = _open_original(original, storage)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Cannot create derivative {variant}: {e}")
+        return False
+    _store(variant, _render(image, width, fmt), storage)
+    return True
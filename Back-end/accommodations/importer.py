@@ -0,0 +1,294 @@
+"""
+Bulk import of accommodations (and their initial availability) from CSV,
+JSON or NDJSON files.
+
+Rows are read lazily and handled in batches of IMPORT_BATCH_SIZE:
+
+1. every row is validated with AccommodationImportRowSerializer and its
+   amenity names are resolved against a single name -> id map;
+2. the batch's image sources (http(s) URLs, names already in media storage,
+   or files under an image root) are fetched and stored by a bounded thread
+   pool, each distinct source once per import;
+3. accommodations, amenity links, extra images and availability are
+   inserted with bulk_create in one transaction per batch.
+
+Rows that fail validation or whose images cannot be stored are skipped and
+listed in the report as {'row': <1-based record number>, 'errors': {...}}.
+"""
+import csv
+import io
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils._os import safe_join
+from django.utils.text import get_valid_filename
+from PIL import Image
+from rest_framework import serializers
+
+from jobs.queue import enqueue
+from .models import Accommodation, AccommodationImage, Amenity, RoomAvailability
+from .serializers import AccommodationImportRowSerializer
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+
+class ImportFileError(ValueError):
+    """The import file cannot be read at all (as opposed to invalid rows)"""
+
+
+def upload_storage():
+    """Private storage for uploaded import files (IMPORT_UPLOAD_DIR, outside MEDIA_ROOT)"""
+    return FileSystemStorage(location=settings.IMPORT_UPLOAD_DIR)
+
+
+def detect_format(filename):
+    """Import format from a file name, or None when the extension is unknown"""
+    return IMPORT_FORMATS.get(os.path.splitext(filename or '')[1].lower())
+
+
+def read_rows(fileobj, file_format):
+    """Yield row dicts from a binary file object without loading CSV/NDJSON files whole"""
+    if file_format == 'json':
+        try:
+            rows = json.load(io.TextIOWrapper(fileobj, encoding='utf-8-sig'))
+        except ValueError as e:
+            raise ImportFileError(f'Invalid JSON: {e}')
+        if not isinstance(rows, list):
+            raise ImportFileError('A JSON import must be an array of objects')
+        yield from rows
+        return
+
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        for row in csv.DictReader(text):
+            # Empty cells mean "not given", so optional fields get their defaults
+            yield {key: value for key, value in row.items() if key and value not in ('', None)}
+    elif file_format == 'ndjson':
+        for number, line in enumerate(text, start=1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    raise ImportFileError(f'Invalid JSON on line {number}: {e}')
+    else:
+        raise ImportFileError(f'Unsupported import format: {file_format}')
+
+
+class ImageFetcher:
+    """
+    Fetch image sources with a bounded thread pool and store them in media storage.
+
+    Results are remembered per source, so an image shared by many rows is
+    fetched once. Local paths are only read from inside `image_root`.
+    """
+
+    def __init__(self, image_root=None, workers=None):
+        self.image_root = image_root
+        self.executor = ThreadPoolExecutor(max_workers=workers or settings.IMPORT_IMAGE_WORKERS)
+        self.stored = {}
+        self.failed = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.executor.shutdown(wait=True)
+        return False
+
+    def fetch_all(self, sources):
+        pending = [source for source in dict.fromkeys(sources) if source not in self.stored and source not in self.failed]
+        for source, (name, error) in zip(pending, self.executor.map(self._fetch, pending)):
+            if error:
+                self.failed[source] = error
+            else:
+                self.stored[source] = name
+
+    def _fetch(self, source):
+        try:
+            if source.startswith(('http://', 'https://')):
+                content = self._download(source)
+                filename = os.path.basename(urlparse(source).path)
+            elif not os.path.isabs(source) and default_storage.exists(source):
+                # Already in media storage: reference it as-is
+                return source, None
+            elif self.image_root:
+                with open(safe_join(self.image_root, source), 'rb') as f:
+                    content = f.read(settings.IMPORT_IMAGE_MAX_BYTES + 1)
+                filename = os.path.basename(source)
+            else:
+                return None, 'Local image paths are not allowed for this import'
+
+            if len(content) > settings.IMPORT_IMAGE_MAX_BYTES:
+                return None, f'Image is larger than {settings.IMPORT_IMAGE_MAX_BYTES} bytes'
+            Image.open(io.BytesIO(content)).verify()
+            name = default_storage.save(
+                f"accommodations/{get_valid_filename(filename) or 'image.jpg'}", ContentFile(content),
+            )
+            return name, None
+        except (requests.RequestException, OSError, SuspiciousFileOperation, SyntaxError, ValueError) as e:
+            # Pillow raises SyntaxError/ValueError for some corrupt files
+            return None, f'Could not fetch image {source}: {e}'
+
+    def _download(self, url):
+        with requests.get(url, timeout=settings.IMPORT_IMAGE_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            content = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                content += chunk
+                if len(content) > settings.IMPORT_IMAGE_MAX_BYTES:
+                    break
+            return bytes(content)
+
+
+class AccommodationImporter:
+    """
+    Run one import; `run(rows)` returns the report.
+
+    With `create_missing_amenities` unknown amenity names are created,
+    otherwise they make the row fail. `dry_run` validates rows only.
+    """
+
+    def __init__(self, create_missing_amenities=False, dry_run=False, image_root=None,
+                 batch_size=None, image_workers=None, on_progress=None):
+        self.create_missing_amenities = create_missing_amenities
+        self.dry_run = dry_run
+        self.image_root = image_root
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.image_workers = image_workers
+        self.on_progress = on_progress
+        # One instance for all rows: building a serializer's fields is its most expensive step
+        self.row_serializer = AccommodationImportRowSerializer()
+        self.amenity_ids = {name.casefold(): pk for pk, name in Amenity.objects.values_list('id', 'name')}
+        self.report = {
+            'rows': 0, 'created': 0, 'failed': 0, 'availability': 0, 'images': 0,
+            'dry_run': dry_run, 'errors': [],
+        }
+
+    def run(self, rows):
+        with ImageFetcher(self.image_root, self.image_workers) as fetcher:
+            batch = []
+            for number, row in enumerate(rows, start=1):
+                batch.append((number, row))
+                if len(batch) >= self.batch_size:
+                    self._process_batch(batch, fetcher)
+                    batch = []
+            if batch:
+                self._process_batch(batch, fetcher)
+        logger.info(
+            f"Import finished: {self.report['rows']} rows, {self.report['created']} created, "
+            f"{self.report['failed']} failed"
+        )
+        return self.report
+
+    def _fail(self, number, errors):
+        self.report['failed'] += 1
+        self.report['errors'].append({'row': number, 'errors': errors})
+
+    def _process_batch(self, batch, fetcher):
+        valid = []
+        for number, row in batch:
+            try:
+                data = self.row_serializer.run_validation(row)
+            except serializers.ValidationError as e:
+                self._fail(number, e.detail)
+                continue
+            unknown = [name for name in data['amenities'] if name.casefold() not in self.amenity_ids]
+            if unknown and not self.create_missing_amenities:
+                self._fail(number, {'amenities': [f"Unknown amenities: {', '.join(unknown)}"]})
+                continue
+            valid.append((number, data))
+
+        self.report['rows'] += len(batch)
+        if not self.dry_run and valid:
+            fetcher.fetch_all(source for _, data in valid for source in [data['main_image'], *data['images']])
+            ready = []
+            for number, data in valid:
+                errors = [fetcher.failed[source] for source in [data['main_image'], *data['images']]
+                          if source in fetcher.failed]
+                if errors:
+                    self._fail(number, {'images': errors})
+                else:
+                    ready.append(data)
+            if ready:
+                self._insert(ready, fetcher.stored)
+        elif self.dry_run:
+            self.report['created'] += len(valid)
+
+        if self.on_progress:
+            self.on_progress(self.report['rows'])
+
+    def _insert(self, rows, stored):
+        new_images = set()
+        with transaction.atomic():
+            self._create_missing_amenities(rows)
+            accommodations = Accommodation.objects.bulk_create([
+                Accommodation(
+                    title=data['title'], city=data['city'], province=data['province'],
+                    address=data['address'], description=data['description'],
+                    capacity=data['capacity'], beds_description=data['beds_description'],
+                    area=data['area'], price_per_night=data['price_per_night'], rating=data['rating'],
+                    main_image=stored[data['main_image']],
+                )
+                for data in rows
+            ])
+
+            links, images, availability = [], [], []
+            Link = Accommodation.amenities.through
+            today = timezone.localdate()
+            for accommodation, data in zip(accommodations, rows):
+                new_images.add(accommodation.main_image.name)
+                for amenity_id in dict.fromkeys(self.amenity_ids[name.casefold()] for name in data['amenities']):
+                    links.append(Link(accommodation_id=accommodation.id, amenity_id=amenity_id))
+                for source in data['images']:
+                    images.append(AccommodationImage(accommodation=accommodation, image=stored[source]))
+                    new_images.add(stored[source])
+                start = data.get('availability_start') or today
+                for offset in range(data['availability_days']):
+                    availability.append(RoomAvailability(
+                        accommodation=accommodation, date=start + timedelta(days=offset),
+                        status=data['availability_status'], price=data.get('availability_price'),
+                    ))
+
+            Link.objects.bulk_create(links)
+            AccommodationImage.objects.bulk_create(images)
+            RoomAvailability.objects.bulk_create(availability, batch_size=2000)
+
+        self.report['created'] += len(accommodations)
+        self.report['availability'] += len(availability)
+        self.report['images'] += len(images)
+        # bulk_create skips the post_save signals that schedule thumbnails
+        if new_images and settings.IMAGE_DERIVATIVE_WIDTHS and settings.IMAGE_DERIVATIVE_FORMATS:
+            enqueue('accommodations.generate_image_derivatives', {'names': sorted(new_images)})
+
+    def _create_missing_amenities(self, rows):
+        missing = {}
+        for data in rows:
+            for name in data['amenities']:
+                if name.casefold() not in self.amenity_ids:
+                    missing.setdefault(name.casefold(), name)
+        if missing:
+            for amenity in Amenity.objects.bulk_create([Amenity(name=name) for name in missing.values()]):
+                self.amenity_ids[amenity.name.casefold()] = amenity.id
+
+
+def import_file(fileobj, file_format, **options):
+    """Import accommodations from a binary file object; returns the report"""
+    return AccommodationImporter(**options).run(read_rows(fileobj, file_format))
@@ -0,0 +1,73 @@
+"""
+Django management command to generate responsive thumbnails for existing media.
+
+Usage:
+    python manage.py generate_image_derivatives
+    python manage.py generate_image_derivatives --workers 8
+    python manage.py generate_image_derivatives --force
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from accommodations.images import generate_derivatives
+from accommodations.models import Accommodation, AccommodationImage
+
+
+def _init_worker():
+    # Needed when the platform spawns (rather than forks) worker processes
+    django.setup()
+
+
+def _process(name, force):
+    return name, len(generate_derivatives(name, force=force))
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail derivatives for all accommodation images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes. Defaults to the number of CPUs.',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate derivatives that already exist',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        force = options['force']
+
+        if workers < 1:
+            raise CommandError('--workers must be at least 1.')
+
+        names = set(
+            Accommodation.objects.exclude(main_image='').values_list('main_image', flat=True)
+        )
+        names.update(
+            AccommodationImage.objects.exclude(image='').values_list('image', flat=True)
+        )
+        names = sorted(names)
+        self.stdout.write(f'Processing {len(names)} images with {workers} workers...')
+
+        # Workers only touch storage; don't let them inherit a DB connection
+        connections.close_all()
+
+        total_written = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            futures = [executor.submit(_process, name, force) for name in names]
+            for future in as_completed(futures):
+                name, written = future.result()
+                total_written += written
+                if written:
+                    self.stdout.write(f'  {name}: {written} derivatives')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {total_written} derivatives written for {len(names)} images'
+        ))
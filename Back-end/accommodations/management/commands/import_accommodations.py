@@ -0,0 +1,79 @@
+"""
+Django management command to bulk import accommodations from a CSV, JSON or NDJSON file.
+
+Columns / keys: title, city, province, address, description, capacity,
+beds_description, area, price_per_night, rating (optional), main_image,
+images and amenities (lists; `|`-separated in CSV) and optionally
+availability_start, availability_days, availability_status and
+availability_price to seed availability. Image sources are http(s) URLs,
+names already in media storage, or paths relative to --image-root (the
+import file's directory by default).
+
+Usage:
+    python manage.py import_accommodations properties.csv
+    python manage.py import_accommodations properties.ndjson --create-missing-amenities --report errors.json
+    python manage.py import_accommodations properties.json --dry-run
+"""
+import json
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from accommodations.importer import IMPORT_FORMATS, ImportFileError, detect_format, import_file
+
+
+class Command(BaseCommand):
+    help = 'Bulk import accommodations (and their availability) from a CSV, JSON or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--format', dest='file_format', choices=sorted(set(IMPORT_FORMATS.values())),
+                            help='File format. Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, help='Rows validated and inserted per transaction')
+        parser.add_argument('--image-workers', type=int, help='Concurrent image fetches')
+        parser.add_argument('--image-root', help='Directory relative image paths are read from')
+        parser.add_argument('--create-missing-amenities', action='store_true',
+                            help='Create amenities that do not exist yet instead of rejecting the row')
+        parser.add_argument('--dry-run', action='store_true', help='Validate rows without importing anything')
+        parser.add_argument('--report', help='Write the full report, including row errors, to this JSON file')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['file_format'] or detect_format(path)
+        if not file_format:
+            raise CommandError('Cannot tell the file format from the extension; pass --format')
+        if not os.path.isfile(path):
+            raise CommandError(f'No such file: {path}')
+
+        def progress(rows):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{rows} rows processed')
+
+        start = time.perf_counter()
+        try:
+            with open(path, 'rb') as f:
+                report = import_file(
+                    f, file_format,
+                    create_missing_amenities=options['create_missing_amenities'],
+                    dry_run=options['dry_run'],
+                    image_root=options['image_root'] or os.path.dirname(os.path.abspath(path)),
+                    batch_size=options['batch_size'],
+                    image_workers=options['image_workers'],
+                    on_progress=progress,
+                )
+        except ImportFileError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        for error in report['errors'][:20]:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']}: {json.dumps(error['errors'], ensure_ascii=False)}"))
+        if len(report['errors']) > 20:
+            self.stdout.write(self.style.WARNING(f"... {len(report['errors']) - 20} more row errors"))
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+        verb = 'would be created' if options['dry_run'] else 'created'
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['rows']} rows in {elapsed:.1f}s: {report['created']} accommodations {verb}, "
+            f"{report['failed']} failed, {report['images']} images, {report['availability']} availability entries"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0003_roomavailability'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='amenity',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='تاریخ بروزرسانی'),
+        ),
+    ]
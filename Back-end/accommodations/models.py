@@ -6,6 +6,7 @@ class Amenity(models.Model):
     name = models.CharField(max_length=200, verbose_name="نام")
     icon = models.FileField(upload_to='amenities/icons/', blank=True, null=True, verbose_name="آیکون SVG")
     category = models.CharField(max_length=100, blank=True, null=True, verbose_name="دسته‌بندی")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="تاریخ بروزرسانی")
     
     class Meta:
         verbose_name = "امکانات"
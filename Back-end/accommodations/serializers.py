@@ -1,8 +1,24 @@
 from rest_framework import serializers
 from datetime import date, timedelta
+from hotel_backend.media_urls import media_url_builder
+from hotel_backend.serializers import SparseFieldsetMixin
+from .images import build_srcset
 from .models import Accommodation, AccommodationImage, Amenity, RoomAvailability
 
 
+def build_image_srcset(request, name):
+    """Return srcset strings per format for a stored image name"""
+    return build_srcset(name, media_url_builder(request))
+
+
+def image_urls(request, obj):
+    """Absolute URLs of the main image followed by the carousel images"""
+    media_url = media_url_builder(request)
+    names = [obj.main_image.name] if obj.main_image else []
+    names += [img.image.name for img in obj.images.all()]
+    return [media_url(name) for name in names]
+
+
 class AmenitySerializer(serializers.ModelSerializer):
     """Serializer for Amenity model"""
     icon = serializers.SerializerMethodField()
@@ -13,12 +29,7 @@ class AmenitySerializer(serializers.ModelSerializer):
     
     def get_icon(self, obj):
         """Return full URL for icon if exists"""
-        if obj.icon:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.icon.url)
-            return obj.icon.url
-        return None
+        return media_url_builder(self.context.get('request'))(obj.icon)
 
 
 class RoomAvailabilitySerializer(serializers.ModelSerializer):
@@ -39,57 +50,59 @@ class RoomAvailabilitySerializer(serializers.ModelSerializer):
         return obj.is_available()
 
 
-class AccommodationListSerializer(serializers.ModelSerializer):
-    """Serializer for accommodation list endpoint"""
+class AccommodationListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Serializer for accommodation list endpoint (`amenities` only with ?expand=amenities)"""
     main_image = serializers.SerializerMethodField()
+    main_image_srcset = serializers.SerializerMethodField()
     images = serializers.SerializerMethodField()
+    image_srcsets = serializers.SerializerMethodField()
     beds = serializers.CharField(source='beds_description', read_only=True)
     rating = serializers.DecimalField(max_digits=3, decimal_places=1, coerce_to_string=False)
     price_per_night = serializers.DecimalField(max_digits=12, decimal_places=0, coerce_to_string=True)
+    amenities = AmenitySerializer(many=True, read_only=True)
     
     class Meta:
         model = Accommodation
         fields = [
             'id', 'title', 'city', 'province', 'capacity', 'beds',
-            'area', 'rating', 'price_per_night', 'main_image', 'images'
+            'area', 'rating', 'price_per_night', 'main_image', 'main_image_srcset',
+            'images', 'image_srcsets', 'amenities'
         ]
+        expandable_fields = ['amenities']
+        prefetch_related_fields = {
+            'images': ['images'],
+            'image_srcsets': ['images'],
+            'amenities': ['amenities'],
+        }
     
     def get_main_image(self, obj):
+        return media_url_builder(self.context.get('request'))(obj.main_image)
+    
+    def get_main_image_srcset(self, obj):
+        """Thumbnail srcset per format for the main image"""
         if obj.main_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.main_image.url)
-            return obj.main_image.url
+            return build_image_srcset(self.context.get('request'), obj.main_image.name)
         return None
     
+    def get_image_srcsets(self, obj):
+        """Thumbnail srcsets aligned with `images` (main image first)"""
+        request = self.context.get('request')
+        names = [obj.main_image.name] if obj.main_image else []
+        names += [img.image.name for img in obj.images.all()]
+        return [build_image_srcset(request, name) for name in names]
+    
     def get_images(self, obj):
         """Get all images for the accommodation (for carousel in cards)"""
-        images = AccommodationImage.objects.filter(accommodation=obj)
-        request = self.context.get('request')
-        image_urls = []
-        
-        # First add main_image if it exists
-        if obj.main_image:
-            if request:
-                image_urls.append(request.build_absolute_uri(obj.main_image.url))
-            else:
-                image_urls.append(obj.main_image.url)
-        
-        # Then add all additional images
-        for img in images:
-            if request:
-                image_urls.append(request.build_absolute_uri(img.image.url))
-            else:
-                image_urls.append(img.image.url)
-        
-        return image_urls
+        return image_urls(self.context.get('request'), obj)
 
 
-class AccommodationDetailSerializer(serializers.ModelSerializer):
+class AccommodationDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for accommodation detail endpoint"""
     main_image = serializers.SerializerMethodField()
+    main_image_srcset = serializers.SerializerMethodField()
     beds = serializers.CharField(source='beds_description', read_only=True)
     images = serializers.SerializerMethodField()
+    image_srcsets = serializers.SerializerMethodField()
     amenities = serializers.SerializerMethodField()
     bathroom = serializers.SerializerMethodField()
     rating = serializers.DecimalField(max_digits=3, decimal_places=1, coerce_to_string=False)
@@ -101,66 +114,58 @@ class AccommodationDetailSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'city', 'province', 'address', 'capacity',
             'beds', 'area', 'bathroom', 'rating', 'price_per_night',
-            'description', 'amenities', 'images', 'main_image', 'availability'
+            'description', 'amenities', 'images', 'image_srcsets', 'main_image',
+            'main_image_srcset', 'availability'
         ]
+        prefetch_related_fields = {
+            'images': ['images'],
+            'image_srcsets': ['images'],
+            'amenities': ['amenities'],
+            'bathroom': ['amenities'],
+        }
     
     def get_main_image(self, obj):
+        return media_url_builder(self.context.get('request'))(obj.main_image)
+    
+    def get_main_image_srcset(self, obj):
+        """Thumbnail srcset per format for the main image"""
         if obj.main_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.main_image.url)
-            return obj.main_image.url
+            return build_image_srcset(self.context.get('request'), obj.main_image.name)
         return None
     
+    def get_image_srcsets(self, obj):
+        """Thumbnail srcsets aligned with `images` (main image first)"""
+        request = self.context.get('request')
+        names = [obj.main_image.name] if obj.main_image else []
+        names += [img.image.name for img in obj.images.all()]
+        return [build_image_srcset(request, name) for name in names]
+    
     def get_images(self, obj):
         """Get all images for the accommodation (main_image + additional images)"""
-        images = AccommodationImage.objects.filter(accommodation=obj)
-        request = self.context.get('request')
-        image_urls = []
-        
-        # First add main_image if it exists
-        if obj.main_image:
-            if request:
-                image_urls.append(request.build_absolute_uri(obj.main_image.url))
-            else:
-                image_urls.append(obj.main_image.url)
-        
-        # Then add all additional images
-        for img in images:
-            if request:
-                image_urls.append(request.build_absolute_uri(img.image.url))
-            else:
-                image_urls.append(img.image.url)
-        
-        return image_urls
+        return image_urls(self.context.get('request'), obj)
     
     def get_amenities(self, obj):
         """Get list of amenities with full details including icon"""
-        request = self.context.get('request')
-        amenities = []
-        for amenity in obj.amenities.all():
-            amenity_data = {
+        media_url = media_url_builder(self.context.get('request'))
+        return [
+            {
                 'id': amenity.id,
                 'name': amenity.name,
                 'category': amenity.category,
-                'icon': None
+                'icon': media_url(amenity.icon),
             }
-            if amenity.icon:
-                if request:
-                    amenity_data['icon'] = request.build_absolute_uri(amenity.icon.url)
-                else:
-                    amenity_data['icon'] = amenity.icon.url
-            amenities.append(amenity_data)
-        return amenities
+            for amenity in obj.amenities.all()
+        ]
     
     def get_bathroom(self, obj):
         """Extract bathroom information from amenities"""
-        bathroom_amenities = obj.amenities.filter(
-            category__icontains='سرویس بهداشتی'
-        ) | obj.amenities.filter(
-            name__icontains='سرویس بهداشتی'
-        )
-        if bathroom_amenities.exists():
+        # Filter in Python so prefetched amenities are reused
+        keyword = 'سرویس بهداشتی'
+        bathroom_amenities = [
+            a for a in obj.amenities.all()
+            if keyword in (a.category or '').lower() or keyword in a.name.lower()
+        ]
+        if bathroom_amenities:
             return '، '.join([a.name for a in bathroom_amenities])
         return None
     
@@ -190,6 +195,8 @@ class AccommodationDetailSerializer(serializers.ModelSerializer):
             date__lt=end_date
         ).order_by('date')
         
+        entries_by_date = {entry.date: entry for entry in availability_entries}
+        
         # Build availability data with prices
         default_price = obj.price_per_night
         availability_data = []
@@ -197,7 +204,7 @@ class AccommodationDetailSerializer(serializers.ModelSerializer):
         
         while current_date < end_date:
             # Find specific availability entry for this date
-            entry = availability_entries.filter(date=current_date).first()
+            entry = entries_by_date.get(current_date)
             
             # Always use default price as base
             day_price = default_price
@@ -240,12 +247,13 @@ class AccommodationDetailSerializer(serializers.ModelSerializer):
             date__lt=end_date
         ).order_by('date')
         
+        entries_by_date = {entry.date: entry for entry in availability_entries}
         default_price = obj.price_per_night
         availability_data = []
         current_date = start_date
         
         while current_date < end_date:
-            entry = availability_entries.filter(date=current_date).first()
+            entry = entries_by_date.get(current_date)
             
             # Always use default price as base
             day_price = default_price
@@ -292,12 +300,7 @@ class AdminAmenitySerializer(serializers.ModelSerializer):
     
     def get_icon(self, obj):
         """Return full URL for icon if exists"""
-        if obj.icon:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.icon.url)
-            return obj.icon.url
-        return None
+        return media_url_builder(self.context.get('request'))(obj.icon)
 
 
 class AdminRoomAvailabilitySerializer(serializers.ModelSerializer):
@@ -334,12 +337,7 @@ class AdminAccommodationImageSerializer(serializers.ModelSerializer):
     
     def get_image_url(self, obj):
         """Return full URL for image"""
-        if obj.image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.image.url)
-            return obj.image.url
-        return None
+        return media_url_builder(self.context.get('request'))(obj.image)
 
 
 class AdminAccommodationSerializer(serializers.ModelSerializer):
@@ -364,15 +362,7 @@ class AdminAccommodationSerializer(serializers.ModelSerializer):
     
     def get_main_image_url(self, obj):
         """Return full URL for main image"""
-        try:
-            if obj.main_image and hasattr(obj.main_image, 'url'):
-                request = self.context.get('request')
-                if request:
-                    return request.build_absolute_uri(obj.main_image.url)
-                return obj.main_image.url
-        except (ValueError, AttributeError):
-            pass
-        return None
+        return media_url_builder(self.context.get('request'))(obj.main_image)
     
     
     def create(self, validated_data):
@@ -391,3 +381,143 @@ class AdminAccommodationSerializer(serializers.ModelSerializer):
             instance.amenities.set(amenities)
         return instance
 
+
+
+class DelimitedListField(serializers.ListField):
+    """List field that also accepts a `|`-separated string, as found in CSV cells"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [item.strip() for item in data.split('|') if item.strip()]
+        return super().to_internal_value(data)
+
+
+class AccommodationImportRowSerializer(serializers.Serializer):
+    """One row of a bulk accommodation import (see accommodations/importer.py)"""
+    title = serializers.CharField(max_length=200)
+    city = serializers.CharField(max_length=100)
+    province = serializers.CharField(max_length=100)
+    address = serializers.CharField()
+    description = serializers.CharField()
+    capacity = serializers.IntegerField(min_value=1)
+    beds_description = serializers.CharField(max_length=200)
+    area = serializers.IntegerField(min_value=1)
+    price_per_night = serializers.DecimalField(max_digits=12, decimal_places=0, min_value=0)
+    rating = serializers.DecimalField(max_digits=3, decimal_places=1, min_value=0, max_value=5, default=0)
+    # Image sources: http(s) URLs, names already in media storage or files under the import's image root
+    main_image = serializers.CharField()
+    images = DelimitedListField(child=serializers.CharField(), default=list)
+    amenities = DelimitedListField(child=serializers.CharField(max_length=200), default=list)
+    # Optional availability seeded for the new accommodation
+    availability_start = serializers.DateField(required=False)
+    availability_days = serializers.IntegerField(min_value=0, max_value=730, default=0)
+    availability_status = serializers.ChoiceField(choices=RoomAvailability.STATUS_CHOICES, default='available')
+    availability_price = serializers.DecimalField(max_digits=12, decimal_places=0, min_value=0, required=False)
+
+
+class AvailabilityRangeSerializer(serializers.Serializer):
+    """Status and price a bulk-created availability range is filled with"""
+    status = serializers.ChoiceField(choices=RoomAvailability.STATUS_CHOICES, default='available')
+    price = serializers.DecimalField(max_digits=12, decimal_places=0, min_value=0, required=False, allow_null=True)
+
+
+class AvailabilityPatchSerializer(serializers.Serializer):
+    """One cell of a batch availability edit; omitted price/status keep their value"""
+    accommodation = serializers.IntegerField()
+    date = serializers.DateField()
+    price = serializers.DecimalField(max_digits=12, decimal_places=0, min_value=0, required=False, allow_null=True)
+    status = serializers.ChoiceField(choices=RoomAvailability.STATUS_CHOICES, required=False)
+    # The cell's updated_at as last read by the client (null: the cell did not exist)
+    updated_at = serializers.DateTimeField(required=False, allow_null=True)
+
+
+class AvailabilityBatchSerializer(serializers.Serializer):
+    """
+    Batch availability edit: either a list of `patches`, or a rectangle of
+    `accommodations` x [start_date, end_date) set to the same price/status.
+
+    Validated data is {'changes': {(accommodation_id, date): change},
+    'unmodified_since': datetime or None, 'default_prices': {id: price}}.
+    """
+    MAX_CELLS = 10000
+
+    patches = AvailabilityPatchSerializer(many=True, required=False)
+    accommodations = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    price = serializers.DecimalField(max_digits=12, decimal_places=0, min_value=0, required=False, allow_null=True)
+    status = serializers.ChoiceField(choices=RoomAvailability.STATUS_CHOICES, required=False)
+    # Rectangle edits fail if any of its cells changed after this time
+    if_unmodified_since = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if 'patches' in data:
+            changes = self._patch_changes(data)
+        else:
+            changes = self._rectangle_changes(data)
+        if not changes:
+            raise serializers.ValidationError('No cells to update')
+        if len(changes) > self.MAX_CELLS:
+            raise serializers.ValidationError(f'At most {self.MAX_CELLS} cells can be updated at once')
+
+        accommodation_ids = {accommodation_id for accommodation_id, _ in changes}
+        default_prices = dict(
+            Accommodation.objects.filter(id__in=accommodation_ids).values_list('id', 'price_per_night')
+        )
+        missing = sorted(accommodation_ids - set(default_prices))
+        if missing:
+            raise serializers.ValidationError({'accommodation': f"Accommodations not found: {', '.join(map(str, missing))}"})
+
+        return {
+            'changes': changes,
+            'unmodified_since': data.get('if_unmodified_since'),
+            'default_prices': default_prices,
+        }
+
+    def _patch_changes(self, data):
+        if any(field in data for field in ('accommodations', 'start_date', 'end_date', 'price', 'status')):
+            raise serializers.ValidationError('Send either patches or a date range, not both')
+        changes = {}
+        for patch in data['patches']:
+            key = (patch.pop('accommodation'), patch.pop('date'))
+            if key in changes:
+                raise serializers.ValidationError({'patches': f'Duplicate cell: accommodation {key[0]} on {key[1]}'})
+            changes[key] = patch
+        return changes
+
+    def _rectangle_changes(self, data):
+        missing = [field for field in ('accommodations', 'start_date', 'end_date') if field not in data]
+        if missing:
+            raise serializers.ValidationError(f"patches or {', '.join(missing)} required")
+        if data['end_date'] <= data['start_date']:
+            raise serializers.ValidationError({'end_date': 'end_date must be after start_date'})
+        change = {field: data[field] for field in ('price', 'status') if field in data}
+        if not change:
+            raise serializers.ValidationError('price or status required')
+        days = (data['end_date'] - data['start_date']).days
+        if days * len(data['accommodations']) > self.MAX_CELLS:
+            raise serializers.ValidationError(f'At most {self.MAX_CELLS} cells can be updated at once')
+        return {
+            (accommodation_id, data['start_date'] + timedelta(days=offset)): dict(change)
+            for accommodation_id in dict.fromkeys(data['accommodations'])
+            for offset in range(days)
+        }
+
+
+class AvailabilityCellSerializer(serializers.ModelSerializer):
+    """
+    Compact availability cell for batch responses.
+
+    Expects `default_prices` ({accommodation_id: price}) in the context so
+    no accommodation is loaded per cell.
+    """
+    effective_price = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RoomAvailability
+        fields = ['id', 'accommodation', 'date', 'price', 'status', 'effective_price', 'updated_at']
+
+    def get_effective_price(self, obj):
+        if obj.price is not None:
+            return str(obj.price)
+        return str(self.context['default_prices'][obj.accommodation_id])
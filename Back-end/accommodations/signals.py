@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from jobs.queue import enqueue
+from .images import derivative_name
+from .models import Accommodation, AccommodationImage, Amenity
+
+
+def schedule_derivatives(name):
+    """Enqueue thumbnail generation for an image that has none yet"""
+    if not name or not settings.IMAGE_DERIVATIVE_WIDTHS or not settings.IMAGE_DERIVATIVE_FORMATS:
+        return
+    probe = derivative_name(name, settings.IMAGE_DERIVATIVE_WIDTHS[0], settings.IMAGE_DERIVATIVE_FORMATS[0])
+    if not default_storage.exists(probe):
+        enqueue('accommodations.generate_image_derivatives', {'names': [name]})
+
+
+@receiver(post_save, sender=Accommodation)
+def accommodation_saved(sender, instance, raw=False, **kwargs):
+    if not raw and instance.main_image:
+        schedule_derivatives(instance.main_image.name)
+
+
+@receiver(post_save, sender=AccommodationImage)
+def accommodation_image_saved(sender, instance, raw=False, **kwargs):
+    if not raw and instance.image:
+        schedule_derivatives(instance.image.name)
+
+
+def touch_accommodations(ids):
+    """Bump updated_at so conditional GETs (hotel_backend.conditional) see related changes"""
+    Accommodation.objects.filter(id__in=ids).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=AccommodationImage)
+@receiver(post_delete, sender=AccommodationImage)
+def accommodation_image_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_accommodations([instance.accommodation_id])
+
+
+@receiver(post_save, sender=Amenity)
+@receiver(pre_delete, sender=Amenity)
+def amenity_changed(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created:
+        touch_accommodations(instance.accommodations.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Accommodation.amenities.through)
+def accommodation_amenities_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        touch_accommodations([instance.pk])
+    elif action == 'pre_clear':
+        touch_accommodations(instance.accommodations.values_list('id', flat=True))
+    else:
+        touch_accommodations(pk_set)
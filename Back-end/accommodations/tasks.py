@@ -0,0 +1,102 @@
+"""
+Background tasks for accommodations (run by `manage.py run_workers`).
+"""
+import logging
+from datetime import date, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+import requests
+from jobs.queue import task
+from .holidays import fetch_holiday, get_cached_holiday
+from .images import generate_derivatives
+from .importer import import_file, upload_storage
+from .models import Accommodation, RoomAvailability
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_CHUNK_DAYS = 31
+
+
+@task('accommodations.bulk_create_availability')
+def bulk_create_availability(job, accommodation_id, start_date, end_date, status='available', price=None):
+    """Create or overwrite RoomAvailability entries for every day in [start_date, end_date)"""
+    accommodation = Accommodation.objects.get(id=accommodation_id)
+    start_date = date.fromisoformat(start_date)
+    end_date = date.fromisoformat(end_date)
+    total_days = (end_date - start_date).days
+    job.set_progress(0, total_days)
+
+    done = 0
+    while done < total_days:
+        chunk_size = min(AVAILABILITY_CHUNK_DAYS, total_days - done)
+        now = timezone.now()
+        entries = [
+            RoomAvailability(
+                accommodation=accommodation,
+                date=start_date + timedelta(days=done + offset),
+                status=status,
+                price=price,
+                updated_at=now,
+            )
+            for offset in range(chunk_size)
+        ]
+        with transaction.atomic():
+            RoomAvailability.objects.bulk_create(
+                entries,
+                update_conflicts=True,
+                unique_fields=['accommodation', 'date'],
+                update_fields=['status', 'price', 'updated_at'],
+            )
+        done += chunk_size
+        job.set_progress(done)
+
+    return {'count': total_days}
+
+
+@task('accommodations.prefetch_holidays')
+def prefetch_holidays(job, year, month):
+    """Warm the holiday cache for every day of a Jalali month"""
+    job.set_progress(0, 31)
+    failed_days = []
+    for day in range(1, 32):
+        if get_cached_holiday(year, month, day) is None:
+            try:
+                fetch_holiday(year, month, day)
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Holiday prefetch failed for {year}/{month}/{day}: {e}")
+                failed_days.append(day)
+        job.set_progress(day)
+
+    if failed_days:
+        # Raising makes the queue retry; cached days are skipped next time
+        raise RuntimeError(f"Holiday lookup failed for days: {failed_days}")
+    return {'year': year, 'month': month}
+
+
+@task('accommodations.generate_image_derivatives')
+def generate_image_derivatives(job, names, force=False):
+    """Create responsive thumbnails for freshly uploaded images"""
+    job.set_progress(0, len(names))
+    written = 0
+    for index, name in enumerate(names, start=1):
+        written += len(generate_derivatives(name, force=force))
+        job.set_progress(index)
+    return {'images': len(names), 'derivatives': written}
+
+
+# Not retried: a second attempt would import the rows that succeeded again
+@task('accommodations.import_accommodations', max_attempts=1)
+def import_accommodations(job, name, file_format, create_missing_amenities=False):
+    """Import an uploaded CSV/JSON/NDJSON file (see accommodations/importer.py)"""
+    storage = upload_storage()
+    try:
+        with storage.open(name, 'rb') as f:
+            return import_file(
+                f, file_format,
+                create_missing_amenities=create_missing_amenities,
+                image_root=settings.IMPORT_IMAGE_ROOT or None,
+                on_progress=job.set_progress,
+            )
+    finally:
+        storage.delete(name)
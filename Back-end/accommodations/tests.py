@@ -1,3 +1,743 @@
-from django.test import TestCase
+"""
+Tests for accommodations.
+"""
+import base64
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+from accounts.admin_tokens import create_admin_access_token
+from jobs.models import Job
+from .images import _store, derivative_name, ensure_derivative, generate_derivatives
+from .importer import import_file
+from .models import Accommodation, AccommodationImage, Amenity, RoomAvailability
+from reservations.models import Reservation
 
-# Create your tests here.
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(width=800, height=600):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 120, 40)).save(buffer, 'JPEG')
+    return SimpleUploadedFile('room.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    IMAGE_DERIVATIVE_WIDTHS=[320, 640],
+    IMAGE_DERIVATIVE_FORMATS=['webp', 'jpeg'],
+    JOBS_ALWAYS_EAGER=False,
+)
+class ImageDerivativeTest(TestCase):
+    """Test thumbnail generation and srcset output."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.accommodation = Accommodation.objects.create(
+            title='Suite', city='Tehran', province='Tehran', address='-', description='-',
+            capacity=2, beds_description='1 double', area=40, price_per_night=1000000,
+            main_image=make_image()
+        )
+        self.name = self.accommodation.main_image.name
+
+    def test_upload_enqueues_generation(self):
+        job = Job.objects.get(name='accommodations.generate_image_derivatives')
+        self.assertEqual(job.payload, {'names': [self.name]})
+
+    def test_generate_derivatives(self):
+        written = generate_derivatives(self.name)
+        self.assertEqual(len(written), 4)
+        with default_storage.open(derivative_name(self.name, 320, 'webp')) as f:
+            self.assertEqual(Image.open(f).size, (320, 240))
+        # Existing derivatives are not regenerated
+        self.assertEqual(generate_derivatives(self.name), [])
+
+    def test_never_upscales(self):
+        small = Accommodation.objects.create(
+            title='Tiny', city='Tehran', province='Tehran', address='-', description='-',
+            capacity=1, beds_description='1 single', area=10, price_per_night=1,
+            main_image=make_image(400, 200)
+        )
+        generate_derivatives(small.main_image.name)
+        with default_storage.open(derivative_name(small.main_image.name, 640, 'jpeg')) as f:
+            self.assertEqual(Image.open(f).size, (400, 200))
+
+    def test_ensure_derivative_on_demand(self):
+        variant = derivative_name(self.name, 640, 'jpeg')
+        self.assertTrue(ensure_derivative(variant))
+        self.assertTrue(default_storage.exists(variant))
+
+        response = self.client.get(f'/media/{derivative_name(self.name, 320, "webp")}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_ensure_derivative_rejects_unknown_variants(self):
+        self.assertFalse(ensure_derivative(derivative_name(self.name, 333, 'jpeg')))
+        self.assertFalse(ensure_derivative(derivative_name(self.name, 320, 'png')))
+        self.assertFalse(ensure_derivative('derivatives/../secrets/320w.jpeg'))
+        self.assertFalse(ensure_derivative('derivatives/accommodations/missing/320w.jpeg'))
+
+    def test_same_stem_different_extension(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (1000, 500), (0, 0, 0)).save(buffer, 'PNG')
+        png = default_storage.save(os.path.splitext(self.name)[0] + '.png', ContentFile(buffer.getvalue()))
+        self.assertNotEqual(derivative_name(png, 320, 'jpeg'), derivative_name(self.name, 320, 'jpeg'))
+
+        self.assertTrue(ensure_derivative(derivative_name(self.name, 320, 'jpeg')))
+        self.assertTrue(ensure_derivative(derivative_name(png, 320, 'jpeg')))
+        with default_storage.open(derivative_name(png, 320, 'jpeg')) as f:
+            self.assertEqual(Image.open(f).size, (320, 160))
+        with default_storage.open(derivative_name(self.name, 320, 'jpeg')) as f:
+            self.assertEqual(Image.open(f).size, (320, 240))
+
+    def test_store_replaces_in_place(self):
+        variant = derivative_name(self.name, 320, 'jpeg')
+        _store(variant, b'first', default_storage)
+        _store(variant, b'second', default_storage)
+        with default_storage.open(variant) as f:
+            self.assertEqual(f.read(), b'second')
+        directory = os.path.dirname(default_storage.path(variant))
+        self.assertEqual(sorted(os.listdir(directory)), ['320w.jpeg'])
+
+        # Other storages keep the first copy and never leave a renamed duplicate
+        memory = InMemoryStorage()
+        _store(variant, b'first', memory)
+        _store(variant, b'second', memory)
+        self.assertEqual(memory.open(variant).read(), b'first')
+        self.assertEqual(memory.listdir(os.path.dirname(variant))[1], ['320w.jpeg'])
+        _store(variant, b'second', memory, replace=True)
+        self.assertEqual(memory.open(variant).read(), b'second')
+
+    def test_list_includes_srcset(self):
+        response = APIClient().get('/api/accommodations/')
+        self.assertEqual(response.status_code, 200)
+        results = response.data.get('results', response.data)
+        srcset = results[0]['main_image_srcset']
+        self.assertIn('320w', srcset['webp'])
+        self.assertIn('640w', srcset['jpeg'])
+        self.assertTrue(srcset['webp'].startswith('http://testserver/media/derivatives/'))
+
+
+IMPORT_MEDIA_ROOT = tempfile.mkdtemp()
+IMPORT_UPLOAD_DIR = tempfile.mkdtemp()
+IMPORT_COLUMNS = 'title,city,province,address,description,capacity,beds_description,area,price_per_night,main_image,images,amenities,availability_days\n'
+
+
+def import_row(title, main_image='room.jpg', images='', amenities='Wifi', days=0):
+    return f'{title},Tehran,Tehran,addr,desc,2,1 double,40,1000000,{main_image},{images},{amenities},{days}\n'
+
+
+@override_settings(MEDIA_ROOT=IMPORT_MEDIA_ROOT, IMAGE_DERIVATIVE_WIDTHS=[320], JOBS_ALWAYS_EAGER=False)
+class AccommodationImportTest(TestCase):
+    """Test the bulk CSV/JSON accommodation import."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.image_root = tempfile.mkdtemp()
+        for name in ('room.jpg', 'bath.jpg'):
+            Image.new('RGB', (40, 30), (10, 20, 30)).save(os.path.join(cls.image_root, name))
+        with open(os.path.join(cls.image_root, 'notes.jpg'), 'w') as f:
+            f.write('not an image')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.image_root, ignore_errors=True)
+        shutil.rmtree(IMPORT_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(IMPORT_UPLOAD_DIR, ignore_errors=True)
+
+    def setUp(self):
+        Amenity.objects.create(name='WiFi')
+
+    def run_import(self, text, file_format='csv', **options):
+        options.setdefault('image_root', self.image_root)
+        return import_file(io.BytesIO(text.encode('utf-8')), file_format, **options)
+
+    def test_csv_import(self):
+        report = self.run_import(
+            IMPORT_COLUMNS
+            + import_row('Room 1', images='bath.jpg|room.jpg', amenities='wifi', days=3)
+            + import_row('Room 2')
+        )
+        self.assertEqual((report['rows'], report['created'], report['failed']), (2, 2, 0))
+        room = Accommodation.objects.get(title='Room 1')
+        self.assertEqual(list(room.amenities.values_list('name', flat=True)), ['WiFi'])
+        self.assertEqual(room.images.count(), 2)
+        self.assertEqual(RoomAvailability.objects.filter(accommodation=room).count(), 3)
+        self.assertTrue(default_storage.exists(room.main_image.name))
+        # Each distinct image is stored once and shared by the rows using it
+        self.assertEqual(Accommodation.objects.get(title='Room 2').main_image.name, room.main_image.name)
+        # Thumbnails for the new images are scheduled in one job
+        self.assertEqual(Job.objects.filter(name='accommodations.generate_image_derivatives').count(), 1)
+
+    def test_row_errors_are_reported(self):
+        report = self.run_import(
+            IMPORT_COLUMNS
+            + import_row('Good')
+            + 'Bad,Tehran,Tehran,addr,desc,many,1 double,40,1000000,room.jpg,,,0\n'
+            + import_row('Unknown amenity', amenities='Pool')
+            + import_row('Broken image', main_image='notes.jpg')
+            + import_row('Outside root', main_image='../etc/passwd')
+        )
+        self.assertEqual((report['created'], report['failed']), (1, 4))
+        errors = {error['row']: error['errors'] for error in report['errors']}
+        self.assertIn('capacity', errors[2])
+        self.assertIn('Pool', errors[3]['amenities'][0])
+        self.assertIn('images', errors[4])
+        self.assertIn('images', errors[5])
+        self.assertEqual(list(Accommodation.objects.values_list('title', flat=True)), ['Good'])
+
+    def test_create_missing_amenities(self):
+        rows = [{
+            'title': f'Room {i}', 'city': 'Shiraz', 'province': 'Fars', 'address': '-', 'description': '-',
+            'capacity': 2, 'beds_description': '-', 'area': 30, 'price_per_night': 500000,
+            'main_image': 'room.jpg', 'amenities': ['Pool', 'pool', 'Parking'],
+        } for i in range(2)]
+        report = self.run_import(json.dumps(rows), 'json', create_missing_amenities=True)
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(Amenity.objects.count(), 3)
+        self.assertEqual(Accommodation.objects.first().amenities.count(), 2)
+
+    def test_dry_run(self):
+        report = self.run_import(IMPORT_COLUMNS + import_row('Room'), dry_run=True)
+        self.assertEqual(report['created'], 1)
+        self.assertFalse(Accommodation.objects.exists())
+
+    def test_queries_do_not_grow_with_rows(self):
+        def count(rows):
+            text = IMPORT_COLUMNS + ''.join(import_row(f'Room {i}', images='bath.jpg', days=2) for i in range(rows))
+            with CaptureQueriesContext(connection) as queries:
+                self.run_import(text)
+            return len(queries)
+        self.assertEqual(count(3), count(30))
+
+    def test_image_urls_fetched_once(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, 'PNG')
+        with patch('accommodations.importer.requests.get') as get:
+            get.return_value.__enter__.return_value.iter_content.return_value = [buffer.getvalue()]
+            report = self.run_import(IMPORT_COLUMNS + ''.join(
+                import_row(f'Room {i}', main_image='https://cdn.example.com/a/photo.png') for i in range(5)
+            ))
+        self.assertEqual(report['created'], 5)
+        self.assertEqual(get.call_count, 1)
+
+    @override_settings(JOBS_ALWAYS_EAGER=True, IMAGE_DERIVATIVE_WIDTHS=[], IMPORT_UPLOAD_DIR=IMPORT_UPLOAD_DIR)
+    def test_admin_endpoint(self):
+        admin = User.objects.create_user(username='admin', password='pass-1234', is_staff=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Admin {create_admin_access_token(admin)}')
+        with open(os.path.join(self.image_root, 'room.jpg'), 'rb') as f:
+            default_storage.save('accommodations/existing.jpg', ContentFile(f.read()))
+        upload = SimpleUploadedFile(
+            'rooms.csv',
+            (IMPORT_COLUMNS + import_row('Room', main_image='accommodations/existing.jpg')
+             + import_row('Local path', main_image='room.jpg')).encode('utf-8'),
+            content_type='text/csv',
+        )
+
+        response = client.post('/api/admin/accommodations/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(id=response.data['job_id'])
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual((job.result['created'], job.result['failed']), (1, 1))
+        # Server paths are not readable without IMPORT_IMAGE_ROOT
+        self.assertIn('not allowed', job.result['errors'][0]['errors']['images'][0])
+        # The upload never touches media storage and is deleted once the job ran
+        self.assertFalse(default_storage.exists('imports'))
+        self.assertEqual(os.listdir(IMPORT_UPLOAD_DIR), [])
+
+        response = client.post('/api/admin/accommodations/import/', {
+            'file': SimpleUploadedFile('rooms.xlsx', b'x'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+
+class AvailabilityBatchTest(TestCase):
+    """Test the batch availability edit endpoint."""
+    url = '/api/admin/room-availability/batch/'
+
+    def setUp(self):
+        self.rooms = [
+            Accommodation.objects.create(
+                title=f'Room {i}', city='Tehran', province='Tehran', address='-', description='-',
+                capacity=2, beds_description='1 double', area=40, price_per_night=1000000,
+                main_image='accommodations/test.jpg'
+            )
+            for i in range(2)
+        ]
+        self.day = date(2030, 1, 1)
+        self.existing = RoomAvailability.objects.create(
+            accommodation=self.rooms[0], date=self.day, status='blocked', price=1500000,
+        )
+        admin = User.objects.create_user(username='admin', password='pass-1234', is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Admin {create_admin_access_token(admin)}')
+
+    def post(self, data):
+        return self.client.post(self.url, data, format='json')
+
+    def test_patches_upsert_cells(self):
+        response = self.post({'patches': [
+            {'accommodation': self.rooms[0].id, 'date': '2030-01-01', 'price': '1200000'},
+            {'accommodation': self.rooms[1].id, 'date': '2030-01-02', 'status': 'full'},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        first, second = response.data['cells']
+        # Omitted fields keep their value (existing cell) or take the defaults (new cell)
+        self.assertEqual((first['id'], first['status'], first['price']), (self.existing.id, 'blocked', '1200000'))
+        self.assertEqual((second['status'], second['price'], second['effective_price']), ('full', None, '1000000'))
+        self.assertIsNotNone(second['id'])
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.price, 1200000)
+
+    def test_clearing_a_price(self):
+        self.post({'patches': [{'accommodation': self.rooms[0].id, 'date': '2030-01-01', 'price': None}]})
+        self.existing.refresh_from_db()
+        self.assertIsNone(self.existing.price)
+        self.assertEqual(self.existing.status, 'blocked')
+
+    def test_rectangle(self):
+        response = self.post({
+            'accommodations': [room.id for room in self.rooms],
+            'start_date': '2030-01-01', 'end_date': '2030-01-06', 'price': '900000',
+        })
+        self.assertEqual(response.data['count'], 10)
+        self.assertEqual(RoomAvailability.objects.filter(price=900000).count(), 10)
+
+    def test_queries_do_not_grow_with_cells(self):
+        def count(days):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post({'patches': [
+                    {'accommodation': room.id, 'date': (self.day + timedelta(days=offset)).isoformat(), 'status': 'full'}
+                    for room in self.rooms for offset in range(days)
+                ]})
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+        count(1)  # warm the admin principal cache
+        self.assertEqual(count(2), count(30))
+
+    def test_stale_updated_at_conflicts(self):
+        stale = (self.existing.updated_at - timedelta(seconds=5)).isoformat()
+        response = self.post({'patches': [
+            {'accommodation': self.rooms[0].id, 'date': '2030-01-01', 'status': 'available', 'updated_at': stale},
+            {'accommodation': self.rooms[1].id, 'date': '2030-01-01', 'status': 'available'},
+        ]})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([cell['id'] for cell in response.data['conflicts']], [self.existing.id])
+        # All or nothing
+        self.assertFalse(RoomAvailability.objects.filter(accommodation=self.rooms[1]).exists())
+
+        current = self.client.get(f'/api/admin/room-availability/{self.existing.id}/').data['updated_at']
+        response = self.post({'patches': [
+            {'accommodation': self.rooms[0].id, 'date': '2030-01-01', 'status': 'available', 'updated_at': current},
+        ]})
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_cell_expected_missing(self):
+        response = self.post({'patches': [
+            {'accommodation': self.rooms[0].id, 'date': '2030-01-01', 'status': 'full', 'updated_at': None},
+        ]})
+        self.assertEqual(response.status_code, 409)
+
+    def test_if_unmodified_since(self):
+        data = {
+            'accommodations': [self.rooms[0].id], 'start_date': '2030-01-01', 'end_date': '2030-01-03',
+            'status': 'available', 'if_unmodified_since': (self.existing.updated_at - timedelta(seconds=1)).isoformat(),
+        }
+        self.assertEqual(self.post(data).status_code, 409)
+        data['if_unmodified_since'] = self.existing.updated_at.isoformat()
+        self.assertEqual(self.post(data).status_code, 200)
+
+    def test_validation(self):
+        cell = {'accommodation': self.rooms[0].id, 'date': '2030-01-01', 'status': 'full'}
+        self.assertEqual(self.post({'patches': [cell, cell]}).status_code, 400)
+        self.assertEqual(self.post({'patches': [cell], 'status': 'full'}).status_code, 400)
+        self.assertEqual(self.post({'patches': [{**cell, 'accommodation': 999}]}).status_code, 400)
+        self.assertEqual(self.post({
+            'accommodations': [self.rooms[0].id], 'start_date': '2030-01-05', 'end_date': '2030-01-01', 'status': 'full',
+        }).status_code, 400)
+        self.assertEqual(self.post({}).status_code, 400)
+
+
+class AvailabilityMatrixTest(TestCase):
+    """Test the columnar admin availability matrix."""
+    url = '/api/admin/room-availability/matrix/'
+
+    def setUp(self):
+        self.rooms = [
+            Accommodation.objects.create(
+                title=f'Room {i}', city='Tehran', province='Tehran', address='-', description='-',
+                capacity=2, beds_description='1 double', area=40, price_per_night=1000000 * (i + 1),
+                main_image='accommodations/test.jpg'
+            )
+            for i in range(3)
+        ]
+        self.start = date(2030, 1, 1)
+        RoomAvailability.objects.create(accommodation=self.rooms[0], date=date(2030, 1, 2), status='blocked')
+        RoomAvailability.objects.create(accommodation=self.rooms[1], date=date(2030, 1, 1), price=1800000)
+        guest = User.objects.create_user(username='guest', password='pass-1234')
+        for check_in, check_out, status in [
+            (date(2029, 12, 30), date(2030, 1, 2), 'pending'),
+            (date(2030, 1, 1), date(2030, 1, 3), 'confirmed'),
+            (date(2030, 1, 3), date(2030, 1, 4), 'cancelled'),
+        ]:
+            Reservation.objects.create(
+                user=guest, accommodation=self.rooms[1], check_in_date=check_in, check_out_date=check_out,
+                number_of_guests=1, status=status,
+            )
+        admin = User.objects.create_user(username='admin', password='pass-1234', is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Admin {create_admin_access_token(admin)}')
+
+    def test_matrix(self):
+        response = self.client.get(self.url, {'start_date': '2030-01-01', 'end_date': '2030-01-04'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        codes = data['status_codes']
+        self.assertEqual(data['dates'], ['2030-01-01', '2030-01-02', '2030-01-03'])
+        self.assertEqual(data['accommodations'], [room.id for room in self.rooms])
+        self.assertEqual(data['default_prices'], [1000000, 2000000, 3000000])
+        self.assertEqual([codes[code] for code in data['status'][0]], ['available', 'blocked', 'available'])
+        self.assertEqual(data['price'][1], [1800000, 2000000, 2000000])
+        # Confirmed wins over pending; cancelled stays off the grid
+        self.assertEqual(data['reservation'][1], [2, 2, 0])
+        self.assertEqual(data['reservation'][0], [0, 0, 0])
+
+    def test_accommodation_filter(self):
+        response = self.client.get(self.url, {
+            'start_date': '2030-01-01', 'end_date': '2030-01-02', 'accommodation': f'{self.rooms[2].id},{self.rooms[0].id}',
+        })
+        self.assertEqual(response.json()['accommodations'], [self.rooms[0].id, self.rooms[2].id])
+
+    def test_constant_queries(self):
+        self.client.get(self.url, {'start_date': '2030-01-01', 'end_date': '2030-01-02'})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, {'start_date': '2030-01-01', 'end_date': '2030-03-01'})
+        # Accommodations, availability and reservations (plus the admin lookup)
+        self.assertLessEqual(len(queries), 4)
+
+    def test_validation(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'start_date': '2030-01-05', 'end_date': '2030-01-01'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'start_date': '2030-01-01', 'end_date': '2032-01-01'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {
+            'start_date': '2030-01-01', 'end_date': '2030-01-02', 'accommodation': 'x',
+        }).status_code, 400)
+
+
+class SparseFieldsetTest(TestCase):
+    """Test ?fields/omit/expand on the public accommodation endpoints."""
+
+    def setUp(self):
+        self.accommodation = Accommodation.objects.create(
+            title='Sparse', city='Tehran', province='Tehran', address='-', description='-',
+            capacity=2, beds_description='1 double', area=30, price_per_night=1000000,
+            main_image='accommodations/main.jpg',
+        )
+        AccommodationImage.objects.create(accommodation=self.accommodation, image='accommodations/images/a.jpg')
+        self.accommodation.amenities.add(Amenity.objects.create(name='سرویس بهداشتی فرنگی', category='سرویس بهداشتی'))
+        self.client = APIClient()
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), [query['sql'] for query in queries.captured_queries]
+
+    def test_list_fields_skip_image_prefetch(self):
+        data, queries = self.get('/api/accommodations/', {'fields': 'id,title,price_per_night'})
+        self.assertEqual(set(data['results'][0]), {'id', 'title', 'price_per_night'})
+        self.assertFalse(any('accommodations_accommodationimage' in sql for sql in queries))
+
+        data, queries = self.get('/api/accommodations/', {'omit': 'images,image_srcsets'})
+        self.assertNotIn('images', data['results'][0])
+        self.assertIn('main_image', data['results'][0])
+        self.assertFalse(any('accommodations_accommodationimage' in sql for sql in queries))
+
+    def test_list_defaults_unchanged(self):
+        data, queries = self.get('/api/accommodations/')
+        card = data['results'][0]
+        self.assertEqual(len(card['images']), 2)
+        self.assertNotIn('amenities', card)
+        self.assertFalse(any('accommodations_amenity' in sql for sql in queries))
+
+    def test_expand_amenities(self):
+        data, queries = self.get('/api/accommodations/', {'expand': 'amenities', 'fields': 'id,amenities'})
+        self.assertEqual(set(data['results'][0]), {'id', 'amenities'})
+        self.assertEqual(data['results'][0]['amenities'][0]['name'], 'سرویس بهداشتی فرنگی')
+        self.assertEqual(sum('accommodations_amenity' in sql for sql in queries), 1)
+
+    def test_detail_omit_skips_amenities(self):
+        url = f'/api/accommodations/{self.accommodation.id}/'
+        data, _ = self.get(url)
+        self.assertEqual(data['bathroom'], 'سرویس بهداشتی فرنگی')
+        data, queries = self.get(url, {'omit': 'amenities,bathroom'})
+        self.assertNotIn('bathroom', data)
+        self.assertIn('images', data)
+        self.assertFalse(any('accommodations_amenity' in sql for sql in queries))
+
+    def test_unknown_fields_rejected(self):
+        response = self.client.get('/api/accommodations/', {'omit': 'images,secret', 'expand': 'title.x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['omit'], ['Unknown fields: secret'])
+        self.assertEqual(response.json()['expand'], ['Unknown fields: title.x'])
+
+
+class ConditionalGetTest(TestCase):
+    """Test ETag revalidation on the public read endpoints."""
+
+    def setUp(self):
+        self.accommodation = Accommodation.objects.create(
+            title='Conditional', city='Tehran', province='Tehran', address='-', description='-',
+            capacity=2, beds_description='1 double', area=30, price_per_night=1000000,
+            main_image='accommodations/main.jpg',
+        )
+        self.amenity = Amenity.objects.create(name='Wi-Fi', category='general')
+        self.accommodation.amenities.add(self.amenity)
+        self.guest = User.objects.create_user(username='guest', password='pass-1234')
+        self.client = APIClient()
+        today = date.today()
+        self.calendar = (
+            f'/api/accommodations/{self.accommodation.id}/availability-calendar/'
+            f'?start_date={today}&end_date={today + timedelta(days=30)}'
+        )
+        self.urls = [
+            '/api/accommodations/',
+            f'/api/accommodations/{self.accommodation.id}/',
+            f'/api/accommodations/{self.accommodation.id}/unavailable-dates/',
+            self.calendar,
+            '/api/accommodations/filters/',
+        ]
+
+    def etags(self):
+        return [self.client.get(url)['ETag'] for url in self.urls]
+
+    def test_not_modified_without_rendering(self):
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('no-cache', response['Cache-Control'])
+            with CaptureQueriesContext(connection) as queries:
+                cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(cached.status_code, 304, url)
+            self.assertEqual(cached.content, b'')
+            self.assertEqual(cached['ETag'], response['ETag'])
+            self.assertLessEqual(len(queries), 2, url)
+
+    def test_last_modified_is_informational(self):
+        response = self.client.get(self.calendar)
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(self.calendar, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+        # Past dates drop out of unavailable-dates daily, so it has no Last-Modified
+        self.assertNotIn('Last-Modified', self.client.get(self.urls[2]))
+
+    def test_changes_invalidate(self):
+        before = self.etags()
+        today = date.today()
+        Reservation.objects.create(
+            user=self.guest, accommodation=self.accommodation, number_of_guests=1, status='pending',
+            check_in_date=today + timedelta(days=2), check_out_date=today + timedelta(days=4), total_price=2000000,
+        )
+        after_reservation = self.etags()
+        self.assertEqual(after_reservation[0], before[0])
+        self.assertNotEqual(after_reservation[2], before[2])
+        self.assertNotEqual(after_reservation[3], before[3])
+
+        RoomAvailability.objects.create(accommodation=self.accommodation, date=today + timedelta(days=9), price=5)
+        after_availability = self.etags()
+        self.assertNotEqual(after_availability[3], after_reservation[3])
+
+        AccommodationImage.objects.create(accommodation=self.accommodation, image='accommodations/images/b.jpg')
+        after_image = self.etags()
+        self.assertNotEqual(after_image[0], after_availability[0])
+        self.assertNotEqual(after_image[1], after_availability[1])
+
+        self.amenity.name = 'Wireless'
+        self.amenity.save()
+        after_rename = self.etags()
+        self.assertNotEqual(after_rename[1], after_image[1])
+        self.assertNotEqual(after_rename[4], after_image[4])
+
+        self.accommodation.amenities.clear()
+        self.assertNotEqual(self.etags()[1], after_rename[1])
+
+    def test_errors_carry_no_etag(self):
+        self.assertNotIn('ETag', self.client.get('/api/accommodations/999/'))
+        response = self.client.get(f'/api/accommodations/{self.accommodation.id}/availability-calendar/')
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('ETag', response)
+
+
+class CompactCalendarTest(TestCase):
+    """Test that ?format=compact carries the same days as the verbose calendar."""
+
+    def setUp(self):
+        self.accommodation = Accommodation.objects.create(
+            title='Compact', city='Tehran', province='Tehran', address='-', description='-',
+            capacity=2, beds_description='1 double', area=30, price_per_night=1000000,
+        )
+        guest = User.objects.create_user(username='guest', password='pass-1234')
+        self.start = date.today() + timedelta(days=5)
+        for offset, status, price in [(1, 'available', 1200000), (3, 'blocked', None), (6, 'reserved', 900000),
+                                      (9, 'available', 1000000), (12, 'available', 1100000)]:
+            RoomAvailability.objects.create(
+                accommodation=self.accommodation, date=self.start + timedelta(days=offset), status=status, price=price,
+            )
+        for check_in, check_out, status in [(-2, 2, 'confirmed'), (8, 13, 'pending'), (14, 16, 'cancelled')]:
+            Reservation.objects.create(
+                user=guest, accommodation=self.accommodation, number_of_guests=1, status=status,
+                check_in_date=self.start + timedelta(days=check_in), check_out_date=self.start + timedelta(days=check_out),
+                total_price=1000000,
+            )
+        self.url = (
+            f'/api/accommodations/{self.accommodation.id}/availability-calendar/'
+            f'?start_date={self.start}&end_date={self.start + timedelta(days=20)}'
+        )
+
+    def expand(self, compact):
+        """Rebuild the verbose days from a compact response"""
+        reserved = base64.b64decode(compact['reserved'])
+        default_price = int(compact['default_price'])
+        days = []
+        for index, (code, delta) in enumerate(zip(compact['status'], compact['price_delta'])):
+            status = compact['status_codes'][code]
+            is_reserved = bool(reserved[index >> 3] & (1 << (index & 7)))
+            days.append({
+                'date': (self.start + timedelta(days=index)).isoformat(),
+                'price': str(default_price + (delta or 0)),
+                'default_price': compact['default_price'],
+                'has_custom_price': delta is not None,
+                'status': status,
+                'is_available': status == 'available' and not is_reserved,
+                'is_reserved': is_reserved,
+            })
+        return days
+
+    def test_compact_matches_verbose(self):
+        verbose = self.client.get(self.url).json()
+        compact = self.client.get(self.url + '&format=compact').json()
+
+        self.assertEqual(compact['format'], 'compact')
+        self.assertEqual(len(compact['status']), 20)
+        self.assertEqual(compact['price_delta'][:2], [None, 200000])
+        self.assertEqual(compact['price_delta'][9], 0)
+        self.assertEqual(self.expand(compact), verbose['calendar'])
+        for key in ('accommodation_id', 'accommodation_title', 'default_price', 'start_date', 'end_date'):
+            self.assertEqual(compact[key], verbose[key])
+        self.assertEqual(self.client.get(self.url + '&format=verbose').json(), verbose)
+
+    def test_unknown_format(self):
+        response = self.client.get(self.url + '&format=rle')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('format', response.json()['error'])
+
+
+class AvailabilitySummaryTest(TestCase):
+    """Test the multi-accommodation availability summary."""
+
+    def setUp(self):
+        self.rooms = [
+            Accommodation.objects.create(
+                title=f'Room {index}', city='Tehran', province='Tehran', address='-', description='-',
+                capacity=2, beds_description='1 double', area=30, price_per_night=1000000 * (index + 1),
+            )
+            for index in range(3)
+        ]
+        guest = User.objects.create_user(username='guest', password='pass-1234')
+        self.start = date.today() + timedelta(days=5)
+
+        def day(offset):
+            return self.start + timedelta(days=offset)
+
+        # Room 0: cheaper second night, third night blocked
+        RoomAvailability.objects.create(accommodation=self.rooms[0], date=day(1), price=800000)
+        RoomAvailability.objects.create(accommodation=self.rooms[0], date=day(2), status='blocked', price=500000)
+        # Room 1: booked from the first night; a cancelled stay does not count
+        Reservation.objects.create(
+            user=guest, accommodation=self.rooms[1], number_of_guests=1, status='pending',
+            check_in_date=day(0), check_out_date=day(2), total_price=4000000,
+        )
+        Reservation.objects.create(
+            user=guest, accommodation=self.rooms[1], number_of_guests=1, status='cancelled',
+            check_in_date=day(2), check_out_date=day(3), total_price=2000000,
+        )
+        # Room 2: nothing bookable
+        for offset in range(4):
+            RoomAvailability.objects.create(accommodation=self.rooms[2], date=day(offset), status='full')
+        self.range = f'start_date={self.start}&end_date={day(4)}'
+
+    def get(self, ids, query=None):
+        return self.client.get(
+            f"/api/accommodations/availability-summary/?ids={','.join(map(str, ids))}&{query or self.range}"
+        )
+
+    def test_summaries(self):
+        response = self.get([self.rooms[2].id, 999, self.rooms[0].id, self.rooms[1].id, self.rooms[0].id])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['nights'], 4)
+        summaries = {summary['id']: summary for summary in data['accommodations']}
+        self.assertEqual(
+            [summary['id'] for summary in data['accommodations']],
+            [self.rooms[2].id, self.rooms[0].id, self.rooms[1].id],
+        )
+        self.assertEqual(summaries[self.rooms[0].id], {
+            'id': self.rooms[0].id, 'title': 'Room 0', 'default_price': '1000000', 'available_nights': 3,
+            'is_available': False, 'first_available_date': self.start.isoformat(), 'min_price': '800000',
+        })
+        self.assertEqual(summaries[self.rooms[1].id]['available_nights'], 2)
+        self.assertEqual(
+            summaries[self.rooms[1].id]['first_available_date'], (self.start + timedelta(days=2)).isoformat()
+        )
+        self.assertEqual(summaries[self.rooms[1].id]['min_price'], '2000000')
+        self.assertEqual(summaries[self.rooms[2].id]['available_nights'], 0)
+        self.assertIsNone(summaries[self.rooms[2].id]['min_price'])
+        self.assertIsNone(summaries[self.rooms[2].id]['first_available_date'])
+
+    def test_matches_calendar(self):
+        data = self.get([room.id for room in self.rooms]).json()
+        for room, summary in zip(self.rooms, data['accommodations']):
+            calendar = self.client.get(
+                f'/api/accommodations/{room.id}/availability-calendar/?{self.range}'
+            ).json()['calendar']
+            bookable = [day for day in calendar if day['is_available']]
+            self.assertEqual(summary['available_nights'], len(bookable))
+            self.assertEqual(summary['min_price'], min((day['price'] for day in bookable), key=int, default=None))
+
+    def test_constant_queries(self):
+        with CaptureQueriesContext(connection) as one:
+            self.get([self.rooms[0].id])
+        with CaptureQueriesContext(connection) as three:
+            self.get([room.id for room in self.rooms])
+        self.assertEqual(len(one), len(three))
+
+    def test_invalid_requests(self):
+        too_many = list(range(1, 52))
+        cases = [
+            ([], None), (['x'], None), (too_many, None),
+            ([1], 'start_date=2025-01-02&end_date=2025-01-01'), ([1], 'start_date=2025-01-01&end_date=2026-06-01'),
+        ]
+        for ids, query in cases:
+            with self.subTest(ids=ids[:3], query=query):
+                response = self.get(ids, query)
+                self.assertEqual(response.status_code, 400)
+                self.assertNotIn('ETag', response)
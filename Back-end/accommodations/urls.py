@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import AccommodationListView, AccommodationDetailView, filter_options_view, unavailable_dates_view, check_holiday_view, availability_calendar_view
+from .views import AccommodationListView, AccommodationDetailView, filter_options_view, unavailable_dates_view, check_holiday_view, availability_calendar_view, availability_summary_view
 
 app_name = 'accommodations'
 
@@ -8,6 +8,7 @@ urlpatterns = [
     path('<int:id>/', AccommodationDetailView.as_view(), name='detail'),
     path('<int:id>/unavailable-dates/', unavailable_dates_view, name='unavailable-dates'),
     path('<int:id>/availability-calendar/', availability_calendar_view, name='availability-calendar'),
+    path('availability-summary/', availability_summary_view, name='availability-summary'),
     path('filters/', filter_options_view, name='filters'),
     path('holiday/check/', check_holiday_view, name='check-holiday'),
 ]
@@ -7,39 +7,142 @@ from django.shortcuts import get_object_or_404
 from datetime import datetime, date, timedelta
 from .models import Accommodation, Amenity, RoomAvailability
 from .serializers import AccommodationListSerializer, AccommodationDetailSerializer, RoomAvailabilitySerializer
+from .availability import availability_matrix, availability_summaries, compact_calendar
 from .filters import AccommodationFilter
+from .holidays import fetch_holiday, get_cached_holiday, schedule_month_prefetch
 from reservations.models import Reservation
+from hotel_backend.conditional import ConditionalGetMixin, conditional_get, queryset_version, row_version
+from hotel_backend.db_router import ReplicaReadMixin, replica_reads
 import requests
 
 
-class AccommodationListView(generics.ListAPIView):
+BLOCKING_RESERVATION_STATUSES = ['pending', 'confirmed']
+UNAVAILABLE_STATUSES = ['unavailable', 'full', 'under_maintenance', 'blocked', 'reserved']
+# availability_calendar_view ?format=; verbose is one object per day, compact see compact_calendar
+CALENDAR_FORMATS = ['verbose', 'compact']
+# availability_summary_view limits
+AVAILABILITY_SUMMARY_MAX_IDS = 50
+AVAILABILITY_SUMMARY_MAX_DAYS = 366
+
+
+def _requested_range(request):
+    """(start_date, end_date) from the query string, or None when missing or invalid"""
+    try:
+        start_date = date.fromisoformat(request.GET['start_date'])
+        end_date = date.fromisoformat(request.GET['end_date'])
+    except (KeyError, ValueError):
+        return None
+    return (start_date, end_date) if end_date > start_date else None
+
+
+def _requested_ids(request):
+    """Distinct accommodation ids from ?ids=1,2,3 in request order, or None when missing or invalid"""
+    try:
+        ids = [int(value) for value in request.GET.get('ids', '').split(',') if value.strip()]
+    except ValueError:
+        return None
+    return list(dict.fromkeys(ids)) or None
+
+
+def _accommodation_version(id, *related):
+    """The accommodation's updated_at and the (count, latest) of related querysets, in one query"""
+    return row_version(Accommodation.objects.filter(id=id), [(queryset, 'accommodation_id') for queryset in related])
+
+
+class AccommodationListView(ConditionalGetMixin, ReplicaReadMixin, generics.ListAPIView):
     """List all accommodations with filtering support"""
     permission_classes = [AllowAny]
     queryset = Accommodation.objects.all()
     serializer_class = AccommodationListSerializer
     filterset_class = AccommodationFilter
     
+    def get_queryset(self):
+        """Prefetch only what the requested fields (?fields/omit/expand) render"""
+        return self.get_serializer().optimize_queryset(super().get_queryset())
+    
+    def get_version(self, request):
+        """Count and latest updated_at of the filtered accommodations"""
+        return queryset_version(self.filter_queryset(Accommodation.objects.all()))
+    
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 
 
-class AccommodationDetailView(generics.RetrieveAPIView):
+class AccommodationDetailView(ConditionalGetMixin, ReplicaReadMixin, generics.RetrieveAPIView):
     """Retrieve a single accommodation with full details"""
     permission_classes = [AllowAny]
     queryset = Accommodation.objects.all()
     serializer_class = AccommodationDetailSerializer
     lookup_field = 'id'
     
+    def get_queryset(self):
+        """Prefetch only what the requested fields (?fields/omit/expand) render"""
+        return self.get_serializer().optimize_queryset(super().get_queryset())
+    
+    def get_version(self, request, id):
+        """The accommodation's updated_at, plus the availability entries of ?start_date/end_date"""
+        stay = _requested_range(request)
+        if stay is None:
+            return _accommodation_version(id)
+        return _accommodation_version(id, RoomAvailability.objects.filter(date__gte=stay[0], date__lt=stay[1]))
+    
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 
 
+def filter_options_version(request):
+    return [queryset_version(Accommodation.objects.all()), queryset_version(Amenity.objects.all())]
+
+
+def unavailable_dates_version(request, id):
+    version = _accommodation_version(
+        id,
+        RoomAvailability.objects.filter(status__in=UNAVAILABLE_STATUSES),
+        Reservation.objects.filter(status__in=BLOCKING_RESERVATION_STATUSES),
+    )
+    return version and [date.today()] + version
+
+
+def availability_calendar_version(request, id):
+    stay = _requested_range(request)
+    if stay is None:
+        return None
+    start_date, end_date = stay
+    return _accommodation_version(
+        id,
+        RoomAvailability.objects.filter(date__gte=start_date, date__lt=end_date),
+        Reservation.objects.filter(
+            status__in=BLOCKING_RESERVATION_STATUSES, check_in_date__lt=end_date, check_out_date__gt=start_date,
+        ),
+    )
+
+
+def availability_summary_version(request):
+    stay = _requested_range(request)
+    ids = _requested_ids(request)
+    if stay is None or ids is None or len(ids) > AVAILABILITY_SUMMARY_MAX_IDS:
+        return None
+    start_date, end_date = stay
+    return [
+        queryset_version(Accommodation.objects.filter(id__in=ids)),
+        queryset_version(RoomAvailability.objects.filter(
+            accommodation_id__in=ids, date__gte=start_date, date__lt=end_date,
+        )),
+        queryset_version(Reservation.objects.filter(
+            accommodation_id__in=ids, status__in=BLOCKING_RESERVATION_STATUSES,
+            check_in_date__lt=end_date, check_out_date__gt=start_date,
+        )),
+    ]
+
+
+@replica_reads
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(filter_options_version)
 def filter_options_view(request):
     """Return available filter options for frontend"""
     accommodations = Accommodation.objects.all()
@@ -78,8 +181,11 @@ def filter_options_view(request):
     })
 
 
+@replica_reads
 @api_view(['GET'])
 @permission_classes([AllowAny])
+# The response drops past dates, so it changes daily: no Last-Modified
+@conditional_get(unavailable_dates_version, last_modified=False)
 def unavailable_dates_view(request, id):
     """Return unavailable dates for an accommodation (reserved, pending, or marked unavailable)"""
     accommodation = get_object_or_404(Accommodation, id=id)
@@ -87,7 +193,7 @@ def unavailable_dates_view(request, id):
     # Get all reservations for this accommodation that are pending or confirmed
     reservations = Reservation.objects.filter(
         accommodation=accommodation,
-        status__in=['pending', 'confirmed']
+        status__in=BLOCKING_RESERVATION_STATUSES
     ).exclude(
         status='cancelled'
     )
@@ -95,7 +201,7 @@ def unavailable_dates_view(request, id):
     # Get RoomAvailability entries that are unavailable
     unavailable_availability = RoomAvailability.objects.filter(
         accommodation=accommodation,
-        status__in=['unavailable', 'full', 'under_maintenance', 'blocked', 'reserved']
+        status__in=UNAVAILABLE_STATUSES
     )
     
     # Collect all unavailable dates
@@ -128,8 +234,10 @@ def unavailable_dates_view(request, id):
     })
 
 
+@replica_reads
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@conditional_get(availability_calendar_version)
 def availability_calendar_view(request, id):
     """Return availability calendar with prices for a date range"""
     accommodation = get_object_or_404(Accommodation, id=id)
@@ -156,6 +264,12 @@ def availability_calendar_view(request, id):
             'error': 'end_date must be after start_date'
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    calendar_format = request.GET.get('format', 'verbose')
+    if calendar_format not in CALENDAR_FORMATS:
+        return Response({
+            'error': f"format must be one of: {', '.join(CALENDAR_FORMATS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
     # Get availability entries for the date range
     availability_entries = RoomAvailability.objects.filter(
         accommodation=accommodation,
@@ -166,19 +280,34 @@ def availability_calendar_view(request, id):
     # Get reservations for the date range
     reservations = Reservation.objects.filter(
         accommodation=accommodation,
-        status__in=['pending', 'confirmed'],
+        status__in=BLOCKING_RESERVATION_STATUSES,
         check_in_date__lt=end_date,
         check_out_date__gt=start_date
     ).exclude(status='cancelled')
     
-    # Build calendar data
+    # Index both once instead of querying per day
+    entries_by_date = {entry.date: entry for entry in availability_entries}
+    reservations = list(reservations)
+    
     default_price = accommodation.price_per_night
+    if calendar_format == 'compact':
+        return Response({
+            'accommodation_id': accommodation.id,
+            'accommodation_title': accommodation.title,
+            'default_price': str(default_price),
+            'start_date': start_date_str,
+            'end_date': end_date_str,
+            'format': 'compact',
+            **compact_calendar(default_price, start_date, end_date, entries_by_date.values(), reservations),
+        })
+    
+    # Build calendar data
     calendar_data = []
     current_date = start_date
     
     while current_date < end_date:
         # Find specific availability entry for this date
-        entry = availability_entries.filter(date=current_date).first()
+        entry = entries_by_date.get(current_date)
         
         # Check if date is reserved
         is_reserved = False
@@ -231,6 +360,70 @@ def availability_calendar_view(request, id):
     })
 
 
+@replica_reads
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@conditional_get(availability_summary_version)
+def availability_summary_view(request):
+    """
+    Availability summaries and lowest prices for several accommodations
+    (?ids=1,2,3) over one date range, e.g. for badges on search results.
+    Unknown ids are left out. Runs one RoomAvailability and one Reservation
+    query whatever the number of ids (see availability_matrix).
+    """
+    start_date_str = request.GET.get('start_date')
+    end_date_str = request.GET.get('end_date')
+    
+    if not start_date_str or not end_date_str or not request.GET.get('ids'):
+        return Response({
+            'error': 'Missing required parameters: ids (comma-separated), start_date, end_date (format: YYYY-MM-DD)'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        start_date = date.fromisoformat(start_date_str)
+        end_date = date.fromisoformat(end_date_str)
+    except (ValueError, TypeError):
+        return Response({
+            'error': 'Invalid date format. Use YYYY-MM-DD format.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if end_date <= start_date:
+        return Response({
+            'error': 'end_date must be after start_date'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if (end_date - start_date).days > AVAILABILITY_SUMMARY_MAX_DAYS:
+        return Response({
+            'error': f'The date range is limited to {AVAILABILITY_SUMMARY_MAX_DAYS} days'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    ids = _requested_ids(request)
+    if ids is None:
+        return Response({
+            'error': 'ids must be a comma-separated list of accommodation ids'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if len(ids) > AVAILABILITY_SUMMARY_MAX_IDS:
+        return Response({
+            'error': f'At most {AVAILABILITY_SUMMARY_MAX_IDS} ids per request'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Keep the requested order
+    position = {accommodation_id: index for index, accommodation_id in enumerate(ids)}
+    rows = sorted(
+        Accommodation.objects.filter(id__in=ids).values_list('id', 'title', 'price_per_night'),
+        key=lambda row: position[row[0]]
+    )
+    matrix = availability_matrix(rows, start_date, end_date, ids)
+    
+    return Response({
+        'start_date': start_date_str,
+        'end_date': end_date_str,
+        'nights': (end_date - start_date).days,
+        'accommodations': availability_summaries(matrix),
+    })
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def check_holiday_view(request):
@@ -253,50 +446,25 @@ def check_holiday_view(request):
             'error': 'Invalid date parameters. Must be integers.'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Format month and day with leading zeros if needed
-    month_str = str(month).zfill(2)
-    day_str = str(day).zfill(2)
-    
-    # Construct API URL: https://holidayapi.ir/jalali/{year}/{month}/{day}
-    api_url = f'https://holidayapi.ir/jalali/{year}/{month_str}/{day_str}'
+    # Serve from cache when possible; the first miss in a month also
+    # schedules a background lookup of the remaining days
+    cached = get_cached_holiday(year, month, day)
+    if cached is not None:
+        return Response({
+            'is_holiday': cached['is_holiday'],
+            'holiday_name': cached['holiday_name'],
+            'year': year,
+            'month': month,
+            'day': day
+        })
     
     try:
-        response = requests.get(api_url, timeout=5)
-        
-        # If 404, the date is not a holiday
-        if response.status_code == 404:
-            return Response({
-                'is_holiday': False,
-                'holiday_name': '',
-                'year': year,
-                'month': month,
-                'day': day
-            })
-        
-        # For other status codes, raise exception
-        response.raise_for_status()
-        data = response.json()
-        
-        # Check if the date is a holiday
-        # The API returns data if it's a holiday - if we got here, it's likely a holiday
-        # Try to extract holiday info if available
-        is_holiday = True  # If API returned data, it's a holiday
-        holiday_name = ''
-        
-        if isinstance(data, dict):
-            holiday_name = data.get('description', '') or data.get('title', '') or data.get('name', '')
-            # Some APIs might have is_holiday flag
-            if 'is_holiday' in data:
-                is_holiday = bool(data.get('is_holiday', True))
-            elif 'events' in data and isinstance(data['events'], list) and len(data['events']) > 0:
-                event = data['events'][0]
-                holiday_name = event.get('description', '') or event.get('title', '')
-        elif isinstance(data, list) and len(data) > 0:
-            holiday_name = data[0].get('description', '') or data[0].get('title', '')
+        result = fetch_holiday(year, month, day)
+        schedule_month_prefetch(year, month)
         
         return Response({
-            'is_holiday': is_holiday,
-            'holiday_name': holiday_name,
+            'is_holiday': result['is_holiday'],
+            'holiday_name': result['holiday_name'],
             'year': year,
             'month': month,
             'day': day
@@ -1,11 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+
 import jwt
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework import authentication, exceptions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .tokens import ClaimsTokenUser
 
 
 User = get_user_model()
 
+PRINCIPAL_CACHE_PREFIX = "admin_principal_"
+PRINCIPAL_INVALIDATED_PREFIX = "admin_principal_invalidated_"
+
+# Process-local memo of verified admin tokens: {(secret, token): payload}
+_decoded_tokens = OrderedDict()
+_decoded_tokens_lock = threading.Lock()
+
+
+def _principal_cache_key(user_id, issued_at):
+    return f"{PRINCIPAL_CACHE_PREFIX}{user_id}_{issued_at}"
+
+
+def _invalidated_cache_key(user_id):
+    return f"{PRINCIPAL_INVALIDATED_PREFIX}{user_id}"
+
+
+def invalidate_admin_principal(user_id):
+    """
+    Drop cached admin principals for a user (all tokens).
+
+    Entries cached before this moment are ignored on the next lookup, so
+    changes to is_staff/is_active apply immediately in every process that
+    shares the cache. Processes with a local-memory cache pick the change up
+    after ADMIN_PRINCIPAL_CACHE_TTL at the latest.
+    """
+    ttl = settings.ADMIN_PRINCIPAL_CACHE_TTL
+    if ttl > 0:
+        cache.set(_invalidated_cache_key(user_id), time.time(), ttl)
+
+
+def clear_admin_token_memo():
+    with _decoded_tokens_lock:
+        _decoded_tokens.clear()
+
+
+def decode_admin_token(token):
+    """
+    Verify an admin JWT and return its payload.
+
+    Verified payloads are memoised per process so repeated requests with the
+    same token skip HMAC verification; expiry is still checked on every hit.
+    """
+    secret = settings.ADMIN_JWT_SECRET
+    memo_key = (secret, token)
+
+    with _decoded_tokens_lock:
+        payload = _decoded_tokens.get(memo_key)
+        if payload is not None:
+            _decoded_tokens.move_to_end(memo_key)
+
+    if payload is not None:
+        exp = payload.get("exp")
+        if exp is not None and exp <= time.time():
+            with _decoded_tokens_lock:
+                _decoded_tokens.pop(memo_key, None)
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        return payload
+
+    # If you later want to strictly enforce audience, remove options
+    payload = jwt.decode(
+        token,
+        secret,
+        algorithms=["HS256"],
+        options={"verify_aud": False},
+    )
+
+    max_size = settings.ADMIN_JWT_DECODE_CACHE_SIZE
+    if max_size > 0:
+        with _decoded_tokens_lock:
+            _decoded_tokens[memo_key] = payload
+            while len(_decoded_tokens) > max_size:
+                _decoded_tokens.popitem(last=False)
+
+    return payload
+
+
+def get_admin_principal(user_id, issued_at):
+    """
+    Return the User for an admin token, cached for ADMIN_PRINCIPAL_CACHE_TTL.
+
+    The cache key includes the token's `iat`, so a freshly issued token
+    always starts with a database lookup.
+    """
+    ttl = settings.ADMIN_PRINCIPAL_CACHE_TTL
+    if ttl <= 0:
+        return User.objects.get(id=user_id)
+
+    principal_key = _principal_cache_key(user_id, issued_at)
+    invalidated_key = _invalidated_cache_key(user_id)
+    cached = cache.get_many([principal_key, invalidated_key])
+
+    entry = cached.get(principal_key)
+    invalidated_at = cached.get(invalidated_key)
+    if entry is not None:
+        cached_at, user = entry
+        if invalidated_at is None or cached_at > invalidated_at:
+            return user
+
+    user = User.objects.get(id=user_id)
+    cache.set(principal_key, (time.time(), user), ttl)
+    return user
+
 
 class AdminJWTAuthentication(authentication.BaseAuthentication):
     """
@@ -33,13 +144,7 @@ class AdminJWTAuthentication(authentication.BaseAuthentication):
             return None
 
         try:
-            # If you later want to strictly enforce audience, remove options
-            payload = jwt.decode(
-                token,
-                settings.ADMIN_JWT_SECRET,
-                algorithms=["HS256"],
-                options={"verify_aud": False},
-            )
+            payload = decode_admin_token(token)
         except jwt.ExpiredSignatureError:
             raise exceptions.AuthenticationFailed("Admin token has expired.")
         except jwt.InvalidTokenError:
@@ -53,13 +158,35 @@ class AdminJWTAuthentication(authentication.BaseAuthentication):
             raise exceptions.AuthenticationFailed("Invalid admin token payload.")
 
         try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
+            user = get_admin_principal(user_id, payload.get("iat"))
+        except (User.DoesNotExist, ValueError):
             raise exceptions.AuthenticationFailed("Admin user not found.")
 
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed("Admin user is inactive.")
+
         if not user.is_staff:
             raise exceptions.AuthenticationFailed("User is not admin.")
 
         return (user, None)
 
 
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    SimpleJWT authentication with an opt-in stateless mode.
+
+    With JWT_CLAIMS_USER enabled, the user is built from the access token
+    claims (see accounts.tokens.TOKEN_USER_CLAIMS) instead of being loaded
+    from the database; the row is only fetched if a view reads a field that
+    is not in the token. Claims are refreshed from the database whenever
+    the refresh token is used, so they are at most ACCESS_TOKEN_LIFETIME old.
+    """
+
+    def get_user(self, validated_token):
+        if not settings.JWT_CLAIMS_USER:
+            return super().get_user(validated_token)
+
+        if jwt_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        return ClaimsTokenUser(validated_token)
@@ -1,6 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import add_user_claims
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -61,5 +66,39 @@ class SignupSerializer(serializers.ModelSerializer):
         return user
 
 
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that re-reads the user's profile claims.
 
-
+    Keeps claims-based authentication from serving stale names or staff
+    flags for longer than one access token lifetime, and stops inactive
+    users from refreshing.
+    """
+    
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        
+        user_id = refresh.get(jwt_settings.USER_ID_CLAIM)
+        user = User.objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).first()
+        if user is None or not user.is_active:
+            raise InvalidToken('کاربر یافت نشد یا غیرفعال است')
+        add_user_claims(refresh, user)
+        
+        data = {'access': str(refresh.access_token)}
+        
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    # Attempt to blacklist the given refresh token
+                    refresh.blacklist()
+                except AttributeError:
+                    # Blacklist app not installed
+                    pass
+            
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            
+            data['refresh'] = str(refresh)
+        
+        return data
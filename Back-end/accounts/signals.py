@@ -0,0 +1,14 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import invalidate_admin_principal
+
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_admin_principal(sender, instance, **kwargs):
+    """Make is_staff/is_active changes visible to AdminJWTAuthentication"""
+    invalidate_admin_principal(instance.pk)
@@ -1,3 +1,139 @@
-from django.test import TestCase
+"""
+Tests for accounts authentication.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+import jwt
+from .admin_tokens import create_admin_access_token
+from .authentication import AdminJWTAuthentication, clear_admin_token_memo
+from .tokens import ClaimsTokenUser
 
-# Create your tests here.
+
+class AdminJWTAuthenticationTest(TestCase):
+    """Test cached admin principal resolution."""
+
+    def setUp(self):
+        cache.clear()
+        clear_admin_token_memo()
+        self.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        self.token = create_admin_access_token(self.admin)
+        self.auth = AdminJWTAuthentication()
+        self.factory = APIRequestFactory()
+
+    def authenticate(self, token=None):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Admin {token or self.token}')
+        return self.auth.authenticate(request)
+
+    def test_repeated_requests_skip_database(self):
+        user, _ = self.authenticate()
+        self.assertEqual(user.id, self.admin.id)
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate()
+        self.assertTrue(user.is_staff)
+
+    def test_repeated_requests_skip_signature_check(self):
+        self.authenticate()
+        with patch('accounts.authentication.jwt.decode') as mock_decode:
+            self.authenticate()
+        mock_decode.assert_not_called()
+
+    def test_save_invalidates_principal(self):
+        self.authenticate()
+        self.admin.is_staff = False
+        self.admin.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_inactive_user_rejected(self):
+        self.authenticate()
+        self.admin.is_active = False
+        self.admin.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_memoised_token_still_expires(self):
+        with override_settings(ADMIN_JWT_LIFETIME=timedelta(seconds=-1)):
+            expired = create_admin_access_token(self.admin)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(expired)
+
+        # Even a memoised payload is rejected once past its exp claim
+        payload = jwt.decode(self.token, options={'verify_signature': False})
+        self.authenticate()
+        with patch('accounts.authentication.time.time', return_value=payload['exp'] + 1):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate()
+
+    @override_settings(ADMIN_PRINCIPAL_CACHE_TTL=0)
+    def test_cache_can_be_disabled(self):
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+
+class ClaimsJWTAuthenticationTest(TestCase):
+    """Test stateless claims-based authentication for the public API."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='guest', password='Str0ng-pass!', email='guest@example.com',
+            first_name='Sara', last_name='Ahmadi'
+        )
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post('/api/auth/login/', {'username': 'guest', 'password': 'Str0ng-pass!'})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_login_tokens_carry_claims(self):
+        tokens = self.login()
+        access = AccessToken(tokens['access'])
+        self.assertEqual(access['username'], 'guest')
+        self.assertEqual(access['first_name'], 'Sara')
+        self.assertFalse(access['is_staff'])
+
+    @override_settings(JWT_CLAIMS_USER=True)
+    def test_user_info_without_database(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/me/')
+        self.assertEqual(response.data['email'], 'guest@example.com')
+        self.assertEqual(response.data['last_name'], 'Ahmadi')
+
+    @override_settings(JWT_CLAIMS_USER=True)
+    def test_missing_fields_load_user_lazily(self):
+        tokens = self.login()
+        token_user = ClaimsTokenUser(AccessToken(tokens['access']))
+        with self.assertNumQueries(1):
+            self.assertEqual(token_user.date_joined, self.user.date_joined)
+            self.assertTrue(token_user.has_usable_password())
+
+    @override_settings(JWT_CLAIMS_USER=False)
+    def test_default_mode_loads_user(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        with self.assertNumQueries(1):
+            self.client.get('/api/auth/me/')
+
+    def test_refresh_updates_claims(self):
+        tokens = self.login()
+        self.user.first_name = 'Zahra'
+        self.user.save()
+        response = self.client.post('/api/auth/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.data['access'])['first_name'], 'Zahra')
+
+    def test_refresh_rejected_for_inactive_user(self):
+        tokens = self.login()
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post('/api/auth/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+User = get_user_model()
+
+# User fields copied into access/refresh tokens so that authenticated
+# requests can be served without loading the User row
+TOKEN_USER_CLAIMS = ('username', 'email', 'first_name', 'last_name', 'is_staff')
+
+
+def add_user_claims(token, user):
+    """Copy the profile claims of `user` into `token`"""
+    for claim in TOKEN_USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def get_tokens_for_user(user):
+    """
+    Return a RefreshToken for the user carrying the profile claims.
+
+    The claims are copied to every access token minted from it.
+    """
+    refresh = RefreshToken.for_user(user)
+    return add_user_claims(refresh, user)
+
+
+class ClaimsTokenUser(TokenUser):
+    """
+    Stateless user built from access token claims.
+
+    Attributes present in the token are read from it; anything else (e.g.
+    `date_joined` or related objects such as `injast_user`) loads the User
+    row once, on first access.
+    """
+
+    def _claim(self, name):
+        if name in self.token:
+            return self.token[name]
+        # Token issued before the claim existed
+        return getattr(self.user, name)
+
+    @cached_property
+    def user(self):
+        return User.objects.get(pk=self.id)
+
+    @cached_property
+    def username(self):
+        return self._claim('username')
+
+    @cached_property
+    def email(self):
+        return self._claim('email')
+
+    @cached_property
+    def first_name(self):
+        return self._claim('first_name')
+
+    @cached_property
+    def last_name(self):
+        return self._claim('last_name')
+
+    @cached_property
+    def is_staff(self):
+        return self._claim('is_staff')
+
+    def __getattr__(self, name):
+        # Only called for attributes not defined on the class or instance
+        if name.startswith('_') or name == 'token':
+            raise AttributeError(name)
+        return getattr(self.user, name)
@@ -2,10 +2,10 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from .serializers import UserSerializer, SignupSerializer
 from .admin_tokens import create_admin_access_token
+from .tokens import get_tokens_for_user
 
 
 @api_view(['POST'])
@@ -35,7 +35,7 @@ def login_view(request):
             status=status.HTTP_401_UNAUTHORIZED
         )
     
-    refresh = RefreshToken.for_user(user)
+    refresh = get_tokens_for_user(user)
     
     return Response({
         'access': str(refresh.access_token),
@@ -77,7 +77,7 @@ def admin_login_view(request):
         )
 
     # Issue both normal app tokens and separate admin token
-    refresh = RefreshToken.for_user(user)
+    refresh = get_tokens_for_user(user)
     admin_token = create_admin_access_token(user)
 
     return Response({
@@ -107,7 +107,7 @@ def signup_view(request):
         )
     
     user = serializer.save()
-    refresh = RefreshToken.for_user(user)
+    refresh = get_tokens_for_user(user)
     
     return Response({
         'access': str(refresh.access_token),
@@ -0,0 +1,247 @@
+"""
+Query budgets: the maximum number of SQL queries each API route may run.
+
+BUDGETS maps every URL name in the public and admin URLconfs to one request
+exercising it and its query budget. QueryBudgetTestMixin runs each request
+against the seeded benchmark data at two sizes and fails when a route goes
+over budget or when its query count grows with the amount of data, i.e. a
+list serializer started issuing per-row queries.
+
+When adding a route, register it here (or in EXEMPT with a reason);
+benchmarks.tests.QueryBudgetTest fails for unregistered routes.
+"""
+from datetime import timedelta
+from importlib import import_module
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.utils import timezone
+
+from accommodations.holidays import _cache_key as holiday_cache_key
+from accommodations.models import Amenity
+from accounts.tokens import get_tokens_for_user
+from jobs.queue import enqueue
+from reservations.models import Reservation
+from .runner import (
+    ADMIN_USERNAME, Scenario, _clients, _free_window, _measure_once, benchmark_targets, seeded_accommodation_ids,
+)
+from . import seed
+from .seed import PASSWORD
+
+# URLconfs whose routes must all have a budget
+ROUTE_MODULES = [
+    'accommodations.urls',
+    'reservations.urls',
+    'accounts.urls',
+    'accommodations.admin_urls',
+    'reservations.admin_urls',
+    'jobs.admin_urls',
+]
+
+# A tiny valid GIF, for image upload routes
+GIF_BYTES = (
+    b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00'
+    b'\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+)
+
+
+class Budget:
+    """
+    One request against a route and the queries it may run.
+
+    `kwargs` maps URL kwargs to keys of the budget context (see
+    build_context); `query` and `data` are callables taking the context.
+    """
+
+    def __init__(self, max_queries, method='get', kwargs=None, query=None, data=None, auth=None,
+                 expected_status=200, format='json'):
+        self.max_queries = max_queries
+        self.method = method
+        self.kwargs = kwargs or {}
+        self.query = query
+        self.data = data
+        self.auth = auth
+        self.expected_status = expected_status
+        self.format = format
+
+    def scenario(self, name, context):
+        path = reverse(name, kwargs={key: context[value] for key, value in self.kwargs.items()})
+        if self.query:
+            path = f'{path}?{self.query(context)}'
+        data = self.data(context) if self.data else None
+        return Scenario(name, path, self.method, data, self.auth, self.expected_status, self.format)
+
+
+def _month(context):
+    today = context['today']
+    return f'start_date={today.isoformat()}&end_date={(today + timedelta(days=30)).isoformat()}'
+
+
+BUDGETS = {
+    # Public accommodation routes (each includes its conditional GET version query)
+    'accommodations:list': Budget(4),
+    'accommodations:detail': Budget(4, kwargs={'id': 'accommodation'}),
+    'accommodations:unavailable-dates': Budget(4, kwargs={'id': 'accommodation'}),
+    'accommodations:availability-calendar': Budget(4, kwargs={'id': 'accommodation'}, query=_month),
+    'accommodations:availability-summary': Budget(6, query=lambda c: f"ids={c['accommodation_ids']}&{_month(c)}"),
+    'accommodations:filters': Budget(6),
+    'accommodations:check-holiday': Budget(0, query=lambda c: 'year=1403&month=1&day=1'),
+
+    # Guest reservations
+    'reservations:list': Budget(4, auth='user'),
+    'reservations:detail': Budget(4, kwargs={'id': 'reservation'}, auth='user'),
+
+    # Accounts
+    'accounts:login': Budget(2, method='post', data=lambda c: {'username': c['username'], 'password': PASSWORD}),
+    'accounts:signup': Budget(4, method='post', expected_status=201, data=lambda c: {
+        'username': 'budget-new-user', 'password': 'Str0ng-pass!9', 'password_confirm': 'Str0ng-pass!9',
+        'email': 'budget@example.com',
+    }),
+    'accounts:token_refresh': Budget(1, method='post', data=lambda c: {'refresh': c['refresh']}),
+    'accounts:user_info': Budget(1, auth='user'),
+    'accounts:admin_login': Budget(1, method='post', data=lambda c: {
+        'username': ADMIN_USERNAME, 'password': PASSWORD,
+    }),
+
+    # Admin: accommodations, amenities, availability
+    'api-root': Budget(0, auth='admin'),
+    'admin-accommodation-list': Budget(5, auth='admin'),
+    'admin-accommodation-detail': Budget(3, kwargs={'pk': 'accommodation'}, auth='admin'),
+    # Image changes also bump the accommodation's updated_at
+    'admin-accommodation-add-image': Budget(
+        6, method='post', kwargs={'pk': 'accommodation'}, auth='admin', expected_status=201, format='multipart',
+        data=lambda c: {'image': SimpleUploadedFile('budget.gif', GIF_BYTES, content_type='image/gif')},
+    ),
+    'admin-accommodation-delete-image': Budget(
+        6, method='delete', kwargs={'pk': 'accommodation', 'image_id': 'image'}, auth='admin', expected_status=204,
+    ),
+    'admin-accommodation-import': Budget(
+        2, method='post', auth='admin', expected_status=202, format='multipart',
+        data=lambda c: {'file': SimpleUploadedFile('budget.csv', b'title\nBudget room\n', content_type='text/csv')},
+    ),
+    'admin-amenity-list': Budget(2, auth='admin'),
+    'admin-amenity-detail': Budget(1, kwargs={'pk': 'amenity'}, auth='admin'),
+    'admin-room-availability-list': Budget(
+        2, auth='admin', query=lambda c: f"accommodation={c['accommodation']}&{_month(c)}",
+    ),
+    'admin-room-availability-detail': Budget(1, kwargs={'pk': 'availability'}, auth='admin'),
+    'admin-room-availability-bulk-create': Budget(
+        2, method='post', auth='admin', expected_status=202, data=lambda c: {
+            'accommodation': c['accommodation'],
+            'start_date': c['window'][0].isoformat(),
+            'end_date': c['window'][1].isoformat(),
+            'status': 'blocked',
+        },
+    ),
+    'admin-room-availability-matrix': Budget(3, auth='admin', query=_month),
+    'admin-room-availability-batch': Budget(
+        5, method='post', auth='admin', data=lambda c: {'patches': [
+            {'accommodation': c['accommodation'], 'date': (c['window'][0] + timedelta(days=offset)).isoformat(),
+             'price': '1500000'}
+            for offset in range(3)
+        ]},
+    ),
+    'admin-room-availability-export': Budget(
+        2, kwargs={'export_format': 'export_format'}, auth='admin', query=lambda c: f"accommodation={c['accommodation']}",
+    ),
+
+    # Admin: reservations and jobs
+    'admin-reservation-list': Budget(3, auth='admin'),
+    'admin-reservation-detail': Budget(3, kwargs={'pk': 'reservation'}, auth='admin'),
+    'admin-reservation-update-status': Budget(
+        8, method='patch', kwargs={'pk': 'reservation'}, auth='admin', data=lambda c: {'status': 'confirmed'},
+    ),
+    'admin-reservation-update-reservation': Budget(
+        9, method='patch', kwargs={'pk': 'reservation'}, auth='admin', data=lambda c: {'number_of_guests': 1},
+    ),
+    'admin-reservation-export': Budget(2, kwargs={'export_format': 'export_format'}, auth='admin'),
+    'admin-analytics-list': Budget(
+        3, auth='admin', query=lambda c: f'{_month(c)}&group_by=accommodation&interval=day',
+    ),
+    'admin-job-list': Budget(2, auth='admin'),
+    'admin-job-detail': Budget(1, kwargs={'pk': 'job'}, auth='admin'),
+}
+
+# Routes deliberately left without a budget, with the reason
+EXEMPT = {}
+
+
+def route_names():
+    """Every named route in ROUTE_MODULES (namespaced where the URLconf has app_name)"""
+    names = set()
+    for module_name in ROUTE_MODULES:
+        module = import_module(module_name)
+        namespace = getattr(module, 'app_name', None)
+        for pattern in module.urlpatterns:
+            if pattern.name:
+                names.add(f'{namespace}:{pattern.name}' if namespace else pattern.name)
+    return names
+
+
+def build_context():
+    """Objects and values the budget requests refer to, from the seeded data"""
+    accommodation, user = benchmark_targets()
+    admin, _ = User.objects.get_or_create(username=ADMIN_USERNAME, defaults={'is_staff': True})
+    admin.set_password(PASSWORD)
+    admin.save()
+    # Start from a cold cache so counts do not depend on earlier requests;
+    # the holiday route must not reach the external API
+    cache.clear()
+    cache.set(holiday_cache_key(1403, 1, 1), {'is_holiday': True, 'holiday_name': 'نوروز'})
+
+    return {
+        'accommodation': accommodation.id,
+        'accommodation_ids': ','.join(str(id) for id in seeded_accommodation_ids()),
+        'image': accommodation.images.values_list('id', flat=True)[0],
+        'amenity': Amenity.objects.values_list('id', flat=True)[0],
+        'availability': accommodation.availability.values_list('id', flat=True)[0],
+        'reservation': Reservation.objects.filter(user=user).values_list('id', flat=True)[0],
+        'job': enqueue('accommodations.prefetch_holidays', {'year': 1403, 'month': 1}).id,
+        'username': user.username,
+        'refresh': str(get_tokens_for_user(user)),
+        'today': timezone.localdate(),
+        'export_format': 'csv',
+        'window': _free_window(accommodation),
+        'user': user,
+    }
+
+
+def measure_routes(context, names=None):
+    """Run the budget request of each route once; returns {name: queries}"""
+    clients = _clients(context['user'])
+    counts = {}
+    for name in names or BUDGETS:
+        budget = BUDGETS[name]
+        scenario = budget.scenario(name, context)
+        counts[name] = _measure_once(clients[budget.auth], scenario)[1]
+    return counts
+
+
+class QueryBudgetTestMixin:
+    """
+    TestCase mixin asserting query budgets on seeded benchmark data.
+
+    `assertQueryBudgets(small, large)` seeds the data twice with the given
+    seed() keyword arguments and checks every route (or `names`) against
+    its budget at both sizes and for growth between them.
+    """
+
+    def assertQueryBudgets(self, small, large, names=None):
+        seed.seed(**small)
+        small_counts = measure_routes(build_context(), names)
+        seed.flush()
+        seed.seed(**large)
+        large_counts = measure_routes(build_context(), names)
+
+        failures = []
+        for name, count in small_counts.items():
+            budget = BUDGETS[name].max_queries
+            if large_counts[name] > count:
+                failures.append(f'{name}: queries grow with data ({count} -> {large_counts[name]})')
+            if max(count, large_counts[name]) > budget:
+                failures.append(f'{name}: {max(count, large_counts[name])} queries, budget {budget}')
+        if failures:
+            self.fail('Query budget exceeded:\n' + '\n'.join(failures))
+        return small_counts, large_counts
@@ -0,0 +1,115 @@
+"""
+HTTP load generation against a real gunicorn server.
+
+Used by benchmarks that depend on process/thread/connection behaviour the
+Django test client cannot show (database connection reuse, pooling).
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class GunicornServer:
+    """Context manager running `gunicorn hotel_backend.wsgi` with extra environment"""
+
+    def __init__(self, env=None, workers=2, threads=4, port=None, startup_timeout=30):
+        self.env = env or {}
+        self.workers = workers
+        self.threads = threads
+        self.port = port or free_port()
+        self.startup_timeout = startup_timeout
+        self.process = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def __enter__(self):
+        env = {**os.environ, **self.env}
+        env['ALLOWED_HOSTS'] = ','.join(filter(None, [env.get('ALLOWED_HOSTS', ''), '127.0.0.1']))
+        self.process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', 'hotel_backend.wsgi:application',
+                '--bind', f'127.0.0.1:{self.port}',
+                '--workers', str(self.workers),
+                '--threads', str(self.threads),
+                '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited with code {self.process.returncode}')
+            try:
+                requests.get(f'{self.url}/health', timeout=1)
+                return self
+            except requests.RequestException:
+                time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise RuntimeError(f'gunicorn did not start within {self.startup_timeout}s')
+
+    def __exit__(self, *exc_info):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        return False
+
+
+def run_load(base_url, paths, total_requests=1000, concurrency=16, headers=None):
+    """
+    Issue `total_requests` GETs spread over `concurrency` client threads.
+
+    Each thread keeps its own HTTP session (keep-alive), cycling through
+    `paths`. Returns throughput, latency percentiles and error count.
+    """
+    per_thread = max(total_requests // concurrency, 1)
+
+    def worker(offset):
+        latencies = []
+        errors = 0
+        with requests.Session() as session:
+            for i in range(per_thread):
+                path = paths[(offset + i) % len(paths)]
+                start = time.perf_counter()
+                try:
+                    response = session.get(f'{base_url}{path}', headers=headers, timeout=30)
+                    if response.status_code >= 400:
+                        errors += 1
+                except requests.RequestException:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for thread_latencies, _ in results for latency in thread_latencies)
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors for _, errors in results),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(quantiles[49], 2),
+        'p95_ms': round(quantiles[94], 2),
+        'p99_ms': round(quantiles[98], 2),
+    }
@@ -0,0 +1,111 @@
+"""
+Django management command measuring bytes on the wire and compression CPU
+per gzip/brotli level on real API payloads.
+
+Fetches the body of each read scenario (see benchmarks.runner.response_payloads)
+and compresses it at every level of --gzip-levels and --brotli-levels
+(brotli only when installed). Per scenario it prints the compressed size,
+ratio and best compression time; the summary adds throughput over all
+payloads. Like run_benchmarks it runs in a throwaway seeded test database
+unless --use-current-db is given.
+
+Usage:
+    python manage.py benchmark_compression
+    python manage.py benchmark_compression --gzip-levels 1,6,9 --scenario availability-calendar-year
+    python manage.py benchmark_compression --use-current-db    # after seed_benchmark_data
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks import seed
+from benchmarks.runner import response_payloads
+from hotel_backend.compression import available_encodings, compress
+from .seed_benchmark_data import add_seed_arguments, seed_options
+
+
+def _levels(value):
+    return [int(level) for level in value.split(',') if level.strip()]
+
+
+def _best(func, iterations):
+    best = None
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+class Command(BaseCommand):
+    help = 'Compare compressed size and CPU time per gzip/brotli level on API response payloads'
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+        parser.add_argument('--use-current-db', action='store_true',
+                            help='Benchmark the configured database (already seeded) instead of a temporary one')
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help='Only use this scenario (repeatable)')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed compressions per payload and level')
+        parser.add_argument('--gzip-levels', type=_levels, default='1,4,6,9', help='Comma-separated gzip levels')
+        parser.add_argument('--brotli-levels', type=_levels, default='1,4,6,9,11',
+                            help='Comma-separated brotli qualities')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = None
+        try:
+            if not options['use_current_db']:
+                old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                counts = seed.seed(**seed_options(options))
+                self.stdout.write('Seeded ' + ', '.join(f'{n} {name}' for name, n in counts.items()))
+            with override_settings(JOBS_ALWAYS_EAGER=False, METRICS_DUPLICATE_QUERY_WARNING=0):
+                bodies = {
+                    name: response.content for name, response in response_payloads(options['scenarios']).items()
+                }
+            if not bodies:
+                raise CommandError('No matching GET scenarios')
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        codecs = [('gzip', level) for level in options['gzip_levels']]
+        if 'br' in available_encodings():
+            codecs += [('br', level) for level in options['brotli_levels']]
+        else:
+            self.stdout.write(self.style.WARNING('brotli is not installed: gzip only'))
+        self._run(bodies, codecs, options['iterations'])
+
+    def _run(self, bodies, codecs, iterations):
+        header = f"{'scenario':<36}{'codec':>7}{'level':>6}{'KB':>9}{'wire KB':>9}{'ratio':>8}{'ms':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        totals = {setting: [0, 0.0] for setting in codecs}
+        for name, body in bodies.items():
+            for encoding, level in codecs:
+                size = len(compress(body, encoding, level))
+                elapsed = _best(lambda: compress(body, encoding, level), iterations)
+                totals[(encoding, level)][0] += size
+                totals[(encoding, level)][1] += elapsed
+                self.stdout.write(
+                    f'{name:<36}{encoding:>7}{level:>6}{len(body) / 1024:>9.1f}{size / 1024:>9.1f}'
+                    f'{len(body) / size:>7.1f}x{elapsed:>9.3f}'
+                )
+
+        raw = sum(len(body) for body in bodies.values())
+        self.stdout.write('')
+        header = (
+            f"{'all payloads':<36}{'codec':>7}{'level':>6}{'KB':>9}{'wire KB':>9}{'ratio':>8}{'ms':>9}{'MB/s':>8}"
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for (encoding, level), (size, elapsed) in totals.items():
+            self.stdout.write(
+                f"{'':<36}{encoding:>7}{level:>6}{raw / 1024:>9.1f}{size / 1024:>9.1f}"
+                f'{raw / size:>7.1f}x{elapsed:>9.3f}{raw / 1e6 / (elapsed / 1000):>8.1f}'
+            )
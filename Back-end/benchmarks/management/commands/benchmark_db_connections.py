@@ -0,0 +1,76 @@
+"""
+Django management command comparing database connection strategies under gunicorn.
+
+Starts gunicorn once per mode against the configured database (seed it
+first with seed_benchmark_data) and drives concurrent HTTP load:
+
+    per-request  DB_CONN_MAX_AGE=0: connect and disconnect on every request
+    persistent   DB_CONN_MAX_AGE=60: one reused connection per worker thread
+    pooled       DB_POOL=True: psycopg connection pool (PostgreSQL only)
+
+Usage:
+    python manage.py benchmark_db_connections
+    python manage.py benchmark_db_connections --workers 4 --threads 8 --concurrency 32 --requests 5000
+    python manage.py benchmark_db_connections --mode per-request --mode pooled --path /api/accommodations/1/
+"""
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from benchmarks.http_load import GunicornServer, run_load
+
+MODES = {
+    'per-request': {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'False'},
+    'persistent': {'DB_CONN_MAX_AGE': '60', 'DB_POOL': 'False'},
+    'pooled': {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'True'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark connect-per-request vs persistent vs pooled database connections under gunicorn'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', action='append', dest='modes', choices=list(MODES),
+                            help='Mode to run (repeatable). Defaults to all applicable modes.')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+        parser.add_argument('--threads', type=int, default=4, help='Threads per gunicorn worker')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent client threads')
+        parser.add_argument('--requests', type=int, default=2000, help='Total requests per mode')
+        parser.add_argument('--pool-max-size', type=int, default=None,
+                            help='DB_POOL_MAX_SIZE for the pooled mode (per worker process)')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Path to request (repeatable). Defaults to the accommodation list.')
+
+    def handle(self, *args, **options):
+        is_postgres = settings.DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+        modes = options['modes'] or [m for m in MODES if m != 'pooled' or is_postgres]
+        if 'pooled' in modes and not is_postgres:
+            raise CommandError('The pooled mode needs a PostgreSQL DATABASE_URL.')
+        paths = options['paths'] or ['/api/accommodations/']
+
+        self.stdout.write(
+            f"{options['workers']} workers x {options['threads']} threads, "
+            f"{options['concurrency']} clients, {options['requests']} requests per mode"
+        )
+        header = f"{'mode':<14}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}  database"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        for mode in modes:
+            env = dict(MODES[mode])
+            if options['pool_max_size']:
+                env['DB_POOL_MAX_SIZE'] = str(options['pool_max_size'])
+            with GunicornServer(env=env, workers=options['workers'], threads=options['threads']) as server:
+                # Warm up every worker before measuring
+                run_load(server.url, paths, total_requests=options['concurrency'] * 2,
+                         concurrency=options['concurrency'])
+                result = run_load(server.url, paths, total_requests=options['requests'],
+                                  concurrency=options['concurrency'])
+                database = requests.get(f'{server.url}/health', timeout=5).json().get('database', {})
+
+            summary = f"saturation {database['saturation']}" if database.get('pooled') else (
+                f"conn_max_age {database.get('conn_max_age')}"
+            )
+            self.stdout.write(
+                f"{mode:<14}{result['throughput_rps']:>9}{result['p50_ms']:>9}{result['p95_ms']:>9}"
+                f"{result['p99_ms']:>9}{result['errors']:>8}  {summary}"
+            )
@@ -0,0 +1,102 @@
+"""
+Django management command comparing JSON renderers and parsers on real API
+payloads.
+
+Fetches the data of each read scenario (see benchmarks.runner.response_payloads),
+then times rendering it with DRF's stdlib JSONRenderer and with
+FastJSONRenderer, and parsing the rendered body with JSONParser and
+FastJSONParser. Like run_benchmarks it runs in a throwaway
+seeded test database unless --use-current-db is given.
+
+Usage:
+    python manage.py benchmark_renderers
+    python manage.py benchmark_renderers --iterations 50 --scenario availability-calendar-year
+    python manage.py benchmark_renderers --use-current-db    # after seed_benchmark_data
+"""
+import io
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from benchmarks import seed
+from benchmarks.runner import response_payloads
+from hotel_backend.parsers import FastJSONParser
+from hotel_backend.renderers import FastJSONRenderer, fast_json_available
+from .seed_benchmark_data import add_seed_arguments, seed_options
+
+
+def _best_and_median(func, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, statistics.median(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Compare stdlib and orjson rendering/parsing time on API response payloads'
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+        parser.add_argument('--use-current-db', action='store_true',
+                            help='Benchmark the configured database (already seeded) instead of a temporary one')
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help='Only use this scenario (repeatable)')
+        parser.add_argument('--iterations', type=int, default=30, help='Timed renders per payload and renderer')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = None
+        try:
+            if not options['use_current_db']:
+                old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                counts = seed.seed(**seed_options(options))
+                self.stdout.write('Seeded ' + ', '.join(f'{n} {name}' for name, n in counts.items()))
+            with override_settings(JOBS_ALWAYS_EAGER=False, METRICS_DUPLICATE_QUERY_WARNING=0):
+                payloads = {
+                    name: response.data for name, response in response_payloads(options['scenarios']).items()
+                }
+            if not payloads:
+                raise CommandError('No matching GET scenarios')
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if not fast_json_available():
+            self.stdout.write(self.style.WARNING('orjson unavailable (or JSON_BACKEND=stdlib): both columns use the stdlib'))
+        self._run(payloads, options['iterations'])
+
+    def _run(self, payloads, iterations):
+        header = (
+            f"{'scenario':<36}{'KB':>8}{'render ms':>11}{'fast ms':>9}{'speedup':>9}"
+            f"{'parse ms':>10}{'fast ms':>9}{'speedup':>9}"
+        )
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        renderers = (JSONRenderer(), FastJSONRenderer())
+        parsers = (JSONParser(), FastJSONParser())
+        context = {'encoding': 'utf-8'}
+        for name, data in payloads.items():
+            body = renderers[0].render(data, 'application/json')
+            if renderers[1].render(data, 'application/json') != body:
+                raise CommandError(f'{name}: renderers disagree')
+            render = [
+                _best_and_median(lambda r=r: r.render(data, 'application/json'), iterations)[0] for r in renderers
+            ]
+            parse = [
+                _best_and_median(lambda p=p: p.parse(io.BytesIO(body), 'application/json', context), iterations)[0]
+                for p in parsers
+            ]
+            self.stdout.write(
+                f'{name:<36}{len(body) / 1024:>8.1f}'
+                f'{render[0]:>11.3f}{render[1]:>9.3f}{render[0] / render[1]:>8.1f}x'
+                f'{parse[0]:>10.3f}{parse[1]:>9.3f}{parse[0] / parse[1]:>8.1f}x'
+            )
@@ -0,0 +1,140 @@
+"""
+Django management command measuring serialization cost per 1000 rows.
+
+Each variant loads --rows rows and serializes them the way its endpoint
+does, query included; the media-url variants build --rows image URLs. Reports the best and median time per 1000 rows, the
+queries run and the JSON payload size. Like run_benchmarks it runs in a
+throwaway seeded test database unless --use-current-db is given.
+
+Usage:
+    python manage.py benchmark_serializers
+    python manage.py benchmark_serializers --rows 5000 --reservations 20000 --iterations 20
+    python manage.py benchmark_serializers --variant admin-reservation-lean
+    python manage.py benchmark_serializers --use-current-db    # after seed_benchmark_data
+"""
+import itertools
+import statistics
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accommodations.models import AccommodationImage
+from benchmarks import seed
+from hotel_backend.media_urls import media_url_builder
+from reservations.models import Reservation
+from reservations.serializers import AdminReservationListSerializer, ReservationListSerializer
+from .seed_benchmark_data import add_seed_arguments, seed_options
+
+
+def _request(query=None):
+    return Request(APIRequestFactory().get('/api/admin/reservations/', query or {}))
+
+
+def reservation_list_nested(rows):
+    """The previous admin list: model instances with the nested accommodation"""
+    request = _request()
+    queryset = (
+        Reservation.objects.select_related('accommodation', 'user')
+        .prefetch_related('accommodation__images').order_by('-created_at')[:rows]
+    )
+    return ReservationListSerializer(queryset, many=True, context={'request': request}).data
+
+
+def _admin_lean(rows, query=None):
+    request = _request(query)
+    columns = AdminReservationListSerializer(context={'request': request}).value_columns()
+    queryset = Reservation.objects.values(*columns).order_by('-created_at')[:rows]
+    return AdminReservationListSerializer(queryset, many=True, context={'request': request}).data
+
+
+def admin_reservation_lean(rows):
+    return _admin_lean(rows)
+
+
+def admin_reservation_sparse(rows):
+    return _admin_lean(rows, {'fields': 'id,status,check_in_date,check_out_date,accommodation_title'})
+
+
+def _image_names(rows):
+    names = AccommodationImage.objects.values_list('image', flat=True)[:rows]
+    return list(itertools.islice(itertools.cycle(names), rows))
+
+
+def media_urls_storage(rows):
+    """The previous per-image URL: storage url() made absolute by the request"""
+    request = _request()
+    return [request.build_absolute_uri(default_storage.url(name)) for name in _image_names(rows)]
+
+
+def media_urls_builder(rows):
+    request = _request()
+    media_url = media_url_builder(request)
+    return [media_url(name) for name in _image_names(rows)]
+
+
+VARIANTS = {
+    'reservation-list-nested': reservation_list_nested,
+    'admin-reservation-lean': admin_reservation_lean,
+    'admin-reservation-sparse': admin_reservation_sparse,
+    'media-urls-storage': media_urls_storage,
+    'media-urls-builder': media_urls_builder,
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark serializer cost per 1000 rows for list representations'
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+        parser.set_defaults(reservations=5000)
+        parser.add_argument('--use-current-db', action='store_true',
+                            help='Benchmark the configured database (already seeded) instead of a temporary one')
+        parser.add_argument('--variant', action='append', dest='variants', choices=list(VARIANTS),
+                            help='Variant to run (repeatable). Defaults to all.')
+        parser.add_argument('--rows', type=int, default=1000, help='Rows serialized per iteration')
+        parser.add_argument('--iterations', type=int, default=10, help='Measured iterations per variant')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = None
+        try:
+            if not options['use_current_db']:
+                old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                counts = seed.seed(**seed_options(options))
+                self.stdout.write('Seeded ' + ', '.join(f'{n} {name}' for name, n in counts.items()))
+            self._run(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _run(self, options):
+        rows = options['rows']
+        available = Reservation.objects.count()
+        if available < rows:
+            raise CommandError(f'Only {available} reservations; seed more or lower --rows')
+
+        header = f"{'variant':<28}{'best ms/1k':>11}{'p50 ms/1k':>11}{'queries':>9}{'KB/1k':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name in options['variants'] or VARIANTS:
+            serialize = VARIANTS[name]
+            serialize(rows)  # warm up
+            timings = []
+            for _ in range(options['iterations']):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    data = serialize(rows)
+                    timings.append(time.perf_counter() - start)
+            payload = JSONRenderer().render(data)
+            per_1k = 1000 * 1000 / rows
+            self.stdout.write(
+                f'{name:<28}{min(timings) * per_1k:>11.1f}{statistics.median(timings) * per_1k:>11.1f}'
+                f'{len(queries):>9}{len(payload) / 1024 * 1000 / rows:>9.1f}'
+            )
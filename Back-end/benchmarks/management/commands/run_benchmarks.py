@@ -0,0 +1,116 @@
+"""
+Django management command to benchmark API endpoints.
+
+By default the benchmark runs in a throwaway test database seeded with
+deterministic synthetic data, so it never touches real data.
+
+Usage:
+    python manage.py run_benchmarks
+    python manage.py run_benchmarks --accommodations 500 --iterations 50
+    python manage.py run_benchmarks --scenario accommodation-list --scenario reservation-create
+    python manage.py run_benchmarks --save-baseline
+    python manage.py run_benchmarks --fail-on-regression
+    python manage.py run_benchmarks --use-current-db    # after seed_benchmark_data
+"""
+import json
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from benchmarks import seed
+from benchmarks.runner import compare, run_benchmarks
+from .seed_benchmark_data import add_seed_arguments, seed_options
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[2] / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark API endpoints (latency, queries, allocations) and compare with a baseline'
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+        parser.add_argument('--iterations', type=int, default=30, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per scenario')
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            dest='scenarios',
+            help='Only run this scenario (repeatable)',
+        )
+        parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help='Baseline JSON file')
+        parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed p95 slowdown before a scenario counts as a regression (0.25 = 25%%)',
+        )
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit non-zero on regressions')
+        parser.add_argument(
+            '--use-current-db',
+            action='store_true',
+            help='Benchmark the configured database (already seeded) instead of a temporary one',
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+
+        setup_test_environment()
+        old_name = None
+        try:
+            if not options['use_current_db']:
+                old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                counts = seed.seed(**seed_options(options))
+                self.stdout.write('Seeded ' + ', '.join(f'{n} {name}' for name, n in counts.items()))
+
+            # Measure the request path only: background jobs stay queued
+            with override_settings(JOBS_ALWAYS_EAGER=False, METRICS_DUPLICATE_QUERY_WARNING=0):
+                results = run_benchmarks(
+                    iterations=options['iterations'],
+                    warmup=options['warmup'],
+                    only=options['scenarios'],
+                )
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        baseline_path = options['baseline']
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        params = seed_options(options)
+        params.pop('start')
+        if baseline and baseline.get('params') != params:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline was recorded with different data sizes: {baseline.get('params')}"
+            ))
+        self._report(results, baseline.get('scenarios', {}))
+
+        if options['save_baseline']:
+            baseline_path.write_text(json.dumps({
+                'params': params,
+                'scenarios': {**baseline.get('scenarios', {}), **results},
+            }, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+            return
+
+        regressions = compare(results, baseline, options['tolerance'])
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(f'REGRESSION {regression}'))
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} benchmark regression(s)')
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
+
+    def _report(self, results, baseline):
+        header = f"{'scenario':<26}{'p50 ms':>9}{'p95 ms':>9}{'mean ms':>9}{'queries':>9}{'peak KB':>10}  baseline p95/queries"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, r in results.items():
+            base = baseline.get(name)
+            reference = f"{base['p95_ms']}ms/{base['queries']}" if base else '-'
+            self.stdout.write(
+                f"{name:<26}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['mean_ms']:>9}{r['queries']:>9}"
+                f"{r['peak_alloc_kb']:>10}  {reference}"
+            )
@@ -0,0 +1,58 @@
+"""
+Django management command to seed deterministic synthetic data for benchmarks.
+
+Usage:
+    python manage.py seed_benchmark_data
+    python manage.py seed_benchmark_data --accommodations 500 --reservations 5000
+    python manage.py seed_benchmark_data --flush
+"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from benchmarks import seed
+
+
+def add_seed_arguments(parser):
+    parser.add_argument('--accommodations', type=int, default=50, help='Number of accommodations')
+    parser.add_argument('--images', type=int, default=4, help='Gallery images per accommodation')
+    parser.add_argument('--amenities', type=int, default=20, help='Number of amenities')
+    parser.add_argument('--days', type=int, default=365, help='Days of RoomAvailability per accommodation')
+    parser.add_argument('--reservations', type=int, default=200, help='Number of reservations')
+    parser.add_argument('--users', type=int, default=20, help='Number of guest users')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument(
+        '--start',
+        type=date.fromisoformat,
+        default=None,
+        help='First availability date (YYYY-MM-DD). Defaults to today.',
+    )
+
+
+def seed_options(options):
+    return {
+        key: options[key]
+        for key in ('accommodations', 'images', 'amenities', 'days', 'reservations', 'users', 'seed', 'start')
+    }
+
+
+class Command(BaseCommand):
+    help = 'Seed deterministic synthetic accommodations, availability and reservations for benchmarks'
+
+    def add_arguments(self, parser):
+        add_seed_arguments(parser)
+        parser.add_argument(
+            '--flush',
+            action='store_true',
+            help='Delete previously seeded benchmark data first',
+        )
+
+    def handle(self, *args, **options):
+        if options['accommodations'] < 1 or options['users'] < 1:
+            raise CommandError('--accommodations and --users must be at least 1.')
+
+        if options['flush']:
+            seed.flush()
+            self.stdout.write('Removed existing benchmark data')
+
+        counts = seed.seed(**seed_options(options))
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Seeded {summary}'))
@@ -0,0 +1,244 @@
+"""
+Drive API endpoints through the Django test client and measure them.
+
+Each scenario is one HTTP request. For every scenario the runner reports
+p50/p95/mean latency, SQL queries per request and peak Python allocations
+(from one extra request traced with tracemalloc, so tracing overhead does
+not skew the timings). Writes are rolled back after each request so every
+iteration sees the same data.
+"""
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accommodations.models import Accommodation, RoomAvailability
+from accounts.admin_tokens import create_admin_access_token
+from accounts.tokens import get_tokens_for_user
+from hotel_backend.metrics import collect_queries
+from reservations.models import Reservation
+from .seed import TITLE_PREFIX, USERNAME_PREFIX
+
+ADMIN_USERNAME = 'bench-admin'
+
+
+class Scenario:
+    def __init__(self, name, path, method='get', data=None, auth=None, expected_status=200, format='json'):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.data = data
+        self.auth = auth
+        self.expected_status = expected_status
+        self.format = format
+
+
+def _free_window(accommodation, nights=3):
+    """First run of `nights` bookable days for an accommodation, from the end of the horizon"""
+    days = list(
+        RoomAvailability.objects.filter(accommodation=accommodation, date__gte=timezone.localdate())
+        .order_by('-date')
+        .values_list('date', 'status')
+    )
+    run = []
+    for day, status in days:
+        if status != 'available':
+            run = []
+            continue
+        run.append(day)
+        if len(run) == nights:
+            check_in = run[-1]
+            overlapping = Reservation.objects.filter(
+                accommodation=accommodation,
+                status__in=['pending', 'confirmed'],
+                check_in_date__lt=check_in + timedelta(days=nights),
+                check_out_date__gt=check_in,
+            ).exists()
+            if not overlapping:
+                return check_in, check_in + timedelta(days=nights)
+            run = run[1:]
+    raise RuntimeError(f'No bookable {nights}-night window for accommodation {accommodation.id}')
+
+
+def benchmark_targets():
+    """The seeded accommodation and guest user the scenarios are run against"""
+    accommodation = Accommodation.objects.filter(title__startswith=TITLE_PREFIX).order_by('id').first()
+    if accommodation is None:
+        raise RuntimeError('No benchmark data found; run seed_benchmark_data first')
+    user = (
+        User.objects.filter(username__startswith=USERNAME_PREFIX, reservations__isnull=False)
+        .order_by('id').first()
+    )
+    return accommodation, user
+
+
+def seeded_accommodation_ids(limit=20):
+    """Ids of the first `limit` seeded accommodations, e.g. one page of search results"""
+    return list(
+        Accommodation.objects.filter(title__startswith=TITLE_PREFIX).order_by('id').values_list('id', flat=True)[:limit]
+    )
+
+
+def build_scenarios():
+    """Return (scenarios, benchmark user) for the seeded data (see benchmarks.seed)"""
+    accommodation, user = benchmark_targets()
+    base = f'/api/accommodations/{accommodation.id}'
+    today = timezone.localdate()
+    check_in, check_out = _free_window(accommodation)
+    month = f'start_date={today.isoformat()}&end_date={(today + timedelta(days=30)).isoformat()}'
+
+    return [
+        Scenario('accommodation-list', '/api/accommodations/'),
+        Scenario('accommodation-detail', f'{base}/'),
+        Scenario('availability-calendar', f'{base}/availability-calendar/?{month}'),
+        Scenario('availability-calendar-compact', f'{base}/availability-calendar/?{month}&format=compact'),
+        Scenario('unavailable-dates', f'{base}/unavailable-dates/'),
+        Scenario(
+            'availability-summary',
+            f"/api/accommodations/availability-summary/?ids={','.join(map(str, seeded_accommodation_ids()))}&{month}",
+        ),
+        Scenario('reservation-list', '/api/reservations/', auth='user'),
+        Scenario('reservation-create', '/api/reservations/', method='post', auth='user', expected_status=201, data={
+            'accommodation': accommodation.id,
+            'check_in_date': check_in.isoformat(),
+            'check_out_date': check_out.isoformat(),
+            'number_of_guests': 1,
+        }),
+        Scenario('admin-accommodation-list', '/api/admin/accommodations/', auth='admin'),
+        Scenario('admin-reservation-list', '/api/admin/reservations/', auth='admin'),
+        Scenario('admin-reservation-search', f'/api/admin/reservations/?search={user.username}', auth='admin'),
+        Scenario('admin-reservation-search-phone', '/api/admin/reservations/?search=0912345', auth='admin'),
+        Scenario(
+            'admin-room-availability',
+            f'/api/admin/room-availability/?accommodation={accommodation.id}&{month}',
+            auth='admin',
+        ),
+    ], user
+
+
+def _clients(user):
+    admin, _ = User.objects.get_or_create(username=ADMIN_USERNAME, defaults={'is_staff': True})
+    clients = {None: APIClient(), 'user': APIClient(), 'admin': APIClient()}
+    clients['user'].credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(user).access_token}')
+    clients['admin'].credentials(HTTP_AUTHORIZATION=f'Admin {create_admin_access_token(admin)}')
+    return clients
+
+
+def _request(client, scenario):
+    if scenario.method == 'get':
+        return client.get(scenario.path)
+    return getattr(client, scenario.method)(scenario.path, scenario.data, format=scenario.format)
+
+
+def _measure_once(client, scenario):
+    """Time one request; writes are rolled back. Returns (seconds, queries, response)"""
+    with transaction.atomic():
+        with collect_queries() as collector:
+            start = time.perf_counter()
+            response = _request(client, scenario)
+            # Streamed bodies run their queries while being consumed
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            elapsed = time.perf_counter() - start
+        transaction.set_rollback(True)
+    if response.status_code != scenario.expected_status:
+        raise RuntimeError(
+            f'{scenario.name}: expected {scenario.expected_status}, got {response.status_code}: '
+            f'{body[:300]!r}'
+        )
+    return elapsed, collector.count, response
+
+
+def _percentile(values, percent):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def run_scenario(client, scenario, iterations=30, warmup=3):
+    for _ in range(warmup):
+        _measure_once(client, scenario)
+
+    timings = []
+    queries = []
+    for _ in range(iterations):
+        elapsed, count, _ = _measure_once(client, scenario)
+        timings.append(elapsed * 1000)
+        queries.append(count)
+
+    tracemalloc.start()
+    try:
+        _measure_once(client, scenario)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(_percentile(timings, 50), 2),
+        'p95_ms': round(_percentile(timings, 95), 2),
+        'mean_ms': round(statistics.fmean(timings), 2),
+        'queries': max(queries),
+        'peak_alloc_kb': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(iterations=30, warmup=3, only=None):
+    """Run every scenario (or those named in `only`) and return {name: result}"""
+    scenarios, user = build_scenarios()
+    clients = _clients(user)
+    results = {}
+    for scenario in scenarios:
+        if only and scenario.name not in only:
+            continue
+        results[scenario.name] = run_scenario(clients[scenario.auth], scenario, iterations, warmup)
+    return results
+
+
+
+def response_payloads(only=None):
+    """
+    {scenario name: response} for the GET scenarios (or those named in
+    `only`) plus 365-day availability calendars in both formats; used by the
+    renderer and compression benchmarks.
+    """
+    scenarios, user = build_scenarios()
+    accommodation, _ = benchmark_targets()
+    today = timezone.localdate()
+    year = (
+        f'/api/accommodations/{accommodation.id}/availability-calendar/'
+        f'?start_date={today.isoformat()}&end_date={(today + timedelta(days=365)).isoformat()}'
+    )
+    scenarios.append(Scenario('availability-calendar-year', year))
+    scenarios.append(Scenario('availability-calendar-year-compact', f'{year}&format=compact'))
+    clients = _clients(user)
+    responses = {}
+    for scenario in scenarios:
+        if scenario.method != 'get' or (only and scenario.name not in only):
+            continue
+        response = _request(clients[scenario.auth], scenario)
+        if response.status_code != 200:
+            raise RuntimeError(f'{scenario.name}: got {response.status_code}')
+        responses[scenario.name] = response
+    return responses
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Return a list of regressions against a baseline.
+
+    A scenario regresses when it runs more queries than the baseline, or
+    when its p95 exceeds the baseline p95 by more than `tolerance`.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('scenarios', {}).get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            regressions.append(f"{name}: queries {base['queries']} -> {result['queries']}")
+        if result['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {result['p95_ms']}ms")
+    return regressions
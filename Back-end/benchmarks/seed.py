@@ -0,0 +1,183 @@
+"""
+Deterministic synthetic inventory for benchmarks.
+
+The same parameters and seed always produce the same accommodations,
+amenities, images, daily availability and reservations (only primary keys
+and timestamps differ), so runs on different machines are comparable.
+Rows are written with bulk_create and bypass model signals and validation.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from accommodations.models import Accommodation, AccommodationImage, Amenity, RoomAvailability
+from reservations.models import Reservation
+from reservations.search import reindex_reservations
+
+TITLE_PREFIX = 'Benchmark'
+USERNAME_PREFIX = 'bench-user-'
+AMENITY_PREFIX = 'bench-amenity-'
+PASSWORD = 'bench-pass-1234'
+
+CITIES = [
+    ('تهران', 'تهران'),
+    ('اصفهان', 'اصفهان'),
+    ('شیراز', 'فارس'),
+    ('مشهد', 'خراسان رضوی'),
+    ('تبریز', 'آذربایجان شرقی'),
+    ('رشت', 'گیلان'),
+]
+AMENITY_CATEGORIES = ['سرویس بهداشتی', 'آشپزخانه', 'امکانات رفاهی', 'ایمنی']
+
+# Relative weights of non-reserved daily statuses
+DAY_STATUSES = [
+    ('available', 90),
+    ('blocked', 5),
+    ('under_maintenance', 3),
+    ('unavailable', 2),
+]
+
+# Reservations are kept out of the last days of the horizon so benchmarks
+# can always find a bookable window there
+BOOKING_MARGIN_DAYS = 30
+
+
+def flush():
+    """Delete everything created by seed()"""
+    Reservation.objects.filter(user__username__startswith=USERNAME_PREFIX).delete()
+    Accommodation.objects.filter(title__startswith=TITLE_PREFIX).delete()
+    Amenity.objects.filter(name__startswith=AMENITY_PREFIX).delete()
+    User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+
+def _plan_reservations(rng, accommodation_ids, reservations, days):
+    """Choose non-overlapping stays: {accommodation_id: [(first_day, nights), ...]}"""
+    bookable_days = max(days - BOOKING_MARGIN_DAYS, 1)
+    occupied = {accommodation_id: set() for accommodation_id in accommodation_ids}
+    plan = {accommodation_id: [] for accommodation_id in accommodation_ids}
+
+    for _ in range(reservations):
+        # A few tries to find a free stay; crowded inventories just get fewer
+        for _ in range(10):
+            accommodation_id = rng.choice(accommodation_ids)
+            nights = rng.randint(1, 7)
+            first_day = rng.randrange(bookable_days)
+            stay = set(range(first_day, first_day + nights))
+            if first_day + nights <= bookable_days and not stay & occupied[accommodation_id]:
+                occupied[accommodation_id] |= stay
+                plan[accommodation_id].append((first_day, nights))
+                break
+    return plan
+
+
+@transaction.atomic
+def seed(accommodations=50, images=4, amenities=20, days=365, reservations=200, users=20,
+         seed=42, start=None):
+    """
+    Create a synthetic inventory and return the number of rows per model.
+
+    `images` and `amenities` are per accommodation and in total respectively;
+    availability rows cover `days` days from `start` (default today).
+    """
+    rng = random.Random(seed)
+    start = start or timezone.localdate()
+
+    amenity_objects = Amenity.objects.bulk_create([
+        Amenity(name=f'{AMENITY_PREFIX}{i}', category=AMENITY_CATEGORIES[i % len(AMENITY_CATEGORIES)])
+        for i in range(amenities)
+    ])
+
+    accommodation_objects = []
+    for i in range(accommodations):
+        city, province = rng.choice(CITIES)
+        accommodation_objects.append(Accommodation(
+            title=f'{TITLE_PREFIX} {i:04d}',
+            city=city,
+            province=province,
+            address=f'خیابان {rng.randint(1, 200)}، پلاک {rng.randint(1, 99)}',
+            description='اقامتگاه آزمایشی برای سنجش کارایی',
+            capacity=rng.randint(1, 8),
+            beds_description=f'{rng.randint(1, 4)} تخت',
+            area=rng.randint(20, 200),
+            price_per_night=Decimal(rng.randint(10, 200) * 100000),
+            rating=Decimal(rng.randint(30, 50)) / 10,
+            main_image=f'benchmarks/room-{i:04d}.jpg',
+        ))
+    accommodation_objects = Accommodation.objects.bulk_create(accommodation_objects)
+    accommodation_ids = [a.id for a in accommodation_objects]
+
+    Through = Accommodation.amenities.through
+    Through.objects.bulk_create([
+        Through(accommodation_id=a.id, amenity_id=amenity.id)
+        for a in accommodation_objects
+        for amenity in rng.sample(amenity_objects, min(len(amenity_objects), rng.randint(3, 10)))
+    ], batch_size=2000)
+
+    AccommodationImage.objects.bulk_create([
+        AccommodationImage(accommodation_id=a.id, image=f'benchmarks/room-{i:04d}-{j}.jpg')
+        for i, a in enumerate(accommodation_objects)
+        for j in range(images)
+    ], batch_size=2000)
+
+    plan = _plan_reservations(rng, accommodation_ids, reservations, days)
+
+    statuses, weights = zip(*DAY_STATUSES)
+    availability = []
+    prices = {}
+    for a in accommodation_objects:
+        reserved_days = {
+            first_day + night
+            for first_day, nights in plan[a.id]
+            for night in range(nights)
+        }
+        for day in range(days):
+            price = None
+            if rng.random() < 0.3:
+                price = Decimal(round(float(a.price_per_night) * rng.uniform(0.8, 1.5), -5))
+            prices[(a.id, day)] = price if price is not None else a.price_per_night
+            status = 'reserved' if day in reserved_days else rng.choices(statuses, weights)[0]
+            availability.append(RoomAvailability(
+                accommodation_id=a.id,
+                date=start + timedelta(days=day),
+                price=price,
+                status=status,
+            ))
+    RoomAvailability.objects.bulk_create(availability, batch_size=2000)
+
+    password = make_password(PASSWORD, salt='benchmarks')
+    user_objects = User.objects.bulk_create([
+        User(username=f'{USERNAME_PREFIX}{i}', email=f'{USERNAME_PREFIX}{i}@example.com', password=password)
+        for i in range(users)
+    ])
+
+    reservation_objects = []
+    for accommodation_id in accommodation_ids:
+        for first_day, nights in plan[accommodation_id]:
+            check_in = start + timedelta(days=first_day)
+            reservation_objects.append(Reservation(
+                user=rng.choice(user_objects),
+                accommodation_id=accommodation_id,
+                check_in_date=check_in,
+                check_out_date=check_in + timedelta(days=nights),
+                number_of_guests=1,
+                total_price=sum(prices[(accommodation_id, first_day + n)] for n in range(nights)),
+                status=rng.choice(['pending', 'confirmed', 'confirmed']),
+                contact_phone=f'0912{rng.randint(0, 9999999):07d}',
+            ))
+    Reservation.objects.bulk_create(reservation_objects, batch_size=2000)
+    # bulk_create skips Reservation.save(), which fills the admin search columns
+    reindex_reservations(Reservation.objects.filter(user__username__startswith=USERNAME_PREFIX))
+
+    return {
+        'amenities': len(amenity_objects),
+        'accommodations': len(accommodation_objects),
+        'images': len(accommodation_objects) * images,
+        'availability': len(availability),
+        'users': len(user_objects),
+        'reservations': len(reservation_objects),
+    }
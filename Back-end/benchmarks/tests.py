@@ -0,0 +1,99 @@
+"""
+Tests for the benchmark seed data, runner and serializer benchmark.
+"""
+import tempfile
+from django.test import TestCase, override_settings
+from accommodations.models import Accommodation, RoomAvailability
+from reservations.models import Reservation
+from . import seed
+from .budgets import BUDGETS, EXEMPT, QueryBudgetTestMixin, route_names
+from .management.commands.benchmark_serializers import VARIANTS
+from .runner import compare, run_benchmarks
+
+
+class SeedTest(TestCase):
+    """Test that seeding is deterministic and consistent."""
+
+    def snapshot(self):
+        return (
+            list(Accommodation.objects.order_by('title').values_list('title', 'city', 'price_per_night')),
+            list(RoomAvailability.objects.order_by('accommodation__title', 'date').values_list('date', 'status', 'price')),
+            list(Reservation.objects.order_by('accommodation__title', 'check_in_date').values_list(
+                'check_in_date', 'check_out_date', 'total_price')),
+        )
+
+    def test_seed_is_deterministic(self):
+        counts = seed.seed(accommodations=3, images=2, amenities=5, days=60, reservations=10, users=3)
+        self.assertEqual(counts['availability'], 180)
+        first = self.snapshot()
+
+        seed.flush()
+        self.assertFalse(Accommodation.objects.exists())
+        seed.seed(accommodations=3, images=2, amenities=5, days=60, reservations=10, users=3)
+        self.assertEqual(self.snapshot(), first)
+
+    def test_reserved_days_match_reservations(self):
+        seed.seed(accommodations=2, days=60, reservations=8, users=2)
+        nights = sum(r.get_nights() for r in Reservation.objects.all())
+        self.assertEqual(RoomAvailability.objects.filter(status='reserved').count(), nights)
+
+
+@override_settings(JOBS_ALWAYS_EAGER=False, METRICS_DUPLICATE_QUERY_WARNING=0)
+class RunnerTest(TestCase):
+    """Test the endpoint benchmark runner on a tiny dataset."""
+
+    def test_run_and_compare(self):
+        seed.seed(accommodations=2, images=1, amenities=3, days=60, reservations=4, users=2)
+        results = run_benchmarks(iterations=2, warmup=0)
+
+        self.assertIn('reservation-create', results)
+        self.assertEqual(set(results['accommodation-list']), {'p50_ms', 'p95_ms', 'mean_ms', 'queries', 'peak_alloc_kb'})
+        # Writes made by the booking scenario are rolled back
+        self.assertEqual(Reservation.objects.count(), 4)
+
+        baseline = {'scenarios': {'accommodation-list': {'p95_ms': 1e9, 'queries': 0}}}
+        self.assertEqual(
+            compare(results, baseline),
+            [f"accommodation-list: queries 0 -> {results['accommodation-list']['queries']}"]
+        )
+
+
+class SerializerBenchmarkTest(TestCase):
+    """Test that the serializer benchmark variants agree on the data they share."""
+
+    def test_variants_agree(self):
+        seed.seed(accommodations=2, images=1, amenities=3, days=60, reservations=6, users=2)
+        rows = Reservation.objects.count()
+        results = {
+            name: [dict(row) for row in VARIANTS[name](rows)]
+            for name in ('reservation-list-nested', 'admin-reservation-lean', 'admin-reservation-sparse')
+        }
+
+        shared = ['id', 'accommodation_title', 'check_in_date', 'check_out_date', 'status']
+        nested = [{key: row[key] for key in shared} for row in results['reservation-list-nested']]
+        for name in ('admin-reservation-lean', 'admin-reservation-sparse'):
+            self.assertEqual([{key: row[key] for key in shared} for row in results[name]], nested, name)
+        self.assertEqual(
+            [row['total_price'] for row in results['admin-reservation-lean']],
+            [row['total_price'] for row in results['reservation-list-nested']],
+        )
+        self.assertEqual(VARIANTS['media-urls-builder'](5), VARIANTS['media-urls-storage'](5))
+
+
+@override_settings(JOBS_ALWAYS_EAGER=False, JWT_CLAIMS_USER=False, METRICS_DUPLICATE_QUERY_WARNING=0)
+class QueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    """CI gate: every route stays within its query budget at 1x and 10x data."""
+
+    SMALL = {'accommodations': 2, 'images': 2, 'amenities': 4, 'days': 60, 'reservations': 6, 'users': 2}
+    LARGE = {'accommodations': 20, 'images': 2, 'amenities': 40, 'days': 60, 'reservations': 60, 'users': 20}
+
+    def test_every_route_has_a_budget(self):
+        missing = route_names() - set(BUDGETS) - set(EXEMPT)
+        self.assertFalse(missing, f'Routes without a query budget: {sorted(missing)}')
+        self.assertFalse(set(BUDGETS) - route_names(), 'Budgets for routes that no longer exist')
+
+    def test_query_counts_within_budget_and_constant(self):
+        # The import budget queues a job that never runs here, so its upload is never deleted
+        with tempfile.TemporaryDirectory() as media_root, tempfile.TemporaryDirectory() as upload_dir, \
+                override_settings(MEDIA_ROOT=media_root, IMPORT_UPLOAD_DIR=upload_dir):
+            self.assertQueryBudgets(self.SMALL, self.LARGE)
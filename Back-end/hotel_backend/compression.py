@@ -0,0 +1,112 @@
+"""
+gzip/brotli encoders for API responses (see middleware.CompressionMiddleware).
+
+Brotli is offered only when the `brotli` package is installed; gzip (zlib)
+is always available. Streams are compressed incrementally and flushed only
+at the end, so a streamed export is never held in memory but still
+compresses as well as a single body.
+"""
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised when brotli is not installed
+    brotli = None
+
+
+class GzipEncoder:
+    encoding = 'gzip'
+
+    def __init__(self, level):
+        # wbits=31: gzip container, no file name and a zero mtime, so output is deterministic
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    encoding = 'br'
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+ENCODERS = {'br': BrotliEncoder, 'gzip': GzipEncoder}
+
+
+def available_encodings():
+    """Supported Content-Encodings, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def default_level(encoding):
+    """Configured level: COMPRESSION_BROTLI_QUALITY (0-11) or COMPRESSION_GZIP_LEVEL (1-9)"""
+    return settings.COMPRESSION_BROTLI_QUALITY if encoding == 'br' else settings.COMPRESSION_GZIP_LEVEL
+
+
+def negotiate(accept_encoding):
+    """
+    The encoding to answer an Accept-Encoding header with, or None.
+
+    Honours q-values (q=0 refuses an encoding, also through `*`); among
+    equally weighted encodings brotli is preferred.
+    """
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in available_encodings():
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress(data, encoding, level=None):
+    encoder = ENCODERS[encoding](default_level(encoding) if level is None else level)
+    return encoder.compress(data) + encoder.finish()
+
+
+def compress_stream(chunks, encoding, level=None):
+    """Compress an iterable of byte chunks lazily, yielding only non-empty chunks"""
+    encoder = ENCODERS[encoding](default_level(encoding) if level is None else level)
+    for chunk in chunks:
+        data = encoder.compress(chunk)
+        if data:
+            yield data
+    yield encoder.finish()
+
+
+async def compress_async_stream(chunks, encoding, level=None):
+    """compress_stream for async iterators (streaming responses under ASGI)"""
+    encoder = ENCODERS[encoding](default_level(encoding) if level is None else level)
+    async for chunk in chunks:
+        data = encoder.compress(chunk)
+        if data:
+            yield data
+    yield encoder.finish()
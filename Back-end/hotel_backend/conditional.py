@@ -0,0 +1,122 @@
+"""
+Conditional GET (ETag / Last-Modified) for read endpoints.
+
+A view declares a version: the few values its response depends on, usually
+the count and max(updated_at) of each queryset it reads (see
+queryset_version, and row_version to fetch a row's and its related rows'
+versions in one query). When If-None-Match matches, a 304 goes out without loading rows
+or serializing. Otherwise the response is built as usual and carries the
+ETag, Last-Modified and `Cache-Control: no-cache`, so browsers and CDNs
+revalidate instead of guessing a freshness lifetime.
+
+Only the ETag validates: deleting a row changes the count but not
+necessarily max(updated_at), so If-Modified-Since alone could answer 304
+for a changed response and is ignored.
+
+CompressionMiddleware turns the ETag of compressed responses into a weak
+one; If-None-Match compares weakly, so it still validates.
+
+Accommodation.updated_at also moves when its images or amenities change
+(see accommodations.signals), so accommodation versions cover them.
+"""
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def queryset_version(queryset, field='updated_at'):
+    """(count, latest `field`) of `queryset`, in one aggregate query"""
+    row = queryset.order_by().aggregate(count=Count('pk'), latest=Max(field))
+    return row['count'], row['latest']
+
+
+def row_version(queryset, related=(), field='updated_at'):
+    """
+    Version of the single row of `queryset` and of related querysets, in one
+    query: [row's `field`, (count, latest `field`) per related queryset].
+
+    `related` holds (queryset, key) pairs, counting the related rows whose
+    `key` is the row's pk. Returns None when the row does not exist.
+    """
+    annotations = {}
+    for index, (related_queryset, key) in enumerate(related):
+        # Grouped by the correlated key, so each subquery yields one row
+        grouped = related_queryset.filter(**{key: OuterRef('pk')}).order_by().values(key)
+        annotations[f'count_{index}'] = Coalesce(Subquery(grouped.annotate(n=Count('pk')).values('n')), 0)
+        annotations[f'latest_{index}'] = Subquery(grouped.annotate(latest=Max(field)).values('latest'))
+    row = queryset.annotate(**annotations).values(field, *annotations).first()
+    if row is None:
+        return None
+    return [row[field]] + [(row[f'count_{index}'], row[f'latest_{index}']) for index in range(len(related))]
+
+
+def _datetimes(parts):
+    for part in parts:
+        if isinstance(part, (list, tuple)):
+            yield from _datetimes(part)
+        elif isinstance(part, datetime):
+            yield part
+
+
+def conditional_response(request, parts, render, last_modified=True):
+    """
+    Answer `request` from `parts` (the version; None: not cacheable) and
+    call `render()` for the full response only when the client's copy is
+    stale. The latest datetime among `parts` is sent as Last-Modified,
+    unless `last_modified` is False (responses that also change with the
+    clock).
+    """
+    if parts is None or request.method not in ('GET', 'HEAD'):
+        return render()
+    # The media type tells the JSON and browsable API renderings apart
+    key = repr((request.get_full_path(), getattr(request, 'accepted_media_type', None), parts))
+    etag = quote_etag(hashlib.sha1(key.encode()).hexdigest())
+    latest = max(_datetimes(parts), default=None) if last_modified else None
+    timestamp = int(latest.timestamp()) if latest else None
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = render()
+        if response.status_code != 200:
+            return response
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def conditional_get(version, last_modified=True):
+    """
+    Decorator for function views (inside @api_view): `version(request,
+    *args, **kwargs)` returns the response's version parts, or None when
+    the request cannot be answered from them (invalid parameters, 404).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            return conditional_response(
+                request, version(request, *args, **kwargs),
+                lambda: view(request, *args, **kwargs), last_modified,
+            )
+        return wrapped
+    return decorator
+
+
+class ConditionalGetMixin:
+    """Class-based view counterpart of `conditional_get`; implement get_version"""
+    last_modified = True
+
+    def get_version(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.get_version(request, *args, **kwargs),
+            lambda: super(ConditionalGetMixin, self).get(request, *args, **kwargs), self.last_modified,
+        )
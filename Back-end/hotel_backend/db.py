@@ -0,0 +1,40 @@
+"""
+Database connection diagnostics.
+"""
+from django.db import connections
+
+
+def connection_stats(alias='default'):
+    """
+    Describe how connections to `alias` are managed, for /health.
+
+    With the psycopg pool enabled this includes the pool counters and
+    `saturation`: the share of the pool's maximum size currently checked
+    out (1.0 means new requests wait for a connection).
+    """
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+    stats = {
+        'vendor': connection.vendor,
+        'pooled': False,
+        'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+        'conn_health_checks': settings_dict.get('CONN_HEALTH_CHECKS', False),
+    }
+
+    if not settings_dict.get('OPTIONS', {}).get('pool'):
+        return stats
+
+    pool = connection.pool
+    pool_stats = pool.get_stats()
+    in_use = pool_stats.get('pool_size', 0) - pool_stats.get('pool_available', 0)
+    stats.update({
+        'pooled': True,
+        'pool_min': pool_stats.get('pool_min', pool.min_size),
+        'pool_max': pool_stats.get('pool_max', pool.max_size),
+        'pool_size': pool_stats.get('pool_size', 0),
+        'pool_available': pool_stats.get('pool_available', 0),
+        'in_use': in_use,
+        'requests_waiting': pool_stats.get('requests_waiting', 0),
+        'saturation': round(in_use / pool.max_size, 3) if pool.max_size else 0,
+    })
+    return stats
@@ -0,0 +1,109 @@
+"""
+Read-replica routing.
+
+Replicas listed in DATABASE_REPLICA_URLS become the database aliases in
+DATABASE_REPLICAS. Reads only go to a replica inside a `replica_reads`
+view (or ReplicaReadMixin class view) handling a safe method; everything
+else, including all writes and the admin panel, uses `default`.
+
+Read-your-writes: after a successful booking write (PinPrimaryAfterWriteMixin)
+the client is pinned to the primary for DATABASE_REPLICA_PIN_SECONDS, via a
+cookie and an `X-DB-Pin-Until` response header that clients without cookies
+can send back as a request header.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+PIN_COOKIE = 'db_pin_until'
+PIN_HEADER = 'X-DB-Pin-Until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def use_replica():
+    """Route reads in this block to a replica (if any are configured)"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads to a random replica while `use_replica` is active"""
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+def _pinned_until(request):
+    value = request.COOKIES.get(PIN_COOKIE) or request.headers.get(PIN_HEADER)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def is_pinned(request):
+    """Whether the client wrote recently and must read from the primary"""
+    return _pinned_until(request) > time.time()
+
+
+def can_use_replica(request):
+    return request.method in SAFE_METHODS and not is_pinned(request)
+
+
+def pin_to_primary(response):
+    """Pin the client to the primary for DATABASE_REPLICA_PIN_SECONDS"""
+    seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+    until = f'{time.time() + seconds:.0f}'
+    response.set_cookie(PIN_COOKIE, until, max_age=seconds, httponly=True, samesite='Lax')
+    response[PIN_HEADER] = until
+    return response
+
+
+def replica_reads(view):
+    """Decorator for function views whose safe requests may read from a replica"""
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if not can_use_replica(request):
+            return view(request, *args, **kwargs)
+        with use_replica():
+            return view(request, *args, **kwargs)
+    return wrapped
+
+
+class ReplicaReadMixin:
+    """Class-based view counterpart of `replica_reads`"""
+
+    def dispatch(self, request, *args, **kwargs):
+        if not can_use_replica(request):
+            return super().dispatch(request, *args, **kwargs)
+        with use_replica():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class PinPrimaryAfterWriteMixin:
+    """Pin the client to the primary after a successful unsafe request"""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method not in SAFE_METHODS and response.status_code < 400 and settings.DATABASE_REPLICAS:
+            pin_to_primary(response)
+        return response
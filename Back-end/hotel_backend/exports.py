@@ -0,0 +1,76 @@
+"""
+Streaming CSV / NDJSON exports.
+
+Rows are read with `values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE)`
+and written to a StreamingHttpResponse one line at a time, so memory stays
+flat regardless of how many rows are exported and no model instances or
+serializers are built.
+"""
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+# Regex for the `export/<format>` action url_path
+EXPORT_FORMAT_PATTERN = '|'.join(EXPORT_FORMATS)
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+def _export_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    # Byte order mark so spreadsheet apps read the Persian text as UTF-8
+    yield '\ufeff' + writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(['' if value is None else _export_value(value) for value in row])
+
+
+def _ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(
+            {column: _export_value(value) for column, value in zip(columns, row)},
+            ensure_ascii=False,
+        ) + '\n'
+
+
+def stream_export(queryset, fields, export_format, filename):
+    """
+    Stream `queryset` as CSV or NDJSON.
+
+    `fields` is a list of (column name, ORM lookup) pairs, e.g.
+    ('accommodation_title', 'accommodation__title').
+    """
+    columns = [column for column, _ in fields]
+    rows = (
+        queryset.select_related(None).prefetch_related(None)
+        .values_list(*[lookup for _, lookup in fields])
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+    lines = _csv_lines(columns, rows) if export_format == 'csv' else _ndjson_lines(columns, rows)
+
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[export_format])
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+    response['Content-Disposition'] = f'attachment; filename="{filename}-{stamp}.{export_format}"'
+    response['Cache-Control'] = 'no-store'
+    return response
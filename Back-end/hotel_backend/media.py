@@ -0,0 +1,203 @@
+"""
+Media file serving with HTTP caching, conditional requests and byte ranges.
+
+Used for /media/ when Django serves uploads itself (development, or
+deployments without a web server alias). Responses carry a strong ETag and
+Last-Modified so clients revalidate with a 304, support single `Range`
+requests for partial downloads, and can hand the transfer to the web server
+with X-Accel-Redirect (nginx) or X-Sendfile (Apache) via
+MEDIA_SENDFILE_BACKEND.
+"""
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+SENDFILE_X_ACCEL_REDIRECT = 'x-accel-redirect'
+SENDFILE_X_SENDFILE = 'x-sendfile'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _resolve(path):
+    """Absolute filesystem path of a media file, or raise Http404"""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Media file not found')
+    try:
+        file_stat = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('Media file not found')
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404('Media file not found')
+    return full_path, file_stat
+
+
+def file_etag(file_stat):
+    """Strong ETag from size and modification time (no need to hash content)"""
+    return quote_etag(f'{file_stat.st_size:x}-{file_stat.st_mtime_ns:x}')
+
+
+def cache_control_for(path):
+    """
+    Content-hashed names never change, so they are cached for a year as
+    immutable; everything else is cached for MEDIA_CACHE_MAX_AGE and then
+    revalidated against the ETag.
+    """
+    if settings.MEDIA_IMMUTABLE_PATTERN and re.search(settings.MEDIA_IMMUTABLE_PATTERN, path):
+        return 'public, max-age=31536000, immutable'
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # Weak comparison is fine for If-None-Match
+    candidates = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return etag in candidates
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        return _etag_matches(if_none_match, etag)
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return since is not None and int(mtime) <= since
+
+
+def parse_range(header, size):
+    """
+    Parse a single `bytes=` range into inclusive (start, end).
+
+    Returns None when the header should be ignored (absent, malformed or
+    multiple ranges) and raises ValueError when it is unsatisfiable.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError('Range not satisfiable')
+    return start, min(end, size - 1)
+
+
+def _range_applies(request, etag, mtime):
+    """If-Range: only honour Range while the client's copy is still current"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) == since
+
+
+def _read_range(full_path, start, length):
+    with open(full_path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _offload(path, full_path):
+    """Empty response telling the web server which file to send"""
+    response = HttpResponse()
+    backend = settings.MEDIA_SENDFILE_BACKEND
+    if backend == SENDFILE_X_ACCEL_REDIRECT:
+        response['X-Accel-Redirect'] = settings.MEDIA_SENDFILE_PREFIX.rstrip('/') + '/' + path
+    elif backend == SENDFILE_X_SENDFILE:
+        response['X-Sendfile'] = full_path
+    # Let the web server fill in the real type and length
+    del response['Content-Type']
+    return response
+
+
+def serve_media(request, path):
+    """Serve a file from MEDIA_ROOT with caching and range support"""
+    if request.method not in ('GET', 'HEAD'):
+        response = HttpResponse(status=405)
+        response['Allow'] = 'GET, HEAD, OPTIONS'
+        return response
+
+    full_path, file_stat = _resolve(path)
+    size = file_stat.st_size
+    etag = file_etag(file_stat)
+    mtime = file_stat.st_mtime
+    validators = {
+        'ETag': etag,
+        'Last-Modified': http_date(mtime),
+        'Cache-Control': cache_control_for(path),
+    }
+
+    if _not_modified(request, etag, mtime):
+        response = HttpResponseNotModified()
+    elif settings.MEDIA_SENDFILE_BACKEND:
+        # The web server handles Range and the transfer itself
+        response = _offload(path, full_path)
+    else:
+        content_type, encoding = mimetypes.guess_type(full_path)
+        content_type = content_type or 'application/octet-stream'
+
+        # A stale If-Range means the full file, even for an unsatisfiable Range (RFC 9110 13.1.5)
+        byte_range = None
+        range_header = request.META.get('HTTP_RANGE')
+        if range_header and _range_applies(request, etag, mtime):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                response['Accept-Ranges'] = 'bytes'
+                return response
+
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type)
+            response['Content-Length'] = str(size)
+        elif byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _read_range(full_path, start, length), status=206, content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(length)
+        else:
+            # FileResponse uses wsgi.file_wrapper, i.e. sendfile() under gunicorn
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+            response['Content-Length'] = str(size)
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Accept-Ranges'] = 'bytes'
+
+    for header, value in validators.items():
+        response[header] = value
+    return response
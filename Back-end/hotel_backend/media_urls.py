@@ -0,0 +1,50 @@
+"""
+Absolute media URLs for API responses, built once per request.
+
+`request.build_absolute_uri(file.url)` re-reads the host and forwarded
+headers and goes through the storage's url() for every image. The builder
+resolves the base URL once per request (MEDIA_CDN_URL when set, else the
+request's origin + MEDIA_URL) and appends the quoted storage name, which is
+what FileSystemStorage.url does. Other storage backends still go through
+their own url(), made absolute against the same origin.
+"""
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.encoding import filepath_to_uri
+
+REQUEST_ATTRIBUTE = '_media_url_builder'
+
+
+class MediaURLBuilder:
+    """Callable turning storage names (or FieldFiles) into absolute URLs"""
+
+    def __init__(self, request=None, storage=None):
+        self.storage = storage or default_storage
+        self.origin = request.build_absolute_uri('/')[:-1] if request is not None else ''
+        if settings.MEDIA_CDN_URL:
+            self.base_url = settings.MEDIA_CDN_URL.rstrip('/') + '/'
+        elif isinstance(self.storage, FileSystemStorage):
+            base_url = self.storage.base_url
+            self.base_url = base_url if '://' in base_url else self.origin + base_url
+        else:
+            self.base_url = None
+
+    def __call__(self, name):
+        name = getattr(name, 'name', name)
+        if not name:
+            return None
+        if self.base_url is not None:
+            return self.base_url + filepath_to_uri(name).lstrip('/')
+        url = self.storage.url(name)
+        return self.origin + url if url.startswith('/') else url
+
+
+def media_url_builder(request):
+    """The MediaURLBuilder of `request` (None: relative URLs), created on first use"""
+    if request is None:
+        return MediaURLBuilder()
+    builder = getattr(request, REQUEST_ATTRIBUTE, None)
+    if builder is None:
+        builder = MediaURLBuilder(request)
+        setattr(request, REQUEST_ATTRIBUTE, builder)
+    return builder
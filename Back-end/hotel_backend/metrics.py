@@ -0,0 +1,195 @@
+"""
+Per-request SQL and latency metrics.
+
+RequestMetricsMiddleware records, for every resolved route, the wall time,
+number of SQL queries, time spent in the database and queries repeated with
+the same SQL (the usual sign of an N+1 loop). Totals are kept in a
+process-local registry and exposed at /metrics in Prometheus text format.
+
+Each worker process keeps its own registry; scrape every worker (or add a
+`pid` target label) when running several gunicorn workers.
+"""
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Collapse variable-length placeholder lists such as IN (%s, %s, %s)
+PLACEHOLDER_LIST_RE = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+
+
+def fingerprint(sql):
+    """Normalise parameterised SQL so repeats of the same query compare equal"""
+    return PLACEHOLDER_LIST_RE.sub('(...)', sql)
+
+
+class QueryCollector:
+    """
+    Database execute wrapper counting queries for one request.
+
+    Installed on every connection with `connection.execute_wrapper`, so it
+    works with DEBUG off and costs one perf_counter pair per query.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Number of executions beyond the first for each repeated query"""
+        return sum(n - 1 for n in self.fingerprints.values() if n > 1)
+
+    def top_duplicates(self, limit=3):
+        return [(sql, n) for sql, n in self.fingerprints.most_common(limit) if n > 1]
+
+
+class collect_queries:
+    """
+    Context manager installing a QueryCollector on all database connections.
+
+    Exiting removes this collector only, so collectors may end out of order
+    (a streamed response is measured until its body has been read).
+    """
+
+    def __init__(self):
+        self.collector = QueryCollector()
+        self._connections = []
+
+    def __enter__(self):
+        self._connections = list(connections.all())
+        for connection in self._connections:
+            connection.execute_wrappers.append(self.collector)
+        return self.collector
+
+    def __exit__(self, *exc_info):
+        while self._connections:
+            wrappers = self._connections.pop().execute_wrappers
+            if self.collector in wrappers:
+                wrappers.remove(self.collector)
+        return False
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            yield bound, running
+
+
+class MetricsRegistry:
+    """Thread-safe, process-local store of per-route request metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latency = {}
+            self.requests = Counter()
+            self.queries = Counter()
+            self.db_seconds = defaultdict(float)
+            self.duplicate_queries = Counter()
+
+    def record(self, route, method, status, duration, collector):
+        key = (route, method)
+        with self._lock:
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram(settings.METRICS_LATENCY_BUCKETS)
+            histogram.observe(duration)
+            self.requests[(route, method, str(status))] += 1
+            self.queries[key] += collector.count
+            self.db_seconds[key] += collector.duration
+            self.duplicate_queries[key] += collector.duplicates
+
+    def render(self):
+        """Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                '# HELP http_request_duration_seconds Request wall time per route.',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            for (route, method), histogram in sorted(self.latency.items()):
+                labels = _labels(route=route, method=method)
+                for bound, count in histogram.cumulative():
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.total}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {histogram.sum}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {histogram.total}')
+
+            lines += [
+                '# HELP http_requests_total Requests per route and status.',
+                '# TYPE http_requests_total counter',
+            ]
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}')
+
+            for name, help_text, values in (
+                ('http_request_db_queries_total', 'SQL queries executed per route.', self.queries),
+                ('http_request_db_duration_seconds_total', 'Time spent in SQL per route.', self.db_seconds),
+                ('http_request_duplicate_queries_total',
+                 'Repeated executions of an identical SQL statement within a request.', self.duplicate_queries),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for (route, method), value in sorted(values.items()):
+                    lines.append(f'{name}{{{_labels(route=route, method=method)}}} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+registry = MetricsRegistry()
+
+
+def server_timing(duration, collector):
+    """Server-Timing header value (durations in milliseconds)"""
+    return (
+        f'db;dur={collector.duration * 1000:.1f};desc="{collector.count} queries", '
+        f'app;dur={duration * 1000:.1f}'
+    )
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, optionally protected by METRICS_TOKEN"""
+    token = settings.METRICS_TOKEN
+    if token and request.META.get('HTTP_AUTHORIZATION', '') != f'Bearer {token}':
+        return HttpResponseForbidden('Invalid metrics token')
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
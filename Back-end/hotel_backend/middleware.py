@@ -1,33 +1,192 @@
 """
-Custom middleware to add CORS headers to media file responses
+Custom middleware: CORS headers for media files, per-request metrics and
+API response compression
 """
-from django.http import HttpResponse
+import logging
+import time
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
+from .compression import compress, compress_async_stream, compress_stream, negotiate
+from .metrics import collect_queries, registry, server_timing
+
+logger = logging.getLogger(__name__)
+
+
+def is_allowed_origin(origin):
+    """Whether `origin` is listed in CORS_ALLOWED_ORIGINS (or all are allowed)"""
+    if not origin:
+        return False
+    if getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False):
+        return True
+    return origin in settings.CORS_ALLOWED_ORIGINS
 
 
 class CorsMediaMiddleware(MiddlewareMixin):
     """
     Middleware to add CORS headers to media file responses
     """
+    def process_request(self, request):
+        # Answer preflight requests for media without reaching a view
+        if request.method == 'OPTIONS' and request.path.startswith(settings.MEDIA_URL):
+            return HttpResponse()
+        return None
+
     def process_response(self, request, response):
         # Only add CORS headers to media file requests
-        if request.path.startswith('/media/'):
-            # Get allowed origins from CORS settings
-            allowed_origins = [
-                "http://localhost:3000",
-                "http://127.0.0.1:3000",
-                "http://localhost:8080",
-                "http://127.0.0.1:8080",
-            ]
-            
+        if request.path.startswith(settings.MEDIA_URL):
+            patch_vary_headers(response, ('Origin',))
             origin = request.META.get('HTTP_ORIGIN', '')
-            if origin in allowed_origins:
+            if is_allowed_origin(origin):
                 response['Access-Control-Allow-Origin'] = origin
-                response['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
-                response['Access-Control-Allow-Headers'] = 'Content-Type'
+                response['Access-Control-Allow-Methods'] = 'GET, HEAD, OPTIONS'
+                response['Access-Control-Allow-Headers'] = 'Content-Type, Range, If-None-Match, If-Modified-Since'
+                response['Access-Control-Expose-Headers'] = 'Accept-Ranges, Content-Length, Content-Range, ETag'
                 response['Access-Control-Max-Age'] = '86400'
-        
+
         return response
 
 
+class MeasuredStream:
+    """
+    Streaming body calling `on_close` once it is fully read or closed.
+
+    Registered by StreamingHttpResponse as a resource closer (it has a
+    close() method), so `on_close` also runs when the server closes the
+    response early, e.g. after a client disconnect.
+    """
+    def __init__(self, chunks, on_close):
+        self._chunks = iter(chunks)
+        self._on_close = on_close
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        if self._on_close is None:
+            return
+        on_close, self._on_close = self._on_close, None
+        try:
+            if hasattr(self._chunks, 'close'):
+                self._chunks.close()
+        finally:
+            on_close()
+
+
+class RequestMetricsMiddleware:
+    """
+    Record wall time, SQL query count/time and duplicated queries per route.
+
+    Should be first in MIDDLEWARE so the timing covers the whole stack.
+    Requests that do not resolve to a view are grouped under `unresolved`.
+    Streaming responses (exports) run their queries while the body is read,
+    so they are measured until it is consumed or closed; their headers are
+    sent before that, so they get no Server-Timing. Async streams are read
+    outside the request's thread and only measured up to the view's return.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        queries = collect_queries()
+        collector = queries.__enter__()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            queries.__exit__(None, None, None)
+            raise
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else 'unresolved'
+
+        def finish():
+            duration = time.perf_counter() - start
+            queries.__exit__(None, None, None)
+            if route != 'metrics':
+                self._record(route, request, response, duration, collector)
+            return duration
+
+        # File bodies run no queries
+        if response.streaming and not response.is_async and not isinstance(response, FileResponse):
+            response.streaming_content = MeasuredStream(response.streaming_content, finish)
+            return response
+
+        duration = finish()
+        if settings.METRICS_SERVER_TIMING and route != 'metrics':
+            response['Server-Timing'] = server_timing(duration, collector)
+        return response
+
+    def _record(self, route, request, response, duration, collector):
+        registry.record(route, request.method, response.status_code, duration, collector)
+
+        threshold = settings.METRICS_DUPLICATE_QUERY_WARNING
+        if threshold and collector.duplicates >= threshold:
+            sql, count = collector.top_duplicates(1)[0]
+            logger.warning(
+                f"{route}: {collector.duplicates} duplicate queries "
+                f"({count}x {sql[:200]})"
+            )
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    gzip/brotli-compress responses under COMPRESSION_PATHS.
+
+    Bodies shorter than COMPRESSION_MIN_SIZE, already encoded responses,
+    `Cache-Control: no-transform` and content types starting with an entry
+    of COMPRESSION_SKIP_CONTENT_TYPES (images, archives, ...) are left
+    alone. Streaming responses (exports) are compressed chunk by chunk.
+    Compressed responses get `Vary: Accept-Encoding` and a weak ETag, which
+    If-None-Match still matches (see hotel_backend.conditional).
+
+    API bodies carry no CSRF tokens (JWT auth uses headers), so BREACH-style
+    length oracles have no secret to recover.
+    """
+    def process_response(self, request, response):
+        if not settings.COMPRESSION_ENABLED or not request.path.startswith(tuple(settings.COMPRESSION_PATHS)):
+            return response
+        if response.has_header('Content-Encoding') or 'no-transform' in response.get('Cache-Control', '').lower():
+            return response
+        content_type = response.get('Content-Type', '').lower()
+        if content_type.startswith(tuple(settings.COMPRESSION_SKIP_CONTENT_TYPES)):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_async_stream(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
 
@@ -0,0 +1,29 @@
+"""
+Pagination that projects only the page's rows.
+
+Views with a `project_page(queryset)` method (e.g. returning
+`queryset.values(...)` across joins) get their COUNT query on the plain
+filtered queryset, without the joins a projection adds, and only the page
+slice is projected.
+"""
+from functools import partial
+
+from django.core.paginator import Paginator
+from rest_framework.pagination import PageNumberPagination
+
+
+class ProjectingPaginator(Paginator):
+    def __init__(self, object_list, per_page, project, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.project = project
+
+    def _get_page(self, object_list, *args, **kwargs):
+        return super()._get_page(self.project(object_list), *args, **kwargs)
+
+
+class ProjectedPageNumberPagination(PageNumberPagination):
+    def paginate_queryset(self, queryset, request, view=None):
+        project = getattr(view, 'project_page', None)
+        if project is not None:
+            self.django_paginator_class = partial(ProjectingPaginator, project=project)
+        return super().paginate_queryset(queryset, request, view)
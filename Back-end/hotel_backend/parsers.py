@@ -0,0 +1,28 @@
+"""
+DRF JSON parser backed by orjson when it is installed (see renderers).
+
+Bodies orjson rejects are parsed again by the stdlib parser, so invalid
+JSON gets DRF's usual ParseError message. Unlike the stdlib, orjson reads
+integers beyond 64 bits as floats; no API field accepts such values
+either way.
+"""
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import fast_json_available, orjson
+
+
+class FastJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not fast_json_available() or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,49 @@
+"""
+DRF JSON renderer backed by orjson when it is installed.
+
+orjson encodes dicts, lists, strings, numbers and UUIDs in C. Everything
+else (datetimes, which DRF cuts to milliseconds, Decimal, lazy translation
+strings, timedelta, ...) goes through DRF's JSONEncoder.default, so the
+output matches rest_framework.renderers.JSONRenderer. Payloads orjson
+refuses (non-string keys, integers beyond 64 bits), indented output and
+JSON_BACKEND='stdlib' use the stdlib renderer.
+
+One difference remains: orjson writes NaN and infinite floats as null,
+where the stdlib renderer raises ValueError (or writes NaN when STRICT_JSON
+is off). Finding them first would mean walking every payload in Python.
+"""
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is not installed
+    orjson = None
+
+# Escaped by the stdlib renderer for JavaScript embedding; orjson leaves them raw
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+def fast_json_available():
+    """Whether orjson is installed and JSON_BACKEND allows it"""
+    return orjson is not None and settings.JSON_BACKEND != 'stdlib'
+
+
+class FastJSONRenderer(JSONRenderer):
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if not fast_json_available() or self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        for raw, escaped in LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
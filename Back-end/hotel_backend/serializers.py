@@ -0,0 +1,155 @@
+"""
+Shared serializer helpers.
+"""
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def requested_names(request, param):
+    """Names in a comma-separated query parameter, or None when it is absent"""
+    if request is None or param not in request.query_params:
+        return None
+    return {name.strip() for name in request.query_params[param].split(',') if name.strip()}
+
+
+def requested_paths(request, param):
+    """
+    Dotted names of a comma-separated query parameter as a tree
+    ('a,b.c' -> {'a': {}, 'b': {'c': {}}}), or None when it is absent
+    """
+    names = requested_names(request, param)
+    if names is None:
+        return None
+    tree = {}
+    for name in names:
+        node = tree
+        for part in name.split('.'):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def _nested(field):
+    """The serializer behind a (possibly many=True) nested field, else None"""
+    field = getattr(field, 'child', field)
+    return field if isinstance(field, serializers.BaseSerializer) else None
+
+
+def _leaf_paths(tree, prefix=''):
+    return [
+        path
+        for name, subtree in tree.items()
+        for path in (_leaf_paths(subtree, f'{prefix}{name}.') if subtree else [prefix + name])
+    ]
+
+
+def _unknown(tree, serializer, prefix=''):
+    """Dotted paths of `tree` that name no field of `serializer`"""
+    unknown = []
+    for name, subtree in (tree or {}).items():
+        nested = _nested(serializer.fields[name]) if name in serializer.fields else None
+        if name not in serializer.fields or (subtree and nested is None):
+            unknown += _leaf_paths({name: subtree}, prefix)
+        elif subtree:
+            unknown += _unknown(subtree, nested, f'{prefix}{name}.')
+    return unknown
+
+
+def prune_fields(serializer, fields=None, omit=None, expand=None):
+    """
+    Drop fields from `serializer` (and its nested serializers) in place.
+
+    `fields`, `omit` and `expand` are trees from requested_paths. Names in
+    the serializer's `Meta.expandable_fields` are dropped unless expanded
+    or listed in `fields`. A nested serializer listed without sub-fields
+    keeps all of its fields.
+    """
+    expandable = getattr(getattr(serializer, 'Meta', None), 'expandable_fields', ())
+    omit = omit or {}
+    expand = expand or {}
+    for name in list(serializer.fields):
+        if fields is not None and name not in fields:
+            drop = True
+        elif name in omit and not omit[name]:
+            drop = True
+        else:
+            drop = name in expandable and name not in expand and not (fields and name in fields)
+        if drop:
+            serializer.fields.pop(name)
+            continue
+        nested = _nested(serializer.fields[name])
+        if nested is not None:
+            prune_fields(nested, (fields or {}).get(name) or None, omit.get(name), expand.get(name))
+
+
+def related_lookups(serializer, prefix=''):
+    """
+    (select_related, prefetch_related) lookups the remaining fields of
+    `serializer` need, from `Meta.select_related_fields` and
+    `Meta.prefetch_related_fields` ({field name: [lookups]}); nested
+    serializers add theirs under the nested field's source.
+    """
+    meta = getattr(serializer, 'Meta', None)
+    select_fields = getattr(meta, 'select_related_fields', {})
+    prefetch_fields = getattr(meta, 'prefetch_related_fields', {})
+    select, prefetch = [], []
+    for name, field in serializer.fields.items():
+        select += [prefix + lookup for lookup in select_fields.get(name, ())]
+        prefetch += [prefix + lookup for lookup in prefetch_fields.get(name, ())]
+        nested = _nested(field)
+        if nested is not None:
+            nested_select, nested_prefetch = related_lookups(nested, prefix + field.source.replace('.', '__') + '__')
+            # Relations below a many=True field can only be prefetched
+            (prefetch if nested is not field else select).extend(nested_select)
+            prefetch += nested_prefetch
+    return list(dict.fromkeys(select)), list(dict.fromkeys(prefetch))
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin for `?fields=`, `?omit=` and `?expand=` on reads.
+
+    - `fields=a,b,nested.c` keeps only the listed fields
+    - `omit=a,nested.c` drops the listed fields
+    - `expand=x,nested.y` adds fields from `Meta.expandable_fields`, which
+      are left out by default
+
+    Dropped fields are never evaluated (SerializerMethodFields included),
+    and optimize_queryset only joins and prefetches what the remaining
+    fields read. Unknown names are a 400. The parameters only apply to
+    GET/HEAD/OPTIONS, so writes always see every input field. Works for
+    `many=True` too, since the list's child is built with the same context.
+    """
+    fields_param = 'fields'
+    omit_param = 'omit'
+    expand_param = 'expand'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'context' not in kwargs:
+            # Declared as a nested field: the root serializer prunes it
+            return
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            prune_fields(self)
+            return
+        trees = {
+            param: requested_paths(request, param)
+            for param in (self.fields_param, self.omit_param, self.expand_param)
+        }
+        errors = {
+            param: [f"Unknown fields: {', '.join(sorted(unknown))}"]
+            for param, tree in trees.items()
+            if (unknown := _unknown(tree, self))
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
+        prune_fields(self, trees[self.fields_param], trees[self.omit_param], trees[self.expand_param])
+
+    def optimize_queryset(self, queryset):
+        """`queryset` with the select_related/prefetch_related the rendered fields need"""
+        select, prefetch = related_lookups(self)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
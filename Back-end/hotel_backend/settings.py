@@ -47,9 +47,13 @@ INSTALLED_APPS = [
     'accounts',
     'reservations',
     'sso_integration',
+    'jobs',
+    'benchmarks',
 ]
 
 MIDDLEWARE = [
+    'hotel_backend.middleware.RequestMetricsMiddleware',
+    'hotel_backend.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add WhiteNoise for static file serving
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -62,6 +66,35 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request latency/SQL metrics, exposed at /metrics in Prometheus format
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Adds `Server-Timing: db;dur=..., app;dur=...` to every response
+METRICS_SERVER_TIMING = config('METRICS_SERVER_TIMING', default=True, cast=bool)
+# Bearer token required by /metrics (empty: open, restrict it at the proxy)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_LATENCY_BUCKETS = config(
+    'METRICS_LATENCY_BUCKETS',
+    default='0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10',
+    cast=Csv(float)
+)
+# Log a warning when one request repeats the same SQL this many times (0 disables)
+METRICS_DUPLICATE_QUERY_WARNING = config('METRICS_DUPLICATE_QUERY_WARNING', default=10, cast=int)
+
+# gzip/brotli compression of API responses (brotli needs the `brotli` package)
+COMPRESSION_ENABLED = config('COMPRESSION_ENABLED', default=True, cast=bool)
+COMPRESSION_PATHS = config('COMPRESSION_PATHS', default='/api/', cast=Csv())
+# Smaller bodies are sent as is: the headers and framing outweigh the savings
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=4, cast=int)
+# Content-Type prefixes never compressed (already compressed formats)
+COMPRESSION_SKIP_CONTENT_TYPES = config(
+    'COMPRESSION_SKIP_CONTENT_TYPES',
+    default='image/,video/,audio/,font/woff,application/zip,application/gzip,application/x-gzip,application/pdf,'
+            'application/octet-stream',
+    cast=Csv()
+)
+
 ROOT_URLCONF = 'hotel_backend.urls'
 
 TEMPLATES = [
@@ -85,12 +118,50 @@ WSGI_APPLICATION = 'hotel_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Seconds to keep a connection open between requests (0 = reconnect on every
+# request, None = unlimited). Health checks drop broken persistent connections.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=lambda v: None if v in ('', 'None') else int(v))
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+
+# PostgreSQL only: use psycopg's connection pool (pip install "psycopg[pool]")
+# instead of one persistent connection per worker thread
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=10, cast=int)
+# Seconds a request waits for a free pooled connection before failing
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=float)
+
 DATABASES = {
     'default': dj_database_url.config(
-        default=config('DATABASE_URL', default='sqlite:///' + str(BASE_DIR / 'db.sqlite3'))
+        default=config('DATABASE_URL', default='sqlite:///' + str(BASE_DIR / 'db.sqlite3')),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
     )
 }
 
+if DB_POOL and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    # Pooled connections are returned to the pool after each request
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': DB_POOL_MIN_SIZE,
+        'max_size': DB_POOL_MAX_SIZE,
+        'timeout': DB_POOL_TIMEOUT,
+    }
+
+# Read replicas: safe requests to the public accommodation views read from a
+# random replica (see hotel_backend/db_router.py); writes and everything else
+# use the primary. A client is pinned to the primary for
+# DATABASE_REPLICA_PIN_SECONDS after its own booking writes.
+DATABASE_REPLICAS = []
+for index, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv())):
+    alias = f'replica_{index}'
+    DATABASES[alias] = dj_database_url.parse(
+        url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=DB_CONN_HEALTH_CHECKS,
+    )
+    DATABASE_REPLICAS.append(alias)
+DATABASE_REPLICA_PIN_SECONDS = config('DATABASE_REPLICA_PIN_SECONDS', default=10, cast=int)
+DATABASE_ROUTERS = ['hotel_backend.db_router.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -132,6 +203,25 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Base URL for media links in API responses (e.g. https://cdn.example.com/media/);
+# empty builds them from the request host + MEDIA_URL
+MEDIA_CDN_URL = config('MEDIA_CDN_URL', default='')
+
+# Serve /media/ through Django. Leave off when the web server serves MEDIA_ROOT.
+SERVE_MEDIA = config('SERVE_MEDIA', default=DEBUG, cast=bool)
+# Browser cache lifetime for media; names matching MEDIA_IMMUTABLE_PATTERN
+# (content-hashed, e.g. photo.3f2a9c1b04de.jpg) are cached for a year as immutable
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=3600, cast=int)
+MEDIA_IMMUTABLE_PATTERN = config('MEDIA_IMMUTABLE_PATTERN', default=r'\.[0-9a-f]{12,}\.\w+$')
+# Hand file transfers to the web server: '' (Django streams), 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache)
+MEDIA_SENDFILE_BACKEND = config('MEDIA_SENDFILE_BACKEND', default='')
+# nginx `internal` location aliased to MEDIA_ROOT, used with x-accel-redirect
+MEDIA_SENDFILE_PREFIX = config('MEDIA_SENDFILE_PREFIX', default='/protected-media/')
+
+# Responsive image derivatives (thumbnails) generated for uploaded images
+IMAGE_DERIVATIVE_WIDTHS = config('IMAGE_DERIVATIVE_WIDTHS', default='320,640,1280', cast=Csv(int))
+IMAGE_DERIVATIVE_FORMATS = config('IMAGE_DERIVATIVE_FORMATS', default='webp,jpeg', cast=Csv())
+IMAGE_DERIVATIVE_QUALITY = config('IMAGE_DERIVATIVE_QUALITY', default=80, cast=int)
 
 # Ensure media directory and subdirectories exist
 import os
@@ -180,9 +270,16 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'x-db-pin-until',
 ]
 
+# Read-your-writes pin for clients that cannot use the cookie (see db_router)
+CORS_EXPOSE_HEADERS = ['x-db-pin-until']
+
 # Django REST Framework settings
+# API JSON encoding: 'auto' uses orjson when installed, 'stdlib' always uses the json module
+JSON_BACKEND = config('JSON_BACKEND', default='auto')
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
@@ -192,10 +289,17 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'hotel_backend.renderers.FastJSONRenderer',
+    ],
+    # JSON is the only renderer, so `?format=` is left to views (calendar ?format=compact)
+    'URL_FORMAT_OVERRIDE': None,
+    'DEFAULT_PARSER_CLASSES': [
+        'hotel_backend.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
@@ -219,8 +323,14 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.ClaimsTokenRefreshSerializer',
 }
 
+# Build request.user from access token claims instead of loading the User row
+# on every authenticated request. Claims may lag the database by up to
+# ACCESS_TOKEN_LIFETIME (they are re-read on token refresh).
+JWT_CLAIMS_USER = config('JWT_CLAIMS_USER', default=False, cast=bool)
+
 # Separate configuration for Admin panel JWTs so they are cryptographically
 # distinct from normal application tokens.
 ADMIN_JWT_SECRET = config(
@@ -231,6 +341,13 @@ ADMIN_JWT_LIFETIME = timedelta(
     minutes=config('ADMIN_JWT_LIFETIME_MINUTES', default=60, cast=int)
 )
 
+# Admin principals (user + is_staff/is_active) are cached per token for this
+# many seconds; it bounds how long a revoked admin keeps access when the cache
+# is not shared between processes. Set to 0 to hit the database every time.
+ADMIN_PRINCIPAL_CACHE_TTL = config('ADMIN_PRINCIPAL_CACHE_TTL', default=30, cast=int)
+# Number of verified admin tokens memoised per process to skip HMAC checks
+ADMIN_JWT_DECODE_CACHE_SIZE = config('ADMIN_JWT_DECODE_CACHE_SIZE', default=1024, cast=int)
+
 # Security settings for production
 if not DEBUG:
     SECURE_SSL_REDIRECT = config('SECURE_SSL_REDIRECT', default=True, cast=bool)
@@ -259,5 +376,37 @@ INJAST_TOKEN_ENCRYPTION_KEY = config(
     default=None  # Will generate a temporary key if not set (development only)
 )
 
+# Background job queue (see jobs app and `manage.py run_workers`)
+# With JOBS_ALWAYS_EAGER=True jobs run inline in the request, no worker needed.
+JOBS_ALWAYS_EAGER = config('JOBS_ALWAYS_EAGER', default=False, cast=bool)
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=3, cast=int)
+JOBS_VISIBILITY_TIMEOUT = config('JOBS_VISIBILITY_TIMEOUT', default=300, cast=int)  # seconds
+JOBS_RETRY_BACKOFF = config('JOBS_RETRY_BACKOFF', default=30, cast=int)  # seconds, doubled per attempt
+JOBS_POLL_INTERVAL = config('JOBS_POLL_INTERVAL', default=1.0, cast=float)  # seconds
+
+# Holiday lookups are cached since holidayapi.ir data rarely changes
+HOLIDAY_CACHE_TTL = config('HOLIDAY_CACHE_TTL', default=86400, cast=int)  # 1 day
+
+# Rows fetched per database round trip by the streaming CSV/NDJSON exports
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Bulk accommodation import (accommodations/importer.py)
+IMPORT_BATCH_SIZE = config('IMPORT_BATCH_SIZE', default=500, cast=int)
+IMPORT_IMAGE_WORKERS = config('IMPORT_IMAGE_WORKERS', default=8, cast=int)  # concurrent image fetches
+IMPORT_IMAGE_TIMEOUT = config('IMPORT_IMAGE_TIMEOUT', default=10, cast=float)  # seconds per image URL
+IMPORT_IMAGE_MAX_BYTES = config('IMPORT_IMAGE_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+# Directory the admin import endpoint may read relative image paths from (empty: URLs and media names only)
+IMPORT_IMAGE_ROOT = config('IMPORT_IMAGE_ROOT', default='')
+# Uploaded import files wait here for the worker, outside MEDIA_ROOT so they are never served
+IMPORT_UPLOAD_DIR = config('IMPORT_UPLOAD_DIR', default='') or str(BASE_DIR / 'imports')
+
+# Reservations read and DailyStats rows written per round trip when rebuilding the analytics rollup
+DAILY_STATS_CHUNK_SIZE = config('DAILY_STATS_CHUNK_SIZE', default=2000, cast=int)
+# Longest range the admin analytics endpoint reports on with interval=day
+ANALYTICS_MAX_DAYS = config('ANALYTICS_MAX_DAYS', default=366, cast=int)
+
+# Reservations re-indexed per transaction by `manage.py reindex_reservation_search`
+SEARCH_INDEX_CHUNK_SIZE = config('SEARCH_INDEX_CHUNK_SIZE', default=1000, cast=int)
+
 # WhiteNoise configuration for static files
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
@@ -0,0 +1,523 @@
+"""
+Tests for project-level media serving and URLs, JSON rendering, middleware, compression, metrics and
+database routing.
+"""
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from accommodations.models import Accommodation
+from accounts.admin_tokens import create_admin_access_token
+from accounts.tokens import get_tokens_for_user
+from .compression import negotiate
+from .db import connection_stats
+from .db_router import PIN_COOKIE, PIN_HEADER, ReplicaRouter, use_replica
+from .media import serve_media
+from .media_urls import media_url_builder
+from .metrics import fingerprint, registry
+from .middleware import CompressionMiddleware, CorsMediaMiddleware
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+
+MEDIA_ROOT = tempfile.mkdtemp()
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_SENDFILE_BACKEND='', MEDIA_CACHE_MAX_AGE=600)
+class ServeMediaTest(TestCase):
+    """Test conditional requests, ranges and offload for media files."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(MEDIA_ROOT, 'docs'), exist_ok=True)
+        for name in ('docs/file.bin', 'docs/photo.0123456789abcdef.jpg'):
+            with open(os.path.join(MEDIA_ROOT, name), 'wb') as f:
+                f.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get(self, path='docs/file.bin', **headers):
+        return serve_media(self.factory.get(f'/media/{path}', **headers), path)
+
+    def test_full_response_has_validators(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=600')
+
+    def test_hashed_name_is_immutable(self):
+        response = self.get('docs/photo.0123456789abcdef.jpg')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.get()['ETag']
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = self.get()['Last-Modified']
+        response = self.get(HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[10:20])
+
+        suffix = self.get(HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(suffix.streaming_content), CONTENT[-5:])
+
+        unsatisfiable = self.get(HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(unsatisfiable.status_code, 416)
+
+    def test_stale_if_range_sends_full_file(self):
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+        # If-Range is evaluated before the range, so an out-of-bounds one is ignored too
+        response = self.get(HTTP_RANGE=f'bytes={len(CONTENT) + 10}-', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+        current = self.get()['ETag']
+        response = self.get(HTTP_RANGE=f'bytes={len(CONTENT) + 10}-', HTTP_IF_RANGE=current)
+        self.assertEqual(response.status_code, 416)
+
+    def test_if_range_date_must_match_exactly(self):
+        last_modified = self.get()['Last-Modified']
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=last_modified)
+        self.assertEqual(response.status_code, 206)
+
+        # A later date is not the same copy either (RFC 9110 13.1.5)
+        later = http_date(parse_http_date(last_modified) + 60)
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=later)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_path_traversal_rejected(self):
+        with self.assertRaises(Http404):
+            self.get('../etc/passwd')
+
+    @override_settings(MEDIA_SENDFILE_BACKEND='x-accel-redirect', MEDIA_SENDFILE_PREFIX='/protected-media/')
+    def test_x_accel_redirect(self):
+        response = self.get()
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/docs/file.bin')
+        self.assertEqual(response.content, b'')
+
+
+class CorsMediaMiddlewareTest(TestCase):
+    """Test that media CORS follows CORS_ALLOWED_ORIGINS."""
+
+    def run_middleware(self, origin):
+        request = RequestFactory().get('/media/x.jpg', HTTP_ORIGIN=origin)
+        return CorsMediaMiddleware(lambda r: HttpResponse())(request)
+
+    @override_settings(CORS_ALLOWED_ORIGINS=['https://hotel.example.com'])
+    def test_configured_origin_allowed(self):
+        response = self.run_middleware('https://hotel.example.com')
+        self.assertEqual(response['Access-Control-Allow-Origin'], 'https://hotel.example.com')
+        self.assertIn('Origin', response['Vary'])
+
+        response = self.run_middleware('http://localhost:3000')
+        self.assertNotIn('Access-Control-Allow-Origin', response)
+
+
+@override_settings(COMPRESSION_ENABLED=True, COMPRESSION_PATHS=['/api/'], COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareTest(TestCase):
+    """Test API response compression and Accept-Encoding negotiation."""
+
+    BODY = b'{"date": "2025-01-01", "status": "available", "price": "1000000.00"}, ' * 50
+
+    def run_middleware(self, response, path='/api/accommodations/', accept='gzip, deflate, br'):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda r: response)(request)
+
+    def json_response(self, body=BODY, **headers):
+        response = HttpResponse(body, content_type='application/json')
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def test_negotiate(self):
+        with patch('hotel_backend.compression.brotli', object()):
+            self.assertEqual(negotiate('gzip, deflate, br'), 'br')
+            self.assertEqual(negotiate('br;q=0.5, gzip'), 'gzip')
+            self.assertEqual(negotiate('*'), 'br')
+            self.assertEqual(negotiate('*, br;q=0'), 'gzip')
+        with patch('hotel_backend.compression.brotli', None):
+            self.assertEqual(negotiate('gzip, deflate, br'), 'gzip')
+            self.assertIsNone(negotiate('br'))
+        self.assertIsNone(negotiate('gzip;q=0, identity'))
+        self.assertIsNone(negotiate(''))
+
+    @patch('hotel_backend.compression.brotli', None)
+    def test_compresses_json(self):
+        response = self.run_middleware(self.json_response(ETag='"v1"'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.BODY)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(self.BODY) // 5)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['ETag'], 'W/"v1"')
+
+    def test_left_alone(self):
+        cases = {
+            'small body': (self.json_response(b'{}'), '/api/accommodations/', 'gzip'),
+            'not accepted': (self.json_response(), '/api/accommodations/', 'identity'),
+            'outside paths': (self.json_response(), '/admin/', 'gzip'),
+            'image': (HttpResponse(self.BODY, content_type='image/jpeg'), '/api/accommodations/', 'gzip'),
+            'no-transform': (self.json_response(**{'Cache-Control': 'no-transform'}), '/api/accommodations/', 'gzip'),
+            'encoded': (self.json_response(**{'Content-Encoding': 'br'}), '/api/accommodations/', 'gzip'),
+        }
+        for case, (response, path, accept) in cases.items():
+            with self.subTest(case):
+                response = self.run_middleware(response, path, accept)
+                self.assertEqual(response.content, self.BODY if case != 'small body' else b'{}')
+                self.assertNotEqual(response.get('Content-Encoding'), 'gzip')
+
+    @patch('hotel_backend.compression.brotli', None)
+    def test_streaming(self):
+        lines = [b'{"id": %d, "status": "confirmed"}\n' % i for i in range(500)]
+        response = StreamingHttpResponse(iter(lines), content_type='application/x-ndjson')
+        response = self.run_middleware(response, '/api/admin/reservations/export/', 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response)
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(lines))
+
+    @patch('hotel_backend.compression.brotli', None)
+    def test_weak_etag_revalidates(self):
+        accommodation = Accommodation.objects.create(
+            title='Compressed', city='Tehran', province='Tehran', address='-', description='-',
+            capacity=2, beds_description='1 double', area=30, price_per_night=1000000,
+        )
+        url = f'/api/accommodations/{accommodation.id}/'
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class FastJSONTest(TestCase):
+    """Test that the orjson renderer and parser match DRF's stdlib ones."""
+
+    DATA = {
+        'price': Decimal('1250000'),
+        'rating': Decimal('4.5'),
+        'date': date(2026, 3, 20),
+        'created_at': datetime(2026, 3, 20, 8, 30, 15, 120000, tzinfo=dt_timezone.utc),
+        'updated_at': datetime(2026, 3, 20, 8, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        'naive': datetime(2026, 3, 20, 8, 30, 15, 999999),
+        'opens': dt_time(14, 0, 0, 500999),
+        'local': datetime(2026, 3, 20, 12, 0, tzinfo=dt_timezone(timedelta(hours=3, minutes=30))),
+        'label': gettext_lazy('Name'),
+        'token': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'title': 'سوییت هانی مون\u2028',
+        'calendar': [{'date': '2026-03-20', 'is_available': True, 'price': None}] * 3,
+        'nights': timedelta(days=2),
+    }
+
+    def assertRendersLikeDRF(self, data, media_type=None):
+        self.assertEqual(FastJSONRenderer().render(data, media_type), JSONRenderer().render(data, media_type))
+
+    def test_matches_stdlib_renderer(self):
+        self.assertRendersLikeDRF(self.DATA)
+        self.assertRendersLikeDRF(self.DATA, 'application/json; indent=2')
+        # orjson rejects non-string keys; the stdlib renderer takes over
+        self.assertRendersLikeDRF({1: 'one', 'big': 2 ** 70})
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        with self.settings(JSON_BACKEND='stdlib'):
+            self.assertRendersLikeDRF(self.DATA)
+
+    def test_non_finite_floats_render_as_null(self):
+        # Known difference: the stdlib renderer refuses them, orjson writes null
+        data = {'ratio': float('nan'), 'max': float('inf')}
+        self.assertEqual(FastJSONRenderer().render(data), b'{"ratio":null,"max":null}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+
+    def parse(self, parser, body):
+        return parser.parse(io.BytesIO(body), 'application/json', {'encoding': 'utf-8'})
+
+    def test_matches_stdlib_parser(self):
+        body = b'{"a": [1, 2.5, null, true, "\xd8\xb3"], "id": 9007199254740993}'
+        self.assertEqual(self.parse(FastJSONParser(), body), self.parse(JSONParser(), body))
+        for body in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError) as fast:
+                self.parse(FastJSONParser(), body)
+            with self.assertRaises(ParseError) as stdlib:
+                self.parse(JSONParser(), body)
+            self.assertEqual(str(fast.exception), str(stdlib.exception))
+
+
+@override_settings(ALLOWED_HOSTS=['testserver', 'hotel.example.com'])
+class MediaURLBuilderTest(TestCase):
+    """Test per-request absolute media URLs."""
+
+    NAMES = ['accommodations/main.jpg', 'accommodations/images/اتاق 1 (2).jpg', 'amenities/icons/wifi.svg']
+
+    def setUp(self):
+        self.http_request = RequestFactory().get('/api/accommodations/', HTTP_X_FORWARDED_HOST='hotel.example.com')
+
+    def test_matches_storage_urls(self):
+        media_url = media_url_builder(self.http_request)
+        for name in self.NAMES:
+            self.assertEqual(media_url(name), self.http_request.build_absolute_uri(default_storage.url(name)))
+        self.assertIsNone(media_url(''))
+        self.assertEqual(media_url_builder(None)(self.NAMES[0]), default_storage.url(self.NAMES[0]))
+
+    def test_base_url_resolved_once_per_request(self):
+        with patch.object(self.http_request, 'build_absolute_uri', wraps=self.http_request.build_absolute_uri) as build:
+            for name in self.NAMES * 10:
+                media_url_builder(self.http_request)(name)
+        self.assertEqual(build.call_count, 1)
+
+    @override_settings(MEDIA_CDN_URL='https://cdn.example.com/media')
+    def test_cdn_base(self):
+        Accommodation.objects.create(
+            title='CDN', city='Tehran', province='Tehran', address='-', description='-', capacity=2,
+            beds_description='1 double', area=30, price_per_night=1000000, main_image='accommodations/main.jpg',
+        )
+        card = APIClient().get('/api/accommodations/').json()['results'][0]
+        self.assertEqual(card['main_image'], 'https://cdn.example.com/media/accommodations/main.jpg')
+        self.assertEqual(card['images'], [card['main_image']])
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_SERVER_TIMING=True, METRICS_TOKEN='')
+class RequestMetricsTest(TestCase):
+    """Test per-route SQL/latency metrics and the Prometheus endpoint."""
+
+    def setUp(self):
+        registry.reset()
+        for i in range(3):
+            Accommodation.objects.create(
+                title=f'Room {i}', city='Tehran', province='Tehran', address='-', description='-',
+                capacity=2, beds_description='1 double', area=40, price_per_night=1000000,
+                main_image='accommodations/test.jpg'
+            )
+
+    def test_server_timing_header(self):
+        response = self.client.get('/api/accommodations/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+$')
+
+    def test_metrics_exposed_per_route(self):
+        self.client.get('/api/accommodations/')
+        self.client.get('/api/accommodations/')
+        body = self.client.get('/metrics').content.decode()
+
+        self.assertIn(
+            'http_request_duration_seconds_count{route="accommodations:list",method="GET"} 2', body
+        )
+        self.assertIn('http_requests_total{route="accommodations:list",method="GET",status="200"} 2', body)
+        self.assertIn('http_request_db_queries_total{route="accommodations:list",method="GET"}', body)
+        # The scrape itself is not recorded
+        self.assertNotIn('route="metrics"', body)
+
+    def test_streamed_queries_counted_after_body(self):
+        admin = User.objects.create_user(username='admin', password='pass-1234', is_staff=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Admin {create_admin_access_token(admin)}')
+        key = ('admin-reservation-export', 'GET')
+        wrappers = list(connection.execute_wrappers)
+
+        response = client.get('/api/admin/reservations/export/csv/')
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(registry.requests[(*key, '200')], 0)
+        b''.join(response.streaming_content)
+        self.assertEqual(registry.requests[(*key, '200')], 1)
+        # Authentication plus the export query, which only runs while the body is read
+        self.assertGreaterEqual(registry.queries[key], 2)
+        self.assertEqual(connection.execute_wrappers, wrappers)
+
+        # Closing without reading (client went away) still records and uninstalls the collector
+        client.get('/api/admin/reservations/export/csv/').close()
+        self.assertEqual(registry.requests[(*key, '200')], 2)
+        self.assertEqual(connection.execute_wrappers, wrappers)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    def test_fingerprint_collapses_in_lists(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s)'),
+        )
+
+
+class HealthCheckTest(TestCase):
+    """Test database connection reporting on /health."""
+
+    def test_health_reports_connection_settings(self):
+        data = self.client.get('/health').json()
+        self.assertEqual(data['status'], 'healthy')
+        self.assertFalse(data['database']['pooled'])
+        self.assertIn('conn_max_age', data['database'])
+
+    def test_pool_saturation(self):
+        pool = SimpleNamespace(
+            min_size=2, max_size=10,
+            get_stats=lambda: {'pool_min': 2, 'pool_max': 10, 'pool_size': 8, 'pool_available': 2, 'requests_waiting': 0},
+        )
+        connection = SimpleNamespace(
+            vendor='postgresql', pool=pool,
+            settings_dict={'CONN_MAX_AGE': 0, 'OPTIONS': {'pool': {'max_size': 10}}},
+        )
+        with patch('hotel_backend.db.connections', {'default': connection}):
+            stats = connection_stats()
+        self.assertTrue(stats['pooled'])
+        self.assertEqual(stats['in_use'], 6)
+        self.assertEqual(stats['saturation'], 0.6)
+
+
+def create_accommodation(title='Room', using='default'):
+    return Accommodation.objects.using(using).create(
+        title=title, city='Tehran', province='Tehran', address='-', description='-',
+        capacity=2, beds_description='1 double', area=40, price_per_night=1000000,
+        main_image='accommodations/test.jpg'
+    )
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaRouterTest(TestCase):
+    """Test which requests are routed to read replicas."""
+
+    def setUp(self):
+        self.accommodation = create_accommodation()
+        self.user = User.objects.create_user(username='guest', password='pass-1234')
+        self.client = APIClient()
+        # Record replica choices but keep querying the single test database
+        self.chosen = []
+        patcher = patch(
+            'hotel_backend.db_router.random.choice',
+            side_effect=lambda aliases: self.chosen.append(aliases[0]) or 'default',
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_router_reads_replica_only_when_enabled(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Accommodation), 'default')
+        with use_replica():
+            router.db_for_read(Accommodation)
+            self.assertEqual(router.db_for_write(Accommodation), 'default')
+        self.assertEqual(self.chosen, ['replica_0'])
+
+    def test_no_replicas_configured(self):
+        with override_settings(DATABASE_REPLICAS=[]), use_replica():
+            self.assertEqual(ReplicaRouter().db_for_read(Accommodation), 'default')
+
+    def test_public_reads_use_replica(self):
+        for path in (
+            '/api/accommodations/',
+            f'/api/accommodations/{self.accommodation.id}/',
+            f'/api/accommodations/{self.accommodation.id}/unavailable-dates/',
+            '/api/accommodations/filters/',
+        ):
+            self.chosen.clear()
+            self.assertEqual(self.client.get(path).status_code, 200, path)
+            self.assertTrue(self.chosen, path)
+
+    def test_pinned_client_reads_primary(self):
+        self.client.cookies[PIN_COOKIE] = str(time.time() + 60)
+        self.client.get('/api/accommodations/')
+        self.assertEqual(self.chosen, [])
+
+        self.client.cookies.clear()
+        self.client.get('/api/accommodations/', HTTP_X_DB_PIN_UNTIL=str(time.time() + 60))
+        self.assertEqual(self.chosen, [])
+
+        # An expired pin no longer applies
+        self.client.get('/api/accommodations/', HTTP_X_DB_PIN_UNTIL=str(time.time() - 1))
+        self.assertTrue(self.chosen)
+
+    def test_booking_write_pins_client(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(self.user).access_token}')
+        check_in = timezone.localdate() + timedelta(days=10)
+        response = self.client.post('/api/reservations/', {
+            'accommodation': self.accommodation.id,
+            'check_in_date': check_in.isoformat(),
+            'check_out_date': (check_in + timedelta(days=2)).isoformat(),
+            'number_of_guests': 1,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(PIN_HEADER, response)
+        self.assertEqual(response.cookies[PIN_COOKIE].value, response[PIN_HEADER])
+
+        self.chosen.clear()
+        self.client.get(f'/api/accommodations/{self.accommodation.id}/unavailable-dates/')
+        self.assertEqual(self.chosen, [])
+
+    def test_reads_do_not_pin_and_admin_uses_primary(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(self.user).access_token}')
+        self.assertNotIn(PIN_HEADER, self.client.get('/api/reservations/'))
+
+        admin = User.objects.create_user(username='admin', password='pass-1234', is_staff=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Admin {create_admin_access_token(admin)}')
+        self.chosen.clear()
+        self.assertEqual(self.client.get('/api/admin/accommodations/').status_code, 200)
+        self.assertEqual(self.chosen, [])
+
+
+@unittest.skipUnless(
+    'replica_0' in settings.DATABASES,
+    'Set DATABASE_REPLICA_URLS (e.g. sqlite:///replica.sqlite3) to test against a second database',
+)
+class ReplicaDatabaseTest(TestCase):
+    """
+    Test routing against a real second database.
+
+    Run with DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 python manage.py
+    test hotel_backend.tests.ReplicaDatabaseTest. The test databases are not
+    replicated, so each row shows which database served the request.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        create_accommodation('Primary room')
+        create_accommodation('Replica room', using='replica_0')
+
+    def titles(self, response):
+        return [item['title'] for item in response.json()['results']]
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'])
+    def test_public_list_reads_replica_unless_pinned(self):
+        self.assertEqual(self.titles(self.client.get('/api/accommodations/')), ['Replica room'])
+        self.client.cookies[PIN_COOKIE] = str(time.time() + 60)
+        self.assertEqual(self.titles(self.client.get('/api/accommodations/')), ['Primary room'])
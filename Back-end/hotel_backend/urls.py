@@ -17,48 +17,35 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
-from django.views.static import serve
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, JsonResponse
+from accommodations.images import DERIVATIVE_DIR, ensure_derivative
+from .db import connection_stats
+from .media import serve_media
+from .metrics import metrics_view
 
-def serve_media_with_cors(request, path):
-    """Serve media files with CORS headers"""
-    allowed_origins = [
-        "http://localhost:3000",
-        "http://127.0.0.1:3000",
-        "http://localhost:8080",
-        "http://127.0.0.1:8080",
-    ]
-    
-    origin = request.META.get('HTTP_ORIGIN', '')
-    
-    # Handle preflight OPTIONS request
-    if request.method == 'OPTIONS':
-        response = HttpResponse()
-        if origin in allowed_origins:
-            response['Access-Control-Allow-Origin'] = origin
-            response['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
-            response['Access-Control-Allow-Headers'] = 'Content-Type'
-            response['Access-Control-Max-Age'] = '86400'
-        return response
-    
-    # Serve the actual file
-    response = serve(request, path, document_root=settings.MEDIA_ROOT)
-    
-    if origin in allowed_origins:
-        response['Access-Control-Allow-Origin'] = origin
-        response['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
-        response['Access-Control-Allow-Headers'] = 'Content-Type'
-        response['Access-Control-Max-Age'] = '86400'
-    
-    return response
+def serve_image_derivative(request, path):
+    """
+    Serve a thumbnail, generating it on first request if it is missing.
+
+    In production the web server serves existing derivatives directly and
+    only falls back to this view on a miss (e.g. nginx `try_files`).
+    """
+    name = f'{DERIVATIVE_DIR}/{path}'
+    if not ensure_derivative(name):
+        raise Http404('Image derivative not found')
+    return serve_media(request, name)
 
 def health_check(request):
     """Health check endpoint for monitoring and load balancers"""
-    return JsonResponse({'status': 'healthy', 'service': 'hotel_backend'})
+    return JsonResponse({
+        'status': 'healthy',
+        'service': 'hotel_backend',
+        'database': connection_stats(),
+    })
 
 urlpatterns = [
     re_path(r'^health/?$', health_check, name='health'),  # Matches /health and /health/
+    path('metrics', metrics_view, name='metrics'),
     path('django-admin/', admin.site.urls),  # Changed from /admin/ to /django-admin/ to avoid conflict with custom admin panel
     path('api/auth/', include('accounts.urls')),
     path('api/auth/', include('sso_integration.urls')),
@@ -66,10 +53,12 @@ urlpatterns = [
     path('api/reservations/', include('reservations.urls')),
     path('api/admin/', include('accommodations.admin_urls')),
     path('api/admin/', include('reservations.admin_urls')),
+    path('api/admin/', include('jobs.admin_urls')),
+    path(f'media/{DERIVATIVE_DIR}/<path:path>', serve_image_derivative, name='media-derivative'),
 ]
 
-# Serve media files in development with CORS headers
-if settings.DEBUG:
+# Serve media files through Django (development, or SERVE_MEDIA=True without a web server alias)
+if settings.SERVE_MEDIA:
     urlpatterns += [
-        path('media/<path:path>', serve_media_with_cors, name='media'),
+        path('media/<path:path>', serve_media, name='media'),
     ]
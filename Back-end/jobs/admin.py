@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Admin interface for background jobs."""
+    list_display = ['id', 'name', 'status', 'attempts', 'progress', 'total', 'run_at', 'created_at']
+    list_filter = ['status', 'name', 'created_at']
+    search_fields = ['name', 'locked_by']
+    readonly_fields = ['created_at', 'updated_at', 'finished_at', 'locked_by', 'locked_until', 'attempts']
@@ -0,0 +1,7 @@
+from rest_framework.routers import DefaultRouter
+from .views import AdminJobViewSet
+
+router = DefaultRouter()
+router.register(r'jobs', AdminJobViewSet, basename='admin-job')
+
+urlpatterns = router.urls
@@ -0,0 +1,94 @@
+"""
+Django management command to run background job workers.
+
+Usage:
+    python manage.py run_workers
+    python manage.py run_workers --workers 4
+    python manage.py run_workers --workers 4 --processes
+    python manage.py run_workers --burst
+"""
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from jobs.worker import run_worker_process, start_threads
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers for the database-backed job queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Number of worker threads (or processes with --processes). Defaults to 2.',
+        )
+        parser.add_argument(
+            '--processes',
+            action='store_true',
+            help='Run workers as separate processes instead of threads (for CPU-bound tasks).',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            help='Seconds to sleep when the queue is empty. Defaults to JOBS_POLL_INTERVAL.',
+        )
+        parser.add_argument(
+            '--visibility-timeout',
+            type=int,
+            help='Seconds a claimed job stays hidden from other workers. Defaults to JOBS_VISIBILITY_TIMEOUT.',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling forever.',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        use_processes = options['processes']
+        poll_interval = options.get('poll_interval')
+        visibility_timeout = options.get('visibility_timeout')
+        burst = options['burst']
+
+        if workers < 1:
+            raise CommandError('--workers must be at least 1.')
+
+        kind = 'processes' if use_processes else 'threads'
+        self.stdout.write(f'Starting {workers} worker {kind}...')
+
+        if use_processes:
+            stop_event = multiprocessing.Event()
+            # Never hand an open database connection to a forked child
+            connections.close_all()
+            pool = [
+                multiprocessing.Process(
+                    target=run_worker_process,
+                    args=(index, stop_event, poll_interval, burst, visibility_timeout),
+                    name=f'job-worker-{index}',
+                )
+                for index in range(workers)
+            ]
+            for process in pool:
+                process.start()
+        else:
+            stop_event = threading.Event()
+            pool = start_threads(workers, stop_event, poll_interval, burst, visibility_timeout)
+
+        def shutdown(signum, frame):
+            self.stdout.write('Stopping workers after their current job...')
+            stop_event.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        for worker in pool:
+            # Join in slices so the main thread keeps receiving signals
+            while worker.is_alive():
+                worker.join(timeout=0.5)
+
+        self.stdout.write(self.style.SUCCESS('All workers stopped.'))
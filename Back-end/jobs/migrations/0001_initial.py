@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Task Name')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Payload')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=20, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='Max Attempts')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Run At')),
+                ('locked_until', models.DateTimeField(blank=True, help_text='Visibility timeout: the job is handed to another worker after this time', null=True, verbose_name='Locked Until')),
+                ('locked_by', models.CharField(blank=True, default='', max_length=200, verbose_name='Locked By')),
+                ('progress', models.PositiveIntegerField(default=0, verbose_name='Progress')),
+                ('total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Total')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Result')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Last Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+            ],
+            options={
+                'verbose_name': 'Job',
+                'verbose_name_plural': 'Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_at'], name='jobs_job_status_f5c023_idx'), models.Index(fields=['status', 'locked_until'], name='jobs_job_status_715db5_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,87 @@
+"""
+Models for the database-backed background job queue.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A unit of background work picked up by `manage.py run_workers`."""
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=200, verbose_name='Task Name')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='Payload')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED, verbose_name='Status')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Attempts')
+    max_attempts = models.PositiveIntegerField(default=3, verbose_name='Max Attempts')
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='Run At')
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Locked Until',
+        help_text='Visibility timeout: the job is handed to another worker after this time'
+    )
+    locked_by = models.CharField(max_length=200, blank=True, default='', verbose_name='Locked By')
+    progress = models.PositiveIntegerField(default=0, verbose_name='Progress')
+    total = models.PositiveIntegerField(null=True, blank=True, verbose_name='Total')
+    result = models.JSONField(null=True, blank=True, verbose_name='Result')
+    last_error = models.TextField(blank=True, default='', verbose_name='Last Error')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Created At')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Updated At')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Finished At')
+
+    class Meta:
+        verbose_name = 'Job'
+        verbose_name_plural = 'Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+            models.Index(fields=['status', 'locked_until']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+    def set_progress(self, progress, total=None):
+        """
+        Persist progress so the admin progress endpoint can report it.
+
+        Reporting progress also extends the visibility timeout, so long jobs
+        that keep making progress are not handed to a second worker.
+        """
+        self.progress = progress
+        fields = ['progress', 'updated_at']
+        if total is not None:
+            self.total = total
+            fields.append('total')
+        if self.status == self.STATUS_RUNNING:
+            self.locked_until = timezone.now() + timedelta(seconds=settings.JOBS_VISIBILITY_TIMEOUT)
+            fields.append('locked_until')
+        if self.pk:
+            self.save(update_fields=fields)
+
+    @property
+    def percent(self):
+        if self.status == self.STATUS_SUCCEEDED:
+            return 100
+        if not self.total:
+            return 0
+        return min(100, round(self.progress * 100 / self.total))
@@ -0,0 +1,189 @@
+"""
+Lightweight database-backed job queue.
+
+Tasks are plain functions registered with the `task` decorator in an app's
+`tasks.py`. They receive the `Job` instance as first argument followed by
+the JSON payload as keyword arguments:
+
+    @task('reservations.update_availability_status')
+    def update_availability_status(job, reservation_id, status):
+        ...
+
+    enqueue('reservations.update_availability_status', {'reservation_id': 1, 'status': 'reserved'})
+
+Jobs are claimed with a conditional UPDATE so that several workers (threads
+or processes, see `manage.py run_workers`) can share the table on SQLite and
+PostgreSQL alike. A claimed job stays invisible to other workers until its
+visibility timeout expires; if the worker dies the job is picked up again.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(name, max_attempts=None):
+    """Register a function as a background task under the given name."""
+    def decorator(func):
+        _registry[name] = (func, max_attempts)
+        func.task_name = name
+        return func
+    return decorator
+
+
+def get_task(name):
+    entry = _registry.get(name)
+    return entry[0] if entry else None
+
+
+def enqueue(name, payload=None, delay=None, max_attempts=None):
+    """
+    Create a job for the named task and return it.
+
+    With JOBS_ALWAYS_EAGER the job is executed immediately in the calling
+    process, which keeps development and tests working without workers.
+    """
+    if name not in _registry:
+        raise ValueError(f"Unknown task: {name}")
+
+    if max_attempts is None:
+        max_attempts = _registry[name][1] or settings.JOBS_MAX_ATTEMPTS
+
+    run_at = timezone.now()
+    if delay:
+        run_at += timedelta(seconds=delay)
+
+    job = Job.objects.create(
+        name=name,
+        payload=payload or {},
+        max_attempts=max_attempts,
+        run_at=run_at,
+    )
+    logger.info(f"Enqueued job {job.id} ({name})")
+
+    if settings.JOBS_ALWAYS_EAGER and not delay:
+        if claim_job(job.id, worker_id='eager'):
+            job.refresh_from_db()
+            execute_job(job)
+            job.refresh_from_db()
+    return job
+
+
+def _claimable(now):
+    """Queued jobs that are due, plus running jobs whose lease expired."""
+    return (
+        Q(status=Job.STATUS_QUEUED, run_at__lte=now) |
+        Q(status=Job.STATUS_RUNNING, locked_until__lt=now)
+    )
+
+
+def claim_job(job_id, worker_id, visibility_timeout=None):
+    """Atomically take ownership of a job. Returns True if this worker got it."""
+    now = timezone.now()
+    timeout = visibility_timeout or settings.JOBS_VISIBILITY_TIMEOUT
+    claimed = Job.objects.filter(_claimable(now), id=job_id).update(
+        status=Job.STATUS_RUNNING,
+        locked_by=worker_id,
+        locked_until=now + timedelta(seconds=timeout),
+        attempts=F('attempts') + 1,
+        updated_at=now,
+    )
+    return claimed == 1
+
+
+def claim_next(worker_id, visibility_timeout=None, batch_size=10):
+    """Claim the next due job, or return None if the queue is empty."""
+    now = timezone.now()
+    candidates = list(
+        Job.objects.filter(_claimable(now))
+        .order_by('run_at', 'id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    for job_id in candidates:
+        if claim_job(job_id, worker_id, visibility_timeout):
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def _finish(job, **fields):
+    """
+    Write the outcome of a run, but only if this worker still owns the job.
+
+    If the visibility timeout expired and another worker re-claimed the job,
+    the stale result is dropped.
+    """
+    fields['updated_at'] = timezone.now()
+    updated = Job.objects.filter(
+        id=job.id,
+        locked_by=job.locked_by,
+        attempts=job.attempts,
+    ).update(**fields)
+    if not updated:
+        logger.warning(f"Job {job.id} was re-claimed by another worker; dropping result")
+    return updated == 1
+
+
+def execute_job(job):
+    """Run a claimed job and record success, retry or failure."""
+    func = get_task(job.name)
+    if func is None:
+        logger.error(f"Job {job.id}: no task registered for {job.name}")
+        return _finish(
+            job,
+            status=Job.STATUS_FAILED,
+            last_error=f"Unknown task: {job.name}",
+            locked_until=None,
+            finished_at=timezone.now(),
+        )
+
+    if job.attempts > job.max_attempts:
+        # Lease expired more often than allowed (e.g. the worker keeps crashing)
+        return _finish(
+            job,
+            status=Job.STATUS_FAILED,
+            last_error=job.last_error or 'Visibility timeout exceeded on every attempt',
+            locked_until=None,
+            finished_at=timezone.now(),
+        )
+
+    try:
+        result = func(job, **job.payload)
+    except Exception as e:
+        logger.exception(f"Job {job.id} ({job.name}) failed on attempt {job.attempts}: {e}")
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            backoff = settings.JOBS_RETRY_BACKOFF * (2 ** (job.attempts - 1))
+            return _finish(
+                job,
+                status=Job.STATUS_QUEUED,
+                last_error=error,
+                locked_until=None,
+                run_at=timezone.now() + timedelta(seconds=backoff),
+            )
+        return _finish(
+            job,
+            status=Job.STATUS_FAILED,
+            last_error=error,
+            locked_until=None,
+            finished_at=timezone.now(),
+        )
+
+    fields = {
+        'status': Job.STATUS_SUCCEEDED,
+        'result': result,
+        'locked_until': None,
+        'finished_at': timezone.now(),
+    }
+    if job.total is not None:
+        fields['progress'] = job.total
+    logger.info(f"Job {job.id} ({job.name}) succeeded")
+    return _finish(job, **fields)
@@ -0,0 +1,17 @@
+from rest_framework import serializers
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Serializer for job status and progress"""
+    percent = serializers.IntegerField(read_only=True)
+    is_finished = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'status', 'attempts', 'max_attempts', 'progress', 'total',
+            'percent', 'is_finished', 'result', 'last_error', 'created_at',
+            'updated_at', 'finished_at'
+        ]
+        read_only_fields = fields
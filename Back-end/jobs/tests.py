@@ -0,0 +1,175 @@
+"""
+Tests for the background job queue.
+"""
+from datetime import date, timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accommodations.models import Accommodation, RoomAvailability
+from accounts.admin_tokens import create_admin_access_token
+from .models import Job
+from .queue import claim_next, enqueue, execute_job, task
+
+calls = []
+
+
+@task('jobs.tests.record')
+def record(job, value):
+    calls.append(value)
+    return {'value': value}
+
+
+@task('jobs.tests.explode', max_attempts=2)
+def explode(job):
+    raise RuntimeError('boom')
+
+
+@override_settings(JOBS_ALWAYS_EAGER=False, JOBS_RETRY_BACKOFF=0)
+class JobQueueTest(TestCase):
+    """Test enqueueing, claiming and retries."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_execute(self):
+        job = enqueue('jobs.tests.record', {'value': 7})
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+
+        claimed = claim_next('worker-1')
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.attempts, 1)
+        # A claimed job is invisible to other workers
+        self.assertIsNone(claim_next('worker-2'))
+
+        execute_job(claimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual(job.result, {'value': 7})
+        self.assertEqual(calls, [7])
+
+    def test_unknown_task_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue('jobs.tests.missing')
+
+    def test_retry_then_fail(self):
+        job = enqueue('jobs.tests.explode')
+        self.assertEqual(job.max_attempts, 2)
+
+        execute_job(claim_next('worker-1'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+        self.assertIn('boom', job.last_error)
+
+        execute_job(claim_next('worker-1'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_expired_lease_is_reclaimed(self):
+        job = enqueue('jobs.tests.record', {'value': 1})
+        stale = claim_next('worker-1')
+        Job.objects.filter(id=job.id).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        fresh = claim_next('worker-2')
+        self.assertEqual(fresh.id, job.id)
+        self.assertEqual(fresh.locked_by, 'worker-2')
+
+        # The first worker's late result must not overwrite the new owner
+        self.assertFalse(execute_job(stale))
+        self.assertTrue(execute_job(fresh))
+
+    @override_settings(JOBS_ALWAYS_EAGER=True)
+    def test_eager_mode(self):
+        job = enqueue('jobs.tests.record', {'value': 3})
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual(calls, [3])
+
+
+@override_settings(JOBS_ALWAYS_EAGER=False)
+class RunWorkersCommandTest(TransactionTestCase):
+    """Test the run_workers command (worker threads need committed rows)."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_run_workers_burst(self):
+        enqueue('jobs.tests.record', {'value': 1})
+        enqueue('jobs.tests.record', {'value': 2})
+        call_command('run_workers', '--workers', '2', '--burst', stdout=StringIO())
+        self.assertEqual(sorted(calls), [1, 2])
+        self.assertEqual(Job.objects.filter(status=Job.STATUS_SUCCEEDED).count(), 2)
+
+
+@override_settings(JOBS_ALWAYS_EAGER=False)
+class BulkAvailabilityJobTest(TestCase):
+    """Test that admin bulk availability returns a job with progress."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Admin {create_admin_access_token(self.admin)}')
+        self.accommodation = Accommodation.objects.create(
+            title='Suite', city='Tehran', province='Tehran', address='-', description='-',
+            capacity=2, beds_description='1 double', area=40, price_per_night=1000000,
+            main_image='accommodations/test.jpg'
+        )
+
+    def test_bulk_create_returns_job(self):
+        response = self.client.post('/api/admin/room-availability/bulk-create/', {
+            'accommodation': self.accommodation.id,
+            'start_date': '2030-01-01',
+            'end_date': '2030-03-01',
+            'status': 'blocked',
+        }, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['count'], 59)
+        self.assertEqual(RoomAvailability.objects.count(), 0)
+
+        # Run everything queued (the accommodation save also queued thumbnails)
+        while True:
+            job = claim_next('worker-1')
+            if job is None:
+                break
+            execute_job(job)
+
+        progress = self.client.get(f"/api/admin/jobs/{response.data['job_id']}/")
+        self.assertEqual(progress.status_code, 200)
+        self.assertEqual(progress.data['status'], Job.STATUS_SUCCEEDED)
+        self.assertEqual(progress.data['progress'], 59)
+        self.assertEqual(progress.data['percent'], 100)
+        self.assertEqual(
+            RoomAvailability.objects.filter(accommodation=self.accommodation, status='blocked').count(),
+            59
+        )
+        self.assertTrue(RoomAvailability.objects.filter(date=date(2030, 2, 28)).exists())
+
+    def test_bulk_create_validates_before_queueing(self):
+        url = '/api/admin/room-availability/bulk-create/'
+        dates = {'accommodation': self.accommodation.id, 'start_date': '2030-01-01', 'end_date': '2030-01-03'}
+        for invalid in ({'status': 'open'}, {'price': 'cheap'}, {'price': -1}):
+            response = self.client.post(url, {**dates, **invalid}, format='json')
+            self.assertEqual(response.status_code, 400, invalid)
+            self.assertIn(next(iter(invalid)), response.data)
+        self.assertFalse(Job.objects.filter(name='accommodations.bulk_create_availability').exists())
+
+        response = self.client.post(url, {**dates, 'price': '2500000'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Job.objects.get(id=response.data['job_id']).payload, {
+            'accommodation_id': self.accommodation.id,
+            'start_date': '2030-01-01',
+            'end_date': '2030-01-03',
+            'status': 'available',
+            'price': '2500000',
+        })
+
+    def test_progress_requires_admin(self):
+        job = enqueue('accommodations.bulk_create_availability', {
+            'accommodation_id': self.accommodation.id,
+            'start_date': '2030-01-01',
+            'end_date': '2030-01-02',
+        })
+        response = APIClient().get(f'/api/admin/jobs/{job.id}/')
+        self.assertIn(response.status_code, (401, 403))
@@ -0,0 +1,28 @@
+from rest_framework import viewsets
+from rest_framework.decorators import authentication_classes, permission_classes
+from rest_framework.permissions import IsAdminUser
+from accounts.authentication import AdminJWTAuthentication
+from .models import Job
+from .serializers import JobSerializer
+
+
+@authentication_classes([AdminJWTAuthentication])
+@permission_classes([IsAdminUser])
+class AdminJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Admin viewset to poll background job status and progress"""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        """Filter jobs by task name and status if provided"""
+        queryset = Job.objects.all()
+
+        name = self.request.query_params.get('name', None)
+        if name:
+            queryset = queryset.filter(name=name)
+
+        status_filter = self.request.query_params.get('status', None)
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+
+        return queryset.order_by('-created_at')
@@ -0,0 +1,77 @@
+"""
+Worker loop used by the `run_workers` management command.
+"""
+import logging
+import os
+import socket
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from .queue import claim_next, execute_job
+
+logger = logging.getLogger(__name__)
+
+
+def make_worker_id(index):
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def run_worker(worker_id, stop_event, poll_interval=None, burst=False, visibility_timeout=None):
+    """
+    Claim and execute jobs until `stop_event` is set.
+
+    In burst mode the worker exits as soon as the queue is empty, which is
+    handy for cron-style invocations and tests.
+    """
+    poll_interval = poll_interval if poll_interval is not None else settings.JOBS_POLL_INTERVAL
+    logger.info(f"Worker {worker_id} started")
+    processed = 0
+    try:
+        while not stop_event.is_set():
+            close_old_connections()
+            try:
+                job = claim_next(worker_id, visibility_timeout=visibility_timeout)
+            except Exception as e:
+                # Database hiccup: back off and try again rather than dying
+                logger.exception(f"Worker {worker_id} failed to claim a job: {e}")
+                stop_event.wait(poll_interval)
+                continue
+
+            if job is None:
+                if burst:
+                    break
+                stop_event.wait(poll_interval)
+                continue
+
+            execute_job(job)
+            processed += 1
+    finally:
+        connections.close_all()
+        logger.info(f"Worker {worker_id} stopped after {processed} jobs")
+    return processed
+
+
+def run_worker_process(index, stop_event, poll_interval, burst, visibility_timeout):
+    """
+    Entry point for worker processes started with multiprocessing.
+
+    The parent closes its connections before forking, so each process opens
+    its own on first use.
+    """
+    run_worker(make_worker_id(index), stop_event, poll_interval, burst, visibility_timeout)
+
+
+def start_threads(count, stop_event, poll_interval=None, burst=False, visibility_timeout=None):
+    threads = []
+    for index in range(count):
+        thread = threading.Thread(
+            target=run_worker,
+            args=(make_worker_id(index), stop_event, poll_interval, burst, visibility_timeout),
+            name=f"job-worker-{index}",
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    return threads
@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .admin_views import AdminReservationViewSet
+from .admin_views import AdminAnalyticsViewSet, AdminReservationViewSet
 
 router = DefaultRouter()
 router.register(r'reservations', AdminReservationViewSet, basename='admin-reservation')
+router.register(r'analytics', AdminAnalyticsViewSet, basename='admin-analytics')
 
 urlpatterns = router.urls
 
@@ -2,11 +2,32 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, authentication_classes, permission_classes
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-from django.db.models import Q
+from django.conf import settings
 from datetime import date
+from .analytics import GROUP_FIELDS, INTERVALS, ROLLUP_STATUSES, occupancy_report
 from .models import Reservation
+from .search import search_reservations
 from accounts.authentication import AdminJWTAuthentication
-from .serializers import ReservationListSerializer, ReservationSerializer
+from hotel_backend.exports import EXPORT_FORMAT_PATTERN, stream_export
+from hotel_backend.pagination import ProjectedPageNumberPagination
+from .serializers import AdminReservationListSerializer, ReservationSerializer
+
+
+EXPORT_FIELDS = [
+    ('id', 'id'),
+    ('username', 'user__username'),
+    ('accommodation', 'accommodation_id'),
+    ('accommodation_title', 'accommodation__title'),
+    ('check_in_date', 'check_in_date'),
+    ('check_out_date', 'check_out_date'),
+    ('number_of_guests', 'number_of_guests'),
+    ('total_price', 'total_price'),
+    ('status', 'status'),
+    ('contact_phone', 'contact_phone'),
+    ('contact_email', 'contact_email'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
 
 
 @authentication_classes([AdminJWTAuthentication])
@@ -15,14 +36,24 @@ class AdminReservationViewSet(viewsets.ReadOnlyModelViewSet):
     """Admin viewset for Reservation management (read-only with status update)"""
     queryset = Reservation.objects.all()
     
+    pagination_class = ProjectedPageNumberPagination
+    
     def get_serializer_class(self):
         if self.action == 'list':
-            return ReservationListSerializer
+            return AdminReservationListSerializer
         return ReservationSerializer
     
+    def project_page(self, queryset):
+        """Only the columns the (sparse) list fields read, in one joined query per page"""
+        return queryset.values(*self.get_serializer().value_columns())
+    
     def get_queryset(self):
         """Filter reservations by various criteria"""
-        queryset = Reservation.objects.select_related('accommodation', 'user').all()
+        if self.action == 'list':
+            # Projected per page by project_page
+            queryset = Reservation.objects.all()
+        else:
+            queryset = Reservation.objects.select_related('accommodation', 'user').prefetch_related('accommodation__images')
         
         # Status filter
         status_filter = self.request.query_params.get('status', None)
@@ -52,15 +83,10 @@ class AdminReservationViewSet(viewsets.ReadOnlyModelViewSet):
             except (ValueError, TypeError):
                 pass
         
-        # Search filter
+        # Search filter: id, phone prefix, e-mail or text (see reservations.search)
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(user__username__icontains=search) |
-                Q(accommodation__title__icontains=search) |
-                Q(contact_email__icontains=search) |
-                Q(contact_phone__icontains=search)
-            )
+            queryset = search_reservations(queryset, search)
         
         return queryset.order_by('-created_at')
     
@@ -104,4 +130,81 @@ class AdminReservationViewSet(viewsets.ReadOnlyModelViewSet):
             serializer.save()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['get'], url_path=rf'export/(?P<export_format>{EXPORT_FORMAT_PATTERN})')
+    def export(self, request, export_format=None):
+        """Stream all reservations matching the list filters as CSV or NDJSON"""
+        return stream_export(self.get_queryset(), EXPORT_FIELDS, export_format, 'reservations')
 
+
+@authentication_classes([AdminJWTAuthentication])
+@permission_classes([IsAdminUser])
+class AdminAnalyticsViewSet(viewsets.ViewSet):
+    """Admin occupancy and revenue reports, read from the DailyStats rollup"""
+    
+    def list(self, request):
+        """
+        Occupancy rate, ADR and RevPAR over [start_date, end_date), grouped by
+        `group_by` (city, province or accommodation) and `interval` (total,
+        month or day); see occupancy_report. `status` is a comma-separated
+        list of reservation statuses to count (default: confirmed).
+        """
+        params = request.query_params
+        try:
+            start_date = date.fromisoformat(params.get('start_date', ''))
+            end_date = date.fromisoformat(params.get('end_date', ''))
+        except ValueError:
+            return Response(
+                {'error': 'start_date and end_date are required (YYYY-MM-DD)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end_date <= start_date:
+            return Response(
+                {'error': 'end_date must be after start_date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        group_by = params.get('group_by', 'city')
+        if group_by not in GROUP_FIELDS:
+            return Response(
+                {'error': f'group_by must be one of: {", ".join(GROUP_FIELDS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        interval = params.get('interval', 'total')
+        if interval not in INTERVALS:
+            return Response(
+                {'error': f'interval must be one of: {", ".join(INTERVALS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if interval == 'day' and (end_date - start_date).days > settings.ANALYTICS_MAX_DAYS:
+            return Response(
+                {'error': f'Daily reports are limited to {settings.ANALYTICS_MAX_DAYS} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        statuses = [value for value in params.get('status', 'confirmed').split(',') if value]
+        if not statuses or any(value not in ROLLUP_STATUSES for value in statuses):
+            return Response(
+                {'error': f'status must be a comma-separated list of: {", ".join(ROLLUP_STATUSES)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        accommodation_ids = None
+        if params.get('accommodation'):
+            try:
+                accommodation_ids = [int(value) for value in params['accommodation'].split(',') if value.strip()]
+            except ValueError:
+                return Response(
+                    {'error': 'accommodation must be a comma-separated list of ids'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        return Response(occupancy_report(
+            start_date, end_date,
+            group_by=group_by,
+            interval=interval,
+            statuses=statuses,
+            accommodation_ids=accommodation_ids,
+            city=params.get('city'),
+            province=params.get('province'),
+        ))
@@ -0,0 +1,215 @@
+"""
+Occupancy and revenue reporting from the DailyStats rollup.
+
+Every night of a pending or confirmed reservation adds one booked night and
+its share of the reservation total to the (accommodation, date, status)
+row; cancelled reservations add nothing. Reservation changes enqueue
+`reservations.refresh_daily_stats` for the nights they touch (see
+reservations.signals), and `manage.py rebuild_daily_stats` recomputes any
+range from history.
+
+Reports read only DailyStats and Accommodation:
+
+- occupancy: booked nights / available nights (accommodations x nights)
+- ADR (average daily rate): revenue / booked nights
+- RevPAR (revenue per available room-night): revenue / available nights
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from accommodations.models import Accommodation
+from .models import DailyStats, Reservation
+
+ROLLUP_STATUSES = [status for status, _ in DailyStats.STATUS_CHOICES]
+# group_by value -> Accommodation field
+GROUP_FIELDS = {
+    'city': 'city',
+    'province': 'province',
+    'accommodation': 'id',
+}
+INTERVALS = ('total', 'month', 'day')
+
+
+def night_revenue(check_in_date, check_out_date, total_price):
+    """
+    Yield (night, revenue) for every night of a stay.
+
+    The total is split evenly; the rounding remainder goes to the first
+    night so the nights always add up to the total.
+    """
+    nights = (check_out_date - check_in_date).days
+    if nights <= 0:
+        return
+    share, remainder = divmod(total_price or 0, nights)
+    for offset in range(nights):
+        yield check_in_date + timedelta(days=offset), share + (remainder if offset == 0 else 0)
+
+
+def rebuild_daily_stats(start_date=None, end_date=None, accommodation_ids=None, chunk_size=None, on_progress=None):
+    """
+    Recompute DailyStats for nights in [start_date, end_date) (open ended
+    when None), for all accommodations or only `accommodation_ids`.
+
+    Reservations are streamed in accommodation order with
+    `iterator(chunk_size)`, so memory holds one accommodation's nights at a
+    time. Runs in a single transaction; returns the number of rows written.
+    """
+    chunk_size = chunk_size or settings.DAILY_STATS_CHUNK_SIZE
+    stats = DailyStats.objects.all()
+    reservations = Reservation.objects.filter(status__in=ROLLUP_STATUSES)
+    if start_date:
+        stats = stats.filter(date__gte=start_date)
+        reservations = reservations.filter(check_out_date__gt=start_date)
+    if end_date:
+        stats = stats.filter(date__lt=end_date)
+        reservations = reservations.filter(check_in_date__lt=end_date)
+    if accommodation_ids is not None:
+        stats = stats.filter(accommodation_id__in=accommodation_ids)
+        reservations = reservations.filter(accommodation_id__in=accommodation_ids)
+
+    written = 0
+    processed = 0
+    with transaction.atomic():
+        stats.delete()
+        current_accommodation = None
+        cells = {}
+
+        def flush():
+            DailyStats.objects.bulk_create([
+                DailyStats(accommodation_id=current_accommodation, date=night, status=status,
+                           booked=booked, revenue=revenue)
+                for (night, status), (booked, revenue) in cells.items()
+            ], batch_size=chunk_size)
+            return len(cells)
+
+        for accommodation_id, check_in, check_out, status, total_price in reservations.order_by(
+            'accommodation_id', 'check_in_date'
+        ).values_list(
+            'accommodation_id', 'check_in_date', 'check_out_date', 'status', 'total_price'
+        ).iterator(chunk_size=chunk_size):
+            if accommodation_id != current_accommodation:
+                written += flush()
+                current_accommodation, cells = accommodation_id, {}
+            for night, revenue in night_revenue(check_in, check_out, total_price):
+                if (start_date and night < start_date) or (end_date and night >= end_date):
+                    continue
+                booked_total, revenue_total = cells.get((night, status), (0, 0))
+                cells[night, status] = (booked_total + 1, revenue_total + revenue)
+            processed += 1
+            if on_progress and processed % chunk_size == 0:
+                on_progress(processed)
+        written += flush()
+    return written
+
+
+def refresh_daily_stats(accommodation_id, start_date, end_date):
+    """Recompute one accommodation's DailyStats for [start_date, end_date)"""
+    return rebuild_daily_stats(start_date, end_date, accommodation_ids=[accommodation_id])
+
+
+def _periods(start_date, end_date, interval):
+    """(period start, nights in range) for each period of [start_date, end_date)"""
+    if interval == 'total':
+        return [(start_date, (end_date - start_date).days)]
+    if interval == 'day':
+        return [(start_date + timedelta(days=offset), 1) for offset in range((end_date - start_date).days)]
+    periods = []
+    month = start_date.replace(day=1)
+    while month < end_date:
+        next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        periods.append((month, (min(next_month, end_date) - max(month, start_date)).days))
+        month = next_month
+    return periods
+
+
+def _metrics(accommodations, available, booked, revenue):
+    revenue = int(revenue or 0)
+    booked = booked or 0
+    return {
+        'accommodations': accommodations,
+        'available_nights': available,
+        'booked_nights': booked,
+        'revenue': revenue,
+        'occupancy_rate': round(booked / available, 4) if available else None,
+        'adr': round(revenue / booked, 2) if booked else None,
+        'revpar': round(revenue / available, 2) if available else None,
+    }
+
+
+def occupancy_report(start_date, end_date, group_by='city', interval='total', statuses=('confirmed',),
+                     accommodation_ids=None, city=None, province=None):
+    """
+    Occupancy rate, ADR and RevPAR per group (city, province or
+    accommodation) and period over [start_date, end_date).
+
+    Available nights count every accommodation matching the filters for
+    every night of the period. Runs two queries: accommodation counts per
+    group and DailyStats sums per group and period.
+    """
+    filters = Q()
+    if accommodation_ids is not None:
+        filters &= Q(id__in=accommodation_ids)
+    if city:
+        filters &= Q(city=city)
+    if province:
+        filters &= Q(province=province)
+    accommodations = Accommodation.objects.filter(filters).order_by()
+
+    key = GROUP_FIELDS[group_by]
+    groups = {}
+    if group_by == 'accommodation':
+        for accommodation_id, title in accommodations.values_list('id', 'title'):
+            groups[accommodation_id] = ({'accommodation': accommodation_id, 'title': title}, 1)
+    else:
+        for value, count in accommodations.values_list(key).annotate(count=Count('id')):
+            groups[value] = ({group_by: value}, count)
+
+    stats = DailyStats.objects.filter(
+        date__gte=start_date, date__lt=end_date, status__in=list(statuses),
+    ).order_by()
+    if filters:
+        stats = stats.filter(accommodation__in=accommodations.values('id'))
+    group_key = 'accommodation_id' if key == 'id' else f'accommodation__{key}'
+    period_key = None
+    if interval == 'month':
+        stats = stats.annotate(period=TruncMonth('date'))
+        period_key = 'period'
+    elif interval == 'day':
+        period_key = 'date'
+    sums = {
+        (row[group_key], row[period_key] if period_key else start_date): (row['booked'], row['revenue'])
+        for row in stats.values(group_key, *filter(None, [period_key])).annotate(
+            booked=Sum('booked'), revenue=Sum('revenue'),
+        )
+    }
+
+    results = []
+    inventory = sum(count for _, count in groups.values())
+    for period, nights in _periods(start_date, end_date, interval):
+        for value in sorted(groups):
+            labels, count = groups[value]
+            booked, revenue = sums.get((value, period), (0, 0))
+            row = dict(labels)
+            if interval != 'total':
+                row['period'] = period.isoformat()
+            row.update(_metrics(count, count * nights, booked, revenue))
+            results.append(row)
+
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'group_by': group_by,
+        'interval': interval,
+        'statuses': list(statuses),
+        'results': results,
+        'totals': _metrics(
+            inventory,
+            inventory * (end_date - start_date).days,
+            sum(booked or 0 for booked, _ in sums.values()),
+            sum(revenue or 0 for _, revenue in sums.values()),
+        ),
+    }
@@ -0,0 +1,116 @@
+"""
+Django management command running EXPLAIN on the key reservation queries.
+
+Flags full table scans (PostgreSQL `Seq Scan`, SQLite `SCAN <table>`) and
+sorts that cannot use an index, so missing indexes show up before the
+tables grow.
+
+On small tables PostgreSQL prefers sequential scans even when an index
+exists; --no-seqscan disables them for the audit so the plans show whether
+a usable index is there.
+
+Usage:
+    python manage.py audit_query_plans
+    python manage.py audit_query_plans --show-plans
+    python manage.py audit_query_plans --no-seqscan --fail-on-scan
+"""
+import re
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accommodations.models import Accommodation, RoomAvailability
+from reservations.models import Reservation
+
+SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)(?!\w)'),
+}
+SORT_PATTERNS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+}
+
+
+def key_queries():
+    """(name, queryset) pairs for the hot reservation access paths"""
+    accommodation_id = Accommodation.objects.values_list('id', flat=True).first() or 1
+    user_id = User.objects.values_list('id', flat=True).first() or 1
+    today = timezone.localdate()
+    end = today + timedelta(days=30)
+
+    return [
+        ('overlapping active reservations', Reservation.objects.filter(
+            accommodation_id=accommodation_id,
+            status__in=['pending', 'confirmed'],
+            check_in_date__lt=end,
+            check_out_date__gt=today,
+        ).order_by().values_list('check_in_date', 'check_out_date')),
+        ('guest reservation list', Reservation.objects.filter(user_id=user_id).order_by('-created_at')[:20]),
+        ('admin reservation list', Reservation.objects.order_by('-created_at')[:20]),
+        ('admin reservation list by status', Reservation.objects.filter(status='pending').order_by('-created_at')[:20]),
+        ('availability range', RoomAvailability.objects.filter(
+            accommodation_id=accommodation_id, date__gte=today, date__lt=end,
+        ).order_by('date')),
+    ]
+
+
+def full_scans(plan, vendor):
+    """Tables read with a full scan in an EXPLAIN output"""
+    pattern = SCAN_PATTERNS.get(vendor)
+    if pattern is None:
+        return []
+    return sorted(set(pattern.findall(plan)))
+
+
+def sorts_without_index(plan, vendor):
+    pattern = SORT_PATTERNS.get(vendor)
+    return bool(pattern and pattern.search(plan))
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the key reservation queries and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--show-plans', action='store_true', help='Print every query plan')
+        parser.add_argument('--no-seqscan', action='store_true',
+                            help='PostgreSQL: disable sequential scans so small tables still show index use')
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help='Exit with an error when any query does a full table scan')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in SCAN_PATTERNS:
+            self.stdout.write(self.style.WARNING(f'Scan detection is not supported on {vendor}; printing plans only'))
+            options['show_plans'] = True
+
+        flagged = []
+        with transaction.atomic():
+            if options['no_seqscan'] and vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset in key_queries():
+                plan = queryset.explain()
+                scans = full_scans(plan, vendor)
+                sorts = sorts_without_index(plan, vendor)
+
+                if scans:
+                    flagged.append(name)
+                    self.stdout.write(self.style.ERROR(f'SCAN  {name}: full scan of {", ".join(scans)}'))
+                elif sorts:
+                    self.stdout.write(self.style.WARNING(f'SORT  {name}: sorted without an index'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'OK    {name}'))
+                if options['show_plans'] or options['verbosity'] > 1:
+                    self.stdout.write(f'      {queryset.query}')
+                    for line in plan.splitlines():
+                        self.stdout.write(f'      | {line}')
+
+        if flagged:
+            message = f'{len(flagged)} quer{"y" if len(flagged) == 1 else "ies"} with full table scans'
+            if options['fail_on_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
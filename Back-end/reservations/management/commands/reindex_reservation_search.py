@@ -0,0 +1,34 @@
+"""
+Django management command recomputing the normalized search columns (and,
+outside PostgreSQL, the trigram table) used by the admin reservation search.
+
+Needed after reservations are written without Reservation.save(), e.g. with
+bulk_create or raw SQL.
+
+Usage:
+    python manage.py reindex_reservation_search
+    python manage.py reindex_reservation_search --chunk-size 5000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from reservations.search import reindex_reservations
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the admin reservation search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, help='Reservations indexed per transaction')
+
+    def handle(self, *args, **options):
+        def progress(indexed):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{indexed} reservations indexed')
+
+        start = time.perf_counter()
+        indexed = reindex_reservations(chunk_size=options['chunk_size'], on_progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'{indexed} reservations indexed in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0003_roomavailability'),
+        ('reservations', '0003_alter_reservation_contact_email_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'confirmed'])), fields=['accommodation', 'check_in_date', 'check_out_date'], name='reservation_active_stay_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', '-created_at'], name='reservation_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['-created_at'], name='reservation_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', '-created_at'], name='reservation_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accommodations', '0003_roomavailability'),
+        ('reservations', '0004_reservation_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='تاریخ')),
+                ('status', models.CharField(choices=[('pending', 'در انتظار'), ('confirmed', 'تایید شده')], max_length=20, verbose_name='وضعیت')),
+                ('booked', models.PositiveIntegerField(default=0, verbose_name='شب\u200cهای رزرو شده')),
+                ('revenue', models.DecimalField(decimal_places=0, default=0, max_digits=12, verbose_name='درآمد (تومان)')),
+                ('accommodation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='accommodations.accommodation', verbose_name='اقامتگاه')),
+            ],
+            options={
+                'verbose_name': 'آمار روزانه',
+                'verbose_name_plural': 'آمار روزانه',
+                'ordering': ['date', 'accommodation'],
+                'indexes': [models.Index(fields=['date', 'status'], name='daily_stats_date_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('accommodation', 'date', 'status'), name='daily_stats_unique_night')],
+            },
+        ),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:26
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copies of the reservations.search helpers as of this migration, so
+# later changes to the live normalization do not change what it writes
+PERSIAN_LETTERS = str.maketrans({'ي': 'ی', 'ى': 'ی', 'ك': 'ک'})
+
+
+def _ascii_digits(value):
+    return ''.join(str(unicodedata.digit(ch)) if ch.isdigit() else ch for ch in value)
+
+
+def normalize_text(value):
+    return ' '.join(_ascii_digits(value or '').translate(PERSIAN_LETTERS).casefold().split())
+
+
+def normalize_phone(value):
+    digits = ''.join(ch for ch in _ascii_digits(value or '') if ch.isdigit())
+    if digits.startswith('0098'):
+        return '0' + digits[4:]
+    if digits.startswith('98') and len(digits) == 12:
+        return '0' + digits[2:]
+    return digits
+
+
+def normalize_email(value):
+    return (value or '').strip().lower()
+
+
+def build_search_text(username, title, email, phone):
+    return '\n'.join([normalize_text(username), normalize_text(title), normalize_email(email), normalize_phone(phone)])
+
+
+def search_grams(text):
+    return {line[i:i + 3] for line in text.split('\n') for i in range(len(line) - 2)}
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS reservation_search_trgm_idx '
+        'ON reservations_reservation USING gin (search_text gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS reservation_search_trgm_idx')
+
+
+def index_existing_reservations(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    ReservationSearchGram = apps.get_model('reservations', 'ReservationSearchGram')
+    db = schema_editor.connection.alias
+    rows = Reservation.objects.using(db).order_by('id').values_list(
+        'id', 'user__username', 'accommodation__title', 'contact_email', 'contact_phone',
+    )
+    chunk = []
+    for reservation_id, username, title, email, phone in rows.iterator(chunk_size=2000):
+        chunk.append(Reservation(
+            id=reservation_id,
+            contact_phone_digits=normalize_phone(phone),
+            contact_email_normalized=normalize_email(email),
+            search_text=build_search_text(username, title, email, phone),
+        ))
+        if len(chunk) == 2000:
+            _save_chunk(Reservation, ReservationSearchGram, db, schema_editor, chunk)
+            chunk = []
+    if chunk:
+        _save_chunk(Reservation, ReservationSearchGram, db, schema_editor, chunk)
+
+
+def _save_chunk(Reservation, ReservationSearchGram, db, schema_editor, reservations):
+    Reservation.objects.using(db).bulk_update(
+        reservations, ['contact_phone_digits', 'contact_email_normalized', 'search_text'],
+    )
+    if schema_editor.connection.vendor != 'postgresql':
+        ReservationSearchGram.objects.using(db).bulk_create([
+            ReservationSearchGram(reservation_id=reservation.id, gram=gram)
+            for reservation in reservations
+            for gram in search_grams(reservation.search_text)
+        ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0005_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='contact_email_normalized',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='contact_phone_digits',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.CreateModel(
+            name='ReservationSearchGram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3)),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_grams', to='reservations.reservation')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('gram', 'reservation'), name='reservation_search_gram_unique')],
+            },
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.RunPython(index_existing_reservations, migrations.RunPython.noop),
+    ]
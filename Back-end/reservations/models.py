@@ -27,11 +27,62 @@ class Reservation(models.Model):
     contact_email = models.EmailField(blank=True, null=True, verbose_name="ایمیل")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاریخ ایجاد")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="تاریخ بروزرسانی")
+    # Normalized copies for admin search (see reservations.search), set on save
+    contact_phone_digits = models.CharField(max_length=20, blank=True, default='', db_index=True, editable=False)
+    contact_email_normalized = models.CharField(max_length=254, blank=True, default='', db_index=True, editable=False)
+    search_text = models.TextField(blank=True, default='', editable=False)
     
     class Meta:
         verbose_name = "رزرو"
         verbose_name_plural = "رزروها"
         ordering = ['-created_at']
+        indexes = [
+            # Overlap checks: accommodation + active status + date range
+            models.Index(
+                fields=['accommodation', 'check_in_date', 'check_out_date'],
+                condition=models.Q(status__in=['pending', 'confirmed']),
+                name='reservation_active_stay_idx',
+            ),
+            # A guest's reservations, newest first
+            models.Index(fields=['user', '-created_at'], name='reservation_user_created_idx'),
+            # Admin listing, optionally filtered by status
+            models.Index(fields=['-created_at'], name='reservation_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='reservation_status_created_idx'),
+        ]
+    
+    # Fields the daily stats rollup is computed from
+    STATS_FIELDS = ('accommodation_id', 'check_in_date', 'check_out_date', 'status', 'total_price')
+    # Fields the search columns are computed from
+    SEARCH_FIELDS = ('user_id', 'accommodation_id', 'contact_email', 'contact_phone')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded stay so a change can also refresh the nights it moved away from
+        instance._loaded_stats = instance.stats_snapshot()
+        instance._loaded_search = instance.search_snapshot()
+        return instance
+    
+    def stats_snapshot(self):
+        return tuple(self.__dict__.get(field) for field in self.STATS_FIELDS)
+    
+    def search_snapshot(self):
+        return tuple(self.__dict__.get(field) for field in self.SEARCH_FIELDS)
+    
+    def update_search_fields(self):
+        """Recompute the search columns; returns False when their inputs did not change"""
+        from .search import build_search_text, normalize_email, normalize_phone
+        
+        snapshot = self.search_snapshot()
+        if self.search_text and snapshot == getattr(self, '_loaded_search', None):
+            return False
+        self.contact_phone_digits = normalize_phone(self.contact_phone)
+        self.contact_email_normalized = normalize_email(self.contact_email)
+        self.search_text = build_search_text(
+            self.user.username, self.accommodation.title, self.contact_email, self.contact_phone,
+        )
+        self._loaded_search = snapshot
+        return True
     
     def __str__(self):
         return f"{self.user.username} - {self.accommodation.title} - {self.check_in_date}"
@@ -40,29 +91,34 @@ class Reservation(models.Model):
         """Calculate number of nights"""
         return (self.check_out_date - self.check_in_date).days
     
+    def _availability_by_date(self):
+        """RoomAvailability entries for the stay keyed by date, in one query"""
+        return {
+            entry.date: entry
+            for entry in RoomAvailability.objects.filter(
+                accommodation=self.accommodation,
+                date__gte=self.check_in_date,
+                date__lt=self.check_out_date
+            )
+        }
+    
+    def _day_price(self, availability):
+        """Day-specific price if set, otherwise the accommodation default"""
+        if availability is not None and availability.price is not None:
+            return availability.price
+        return self.accommodation.price_per_night
+    
     def calculate_total_price(self):
         """Calculate total price based on day-by-day pricing"""
         if not self.accommodation or not self.check_in_date or not self.check_out_date:
             return Decimal('0')
         
+        availability_by_date = self._availability_by_date()
         total_price = Decimal('0')
         current_date = self.check_in_date
         
         while current_date < self.check_out_date:
-            # Check if there's a RoomAvailability entry for this date
-            availability = RoomAvailability.objects.filter(
-                accommodation=self.accommodation,
-                date=current_date
-            ).first()
-            
-            if availability:
-                # Use day-specific price
-                day_price = availability.get_price()
-            else:
-                # Use default accommodation price
-                day_price = self.accommodation.price_per_night
-            
-            total_price += day_price
+            total_price += self._day_price(availability_by_date.get(current_date))
             current_date += timedelta(days=1)
         
         return total_price
@@ -72,29 +128,18 @@ class Reservation(models.Model):
         if not self.accommodation or not self.check_in_date or not self.check_out_date:
             return []
         
+        availability_by_date = self._availability_by_date()
         breakdown = []
         current_date = self.check_in_date
         
         while current_date < self.check_out_date:
-            availability = RoomAvailability.objects.filter(
-                accommodation=self.accommodation,
-                date=current_date
-            ).first()
-            
-            if availability:
-                day_price = availability.get_price()
-                status = availability.status
-                is_custom_price = availability.price is not None
-            else:
-                day_price = self.accommodation.price_per_night
-                status = 'available'
-                is_custom_price = False
+            availability = availability_by_date.get(current_date)
             
             breakdown.append({
                 'date': current_date.isoformat(),
-                'price': str(day_price),
-                'status': status,
-                'is_custom_price': is_custom_price,
+                'price': str(self._day_price(availability)),
+                'status': availability.status if availability else 'available',
+                'is_custom_price': availability is not None and availability.price is not None,
             })
             
             current_date += timedelta(days=1)
@@ -118,15 +163,21 @@ class Reservation(models.Model):
         
         # Check day-by-day availability
         if self.accommodation and self.check_in_date and self.check_out_date:
+            availability_by_date = self._availability_by_date()
+            conflicting_reservations = list(
+                Reservation.objects.filter(
+                    accommodation=self.accommodation,
+                    status__in=['pending', 'confirmed'],
+                    check_in_date__lt=self.check_out_date,
+                    check_out_date__gt=self.check_in_date
+                ).exclude(id=self.id if self.id else None).values_list('check_in_date', 'check_out_date')
+            )
             current_date = self.check_in_date
             unavailable_dates = []
             
             while current_date < self.check_out_date:
                 # Check RoomAvailability status
-                availability = RoomAvailability.objects.filter(
-                    accommodation=self.accommodation,
-                    date=current_date
-                ).first()
+                availability = availability_by_date.get(current_date)
                 
                 if availability:
                     # Check if status allows booking
@@ -138,14 +189,7 @@ class Reservation(models.Model):
                         })
                 else:
                     # No specific entry, check if there are conflicting reservations
-                    conflicting_reservations = Reservation.objects.filter(
-                        accommodation=self.accommodation,
-                        status__in=['pending', 'confirmed'],
-                        check_in_date__lt=current_date + timedelta(days=1),
-                        check_out_date__gt=current_date
-                    ).exclude(id=self.id if self.id else None)
-                    
-                    if conflicting_reservations.exists():
+                    if any(check_in <= current_date < check_out for check_in, check_out in conflicting_reservations):
                         unavailable_dates.append({
                             'date': current_date.isoformat(),
                             'status': 'reserved',
@@ -163,4 +207,59 @@ class Reservation(models.Model):
         self.full_clean()
         if self.total_price is None or self.total_price == 0:
             self.total_price = self.calculate_total_price()
+        search_changed = self.update_search_fields()
         super().save(*args, **kwargs)
+        if search_changed:
+            from .search import sync_search_grams
+            sync_search_grams([self])
+
+
+class ReservationSearchGram(models.Model):
+    """One trigram of a reservation's search_text (used where pg_trgm is unavailable)"""
+    
+    reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='search_grams')
+    gram = models.CharField(max_length=3)
+    
+    class Meta:
+        constraints = [
+            # Also the lookup index: gram first, covering reservation_id
+            models.UniqueConstraint(fields=['gram', 'reservation'], name='reservation_search_gram_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.reservation_id}: {self.gram}"
+
+
+class DailyStats(models.Model):
+    """
+    Nightly rollup of reservations per accommodation and reservation status.
+
+    Maintained from Reservation changes (see reservations.analytics) so
+    reports never expand stays night by night at query time.
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'در انتظار'),
+        ('confirmed', 'تایید شده'),
+    ]
+    
+    accommodation = models.ForeignKey(Accommodation, on_delete=models.CASCADE, related_name='daily_stats', verbose_name="اقامتگاه")
+    date = models.DateField(verbose_name="تاریخ")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, verbose_name="وضعیت")
+    booked = models.PositiveIntegerField(default=0, verbose_name="شب‌های رزرو شده")
+    revenue = models.DecimalField(max_digits=12, decimal_places=0, default=0, verbose_name="درآمد (تومان)")
+    
+    class Meta:
+        verbose_name = "آمار روزانه"
+        verbose_name_plural = "آمار روزانه"
+        ordering = ['date', 'accommodation']
+        constraints = [
+            models.UniqueConstraint(fields=['accommodation', 'date', 'status'], name='daily_stats_unique_night'),
+        ]
+        indexes = [
+            # Report ranges across all accommodations
+            models.Index(fields=['date', 'status'], name='daily_stats_date_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.accommodation_id} - {self.date} - {self.status}"
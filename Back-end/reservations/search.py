@@ -0,0 +1,193 @@
+"""
+Admin reservation search over normalized, indexed columns.
+
+Every reservation stores normalized copies of what support staff search on
+(see Reservation.save): `contact_phone_digits` (ASCII digits only, +98/0098
+rewritten to 0), `contact_email_normalized` (lowercased) and `search_text`
+(username, accommodation title, e-mail and phone digits, normalized with
+normalize_text, one per line).
+
+A search term is resolved in this order:
+
+1. `#123` or a digits-only term: reservation id or phone number prefix,
+   both index lookups;
+2. a full e-mail address: exact match on the e-mail column;
+3. otherwise, or when 1-2 find nothing: substring match on `search_text`.
+   On PostgreSQL a pg_trgm GIN index serves the LIKE directly. Elsewhere
+   the ReservationSearchGram trigram table is probed for the term's rarest
+   trigram and only reservations containing it are compared; when every
+   trigram is common, a single-table scan of `search_text` is cheaper.
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Reservation, ReservationSearchGram
+
+GRAM_SIZE = 3
+# Grams of a term whose frequency is checked, and the count above which a gram is too common to help
+MAX_GRAM_PROBES = 6
+MAX_GRAM_POSTINGS = 2000
+# Arabic letters commonly typed for their Persian counterparts
+PERSIAN_LETTERS = str.maketrans({'ي': 'ی', 'ى': 'ی', 'ك': 'ک'})
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+def _ascii_digits(value):
+    return ''.join(str(unicodedata.digit(ch)) if ch.isdigit() else ch for ch in value)
+
+
+def normalize_text(value):
+    """Casefolded text with ASCII digits, Persian letters and single spaces"""
+    return ' '.join(_ascii_digits(value or '').translate(PERSIAN_LETTERS).casefold().split())
+
+
+def normalize_phone(value):
+    """Digits of a phone number in national format (0912...)"""
+    digits = ''.join(ch for ch in _ascii_digits(value or '') if ch.isdigit())
+    if digits.startswith('0098'):
+        return '0' + digits[4:]
+    if digits.startswith('98') and len(digits) == 12:
+        return '0' + digits[2:]
+    return digits
+
+
+def normalize_email(value):
+    return (value or '').strip().lower()
+
+
+def build_search_text(username, title, email, phone):
+    return '\n'.join([normalize_text(username), normalize_text(title), normalize_email(email), normalize_phone(phone)])
+
+
+def search_grams(text):
+    """Distinct trigrams of each line of `text` (none span two fields)"""
+    return {
+        line[i:i + GRAM_SIZE]
+        for line in text.split('\n')
+        for i in range(len(line) - GRAM_SIZE + 1)
+    }
+
+
+def uses_pg_trgm():
+    """PostgreSQL searches search_text through its pg_trgm index instead of the gram table"""
+    return connection.vendor == 'postgresql'
+
+
+def sync_search_grams(reservations):
+    """Replace the trigram rows of the given saved reservations"""
+    if uses_pg_trgm() or not reservations:
+        return
+    with transaction.atomic():
+        ReservationSearchGram.objects.filter(reservation__in=[r.id for r in reservations]).delete()
+        ReservationSearchGram.objects.bulk_create([
+            ReservationSearchGram(reservation_id=reservation.id, gram=gram)
+            for reservation in reservations
+            for gram in search_grams(reservation.search_text)
+        ], batch_size=settings.SEARCH_INDEX_CHUNK_SIZE)
+
+
+def reindex_reservations(queryset=None, chunk_size=None, on_progress=None):
+    """
+    Recompute the search columns (and trigrams) of `queryset` (default: all
+    reservations) in chunks; returns the number of reservations indexed
+    """
+    chunk_size = chunk_size or settings.SEARCH_INDEX_CHUNK_SIZE
+    queryset = Reservation.objects.all() if queryset is None else queryset
+    rows = queryset.order_by('id').values_list(
+        'id', 'user__username', 'accommodation__title', 'contact_email', 'contact_phone',
+    ).iterator(chunk_size=chunk_size)
+
+    indexed = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            indexed += _reindex_chunk(chunk)
+            chunk = []
+            if on_progress:
+                on_progress(indexed)
+    if chunk:
+        indexed += _reindex_chunk(chunk)
+    return indexed
+
+
+def _reindex_chunk(rows):
+    reservations = [
+        Reservation(
+            id=reservation_id,
+            contact_phone_digits=normalize_phone(phone),
+            contact_email_normalized=normalize_email(email),
+            search_text=build_search_text(username, title, email, phone),
+        )
+        for reservation_id, username, title, email, phone in rows
+    ]
+    with transaction.atomic():
+        Reservation.objects.bulk_update(
+            reservations, ['contact_phone_digits', 'contact_email_normalized', 'search_text'],
+        )
+        sync_search_grams(reservations)
+    return len(reservations)
+
+
+def _digit_prefix(field, prefix):
+    """Q for values of a digits-only column starting with `prefix`, as an index range"""
+    query = Q(**{f'{field}__gte': prefix})
+    head = prefix.rstrip('9')
+    if head:
+        query &= Q(**{f'{field}__lt': head[:-1] + str(int(head[-1]) + 1)})
+    return query
+
+
+def _rarest_gram(grams):
+    """
+    (gram, postings) for the gram of `grams` with the fewest reservations,
+    counting at most MAX_GRAM_POSTINGS per gram; stops at a gram nobody has
+    """
+    rarest = None
+    spread = sorted(grams)[::max(1, len(grams) // MAX_GRAM_PROBES)][:MAX_GRAM_PROBES]
+    for gram in spread:
+        postings = ReservationSearchGram.objects.filter(gram=gram)[:MAX_GRAM_POSTINGS].count()
+        if rarest is None or postings < rarest[1]:
+            rarest = (gram, postings)
+        if postings == 0:
+            break
+    return rarest
+
+
+def _text_search(queryset, term):
+    if uses_pg_trgm() or len(term) < GRAM_SIZE:
+        return queryset.filter(search_text__contains=term)
+    gram, postings = _rarest_gram(search_grams(term))
+    if postings == 0:
+        return queryset.none()
+    if postings >= MAX_GRAM_POSTINGS:
+        # Every gram is common: one scan of search_text beats walking the postings
+        return queryset.filter(search_text__contains=term)
+    candidates = ReservationSearchGram.objects.filter(gram=gram).values('reservation_id')
+    return queryset.filter(id__in=candidates, search_text__contains=term)
+
+
+def search_reservations(queryset, term):
+    """Filter `queryset` to reservations matching the staff search `term`"""
+    text = normalize_text(term)
+    if not text:
+        return queryset
+
+    point = None
+    digits = text.lstrip('#').replace(' ', '').replace('-', '')
+    if digits.lstrip('+').isdigit():
+        point = _digit_prefix('contact_phone_digits', normalize_phone(digits))
+        if len(digits) < 10:
+            point |= Q(id=int(digits.lstrip('+')))
+    elif EMAIL_PATTERN.match(text):
+        point = Q(contact_email_normalized=normalize_email(term))
+
+    if point is not None:
+        matches = queryset.filter(point)
+        if matches.exists():
+            return matches
+    return _text_search(queryset, text)
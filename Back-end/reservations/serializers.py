@@ -1,9 +1,10 @@
 from rest_framework import serializers
 from .models import Reservation
 from accommodations.serializers import AccommodationListSerializer
+from hotel_backend.serializers import SparseFieldsetMixin
 
 
-class ReservationListSerializer(serializers.ModelSerializer):
+class ReservationListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for reservation list view"""
     accommodation_title = serializers.CharField(source='accommodation.title', read_only=True)
     accommodation = AccommodationListSerializer(read_only=True)
@@ -17,9 +18,51 @@ class ReservationListSerializer(serializers.ModelSerializer):
             'check_out_date', 'number_of_guests', 'nights', 'total_price', 
             'status', 'contact_phone', 'contact_email', 'created_at'
         ]
+        select_related_fields = {
+            'accommodation': ['accommodation'],
+            'accommodation_title': ['accommodation'],
+        }
 
 
-class ReservationSerializer(serializers.ModelSerializer):
+class AdminReservationListSerializer(SparseFieldsetMixin, serializers.Serializer):
+    """
+    Admin reservation list row, read from `values()` dicts rather than model
+    instances: the accommodation and guest summaries come from the same
+    joined query, with no nested serializers or image URLs.
+    """
+    id = serializers.IntegerField(read_only=True)
+    accommodation = serializers.IntegerField(source='accommodation_id', read_only=True)
+    accommodation_title = serializers.CharField(source='accommodation__title', read_only=True)
+    accommodation_city = serializers.CharField(source='accommodation__city', read_only=True)
+    user = serializers.IntegerField(source='user_id', read_only=True)
+    username = serializers.CharField(source='user__username', read_only=True)
+    check_in_date = serializers.DateField(read_only=True)
+    check_out_date = serializers.DateField(read_only=True)
+    number_of_guests = serializers.IntegerField(read_only=True)
+    nights = serializers.SerializerMethodField()
+    total_price = serializers.DecimalField(max_digits=12, decimal_places=0, coerce_to_string=True, read_only=True)
+    status = serializers.CharField(read_only=True)
+    contact_phone = serializers.CharField(read_only=True)
+    contact_email = serializers.CharField(read_only=True)
+    created_at = serializers.DateTimeField(read_only=True)
+    
+    # values() columns of fields that are not read from their own source
+    COLUMNS = {
+        'nights': ['check_in_date', 'check_out_date'],
+    }
+    
+    def value_columns(self):
+        """The values() columns the (possibly sparse) field set reads"""
+        columns = []
+        for name, field in self.fields.items():
+            columns += self.COLUMNS.get(name, [field.source])
+        return list(dict.fromkeys(columns))
+    
+    def get_nights(self, obj):
+        return (obj['check_out_date'] - obj['check_in_date']).days
+
+
+class ReservationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for reservation detail and CRUD operations"""
     accommodation_title = serializers.CharField(source='accommodation.title', read_only=True)
     accommodation_detail = AccommodationListSerializer(source='accommodation', read_only=True)
@@ -38,6 +81,11 @@ class ReservationSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'accommodation_title', 'accommodation_detail', 'total_price', 'price_breakdown']
+        select_related_fields = {
+            'accommodation_title': ['accommodation'],
+            'accommodation_detail': ['accommodation'],
+            'price_breakdown': ['accommodation'],
+        }
     
     def get_price_breakdown(self, obj):
         """Get detailed price breakdown per day"""
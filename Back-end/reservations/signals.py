@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from accommodations.models import Accommodation
+from jobs.queue import enqueue
+from .models import Reservation
+
+ACCOMMODATION, CHECK_IN, CHECK_OUT = 0, 1, 2
+
+
+def schedule_stats_refresh(*stays):
+    """
+    Enqueue one DailyStats refresh per accommodation covering the nights of
+    the given stats snapshots (see Reservation.stats_snapshot)
+    """
+    ranges = {}
+    for stay in stays:
+        if not stay or not stay[ACCOMMODATION] or not stay[CHECK_IN] or not stay[CHECK_OUT]:
+            continue
+        start, end = ranges.get(stay[ACCOMMODATION], (stay[CHECK_IN], stay[CHECK_OUT]))
+        ranges[stay[ACCOMMODATION]] = (min(start, stay[CHECK_IN]), max(end, stay[CHECK_OUT]))
+    for accommodation_id, (start, end) in ranges.items():
+        if start < end:
+            enqueue('reservations.refresh_daily_stats', {
+                'accommodation_id': accommodation_id,
+                'start_date': start.isoformat(),
+                'end_date': end.isoformat(),
+            })
+
+
+@receiver(post_save, sender=Reservation)
+def reservation_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, '_loaded_stats', None)
+    current = instance.stats_snapshot()
+    if current != loaded:
+        schedule_stats_refresh(loaded, current)
+        instance._loaded_stats = current
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_deleted(sender, instance, **kwargs):
+    schedule_stats_refresh(getattr(instance, '_loaded_stats', None), instance.stats_snapshot())
+
+
+# Attribute holding the loaded value of the field reservations index (see post_init below)
+LOADED_NAME = '_search_loaded_name'
+SEARCH_NAME_FIELDS = {User: 'username', Accommodation: 'title'}
+
+
+@receiver(post_init, sender=User)
+@receiver(post_init, sender=Accommodation)
+def remember_search_name(sender, instance, **kwargs):
+    # __dict__: a deferred field is not loaded (and not saved unless assigned)
+    setattr(instance, LOADED_NAME, instance.__dict__.get(SEARCH_NAME_FIELDS[sender]))
+
+
+def _renamed(instance, created, update_fields, field):
+    """Whether a save changed `field` from the value loaded (or last saved)"""
+    if update_fields is not None and field not in update_fields:
+        return False
+    current = instance.__dict__.get(field)
+    loaded = getattr(instance, LOADED_NAME, None)
+    setattr(instance, LOADED_NAME, current)
+    return not created and loaded != current
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    # Profile syncs on SSO login save the whole user; only a new username needs a reindex
+    if not raw and _renamed(instance, created, update_fields, 'username'):
+        enqueue('reservations.reindex_search', {'user_id': instance.id})
+
+
+@receiver(post_save, sender=Accommodation)
+def accommodation_saved(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if not raw and _renamed(instance, created, update_fields, 'title'):
+        enqueue('reservations.reindex_search', {'accommodation_id': instance.id})
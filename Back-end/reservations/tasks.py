@@ -0,0 +1,104 @@
+"""
+Background tasks for reservations (run by `manage.py run_workers`).
+"""
+from datetime import date, timedelta
+from django.db import transaction
+from django.utils import timezone
+from jobs.queue import task
+from accommodations.models import Accommodation, RoomAvailability
+from .models import Reservation
+from . import analytics, search
+
+
+def _upsert_statuses(accommodation_id, statuses):
+    """Write {date: status} for one accommodation in a single upsert"""
+    now = timezone.now()
+    entries = [
+        RoomAvailability(accommodation_id=accommodation_id, date=day, status=day_status, updated_at=now)
+        for day, day_status in statuses.items()
+    ]
+    with transaction.atomic():
+        RoomAvailability.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['accommodation', 'date'],
+            update_fields=['status', 'updated_at'],
+        )
+
+
+def _nights(check_in_date, check_out_date):
+    current_date = check_in_date
+    while current_date < check_out_date:
+        yield current_date
+        current_date += timedelta(days=1)
+
+
+def _sync_nights(accommodation_id, check_in_date, check_out_date):
+    """
+    Set every night of [check_in_date, check_out_date) to 'reserved' when a
+    pending or confirmed reservation holds it now, else to 'available'.
+
+    Book and release jobs for the same nights can run concurrently and
+    finish in any order, so statuses come from the reservations that exist
+    when the job runs, never from its payload. Locking the accommodation
+    row serializes the jobs of one accommodation, so each one reads the
+    reservations committed before it.
+    """
+    check_in_date = date.fromisoformat(check_in_date)
+    check_out_date = date.fromisoformat(check_out_date)
+    with transaction.atomic():
+        list(Accommodation.objects.select_for_update().filter(id=accommodation_id).values_list('id'))
+        # One overlap query instead of one per night
+        held_ranges = list(Reservation.objects.filter(
+            accommodation_id=accommodation_id,
+            status__in=['pending', 'confirmed'],
+            check_in_date__lt=check_out_date,
+            check_out_date__gt=check_in_date
+        ).values_list('check_in_date', 'check_out_date'))
+
+        statuses = {}
+        for night in _nights(check_in_date, check_out_date):
+            is_held = any(start <= night < end for start, end in held_ranges)
+            statuses[night] = 'reserved' if is_held else 'available'
+        if statuses:
+            _upsert_statuses(accommodation_id, statuses)
+    return {'nights': len(statuses)}
+
+
+@task('reservations.update_availability_status')
+def update_availability_status(job, accommodation_id, check_in_date, check_out_date, status=None):
+    """
+    Mark the nights of a booked stay reserved (see _sync_nights); `status`
+    is ignored and only accepted from jobs queued by earlier releases
+    """
+    return _sync_nights(accommodation_id, check_in_date, check_out_date)
+
+
+@task('reservations.release_dates')
+def release_dates(job, accommodation_id, check_in_date, check_out_date, exclude_reservation_id=None):
+    """
+    Release dates back to available status unless a reservation still holds
+    them (see _sync_nights); `exclude_reservation_id` is ignored and only
+    accepted from jobs queued by earlier releases
+    """
+    return _sync_nights(accommodation_id, check_in_date, check_out_date)
+
+
+@task('reservations.refresh_daily_stats')
+def refresh_daily_stats(job, accommodation_id, start_date, end_date):
+    """Recompute the analytics rollup for the nights a reservation change touched"""
+    written = analytics.refresh_daily_stats(
+        accommodation_id, date.fromisoformat(start_date), date.fromisoformat(end_date),
+    )
+    return {'rows': written}
+
+
+@task('reservations.reindex_search')
+def reindex_search(job, user_id=None, accommodation_id=None):
+    """Refresh the search columns of reservations after a username or accommodation title change"""
+    reservations = Reservation.objects.all()
+    if user_id:
+        reservations = reservations.filter(user_id=user_id)
+    if accommodation_id:
+        reservations = reservations.filter(accommodation_id=accommodation_id)
+    return {'reservations': search.reindex_reservations(reservations)}
@@ -1,3 +1,596 @@
-from django.test import TestCase
+"""
+Tests for reservation indexes, the query-plan audit, streaming exports,
+the occupancy analytics rollup, admin search and availability jobs.
+"""
+import csv
+import io
+import json
+import tracemalloc
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accommodations.models import Accommodation, Amenity, RoomAvailability
+from accounts.admin_tokens import create_admin_access_token
+from accounts.tokens import get_tokens_for_user
+from jobs.models import Job
+from jobs.queue import claim_job, execute_job
+from reservations.management.commands.audit_query_plans import full_scans, sorts_without_index
+from reservations.analytics import night_revenue, occupancy_report
+from reservations.models import DailyStats, Reservation, ReservationSearchGram
+from reservations.search import normalize_phone, normalize_text, search_reservations
 
-# Create your tests here.
+AUDIT = 'reservations.management.commands.audit_query_plans'
+
+
+class QueryPlanAuditTest(TestCase):
+    """Test EXPLAIN parsing and that the key queries use indexes."""
+
+    def test_detects_full_scans(self):
+        sqlite_plan = (
+            '4 0 0 SCAN reservations_reservation\n'
+            '5 0 0 SCAN accommodations_accommodation USING INDEX x_idx\n'
+            '6 0 0 SEARCH reservations_reservation USING INDEX reservation_user_created_idx (user_id=?)'
+        )
+        self.assertEqual(full_scans(sqlite_plan, 'sqlite'), ['reservations_reservation'])
+        self.assertEqual(
+            full_scans('Limit\n  ->  Seq Scan on reservations_reservation  (cost=0.00..1.10 rows=1)', 'postgresql'),
+            ['reservations_reservation'],
+        )
+        self.assertEqual(full_scans('Index Scan using reservation_created_idx on reservations_reservation', 'postgresql'), [])
+        self.assertTrue(sorts_without_index('26 0 0 USE TEMP B-TREE FOR ORDER BY', 'sqlite'))
+
+    def test_key_queries_use_indexes(self):
+        out = StringIO()
+        call_command('audit_query_plans', '--fail-on-scan', stdout=out)
+        self.assertNotIn('SCAN ', out.getvalue())
+        self.assertNotIn('SORT ', out.getvalue())
+
+    def test_fail_on_scan(self):
+        unindexed = [('guests', Reservation.objects.filter(number_of_guests=2).order_by())]
+        with patch(f'{AUDIT}.key_queries', return_value=unindexed):
+            with self.assertRaises(CommandError):
+                call_command('audit_query_plans', '--fail-on-scan', stdout=StringIO())
+
+
+class ExportTest(TestCase):
+    """Test streaming CSV/NDJSON exports of reservations and availability."""
+
+    def setUp(self):
+        self.accommodation = Accommodation.objects.create(
+            title='اتاق آزمایشی', city='Tehran', province='Tehran', address='-', description='-',
+            capacity=4, beds_description='1 double', area=40, price_per_night=1000000,
+            main_image='accommodations/test.jpg'
+        )
+        self.guest = User.objects.create_user(username='guest', password='pass-1234')
+        admin = User.objects.create_user(username='admin', password='pass-1234', is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Admin {create_admin_access_token(admin)}')
+        self.today = timezone.localdate()
+
+    def create_reservations(self, count, status='pending'):
+        Reservation.objects.bulk_create([
+            Reservation(
+                user=self.guest, accommodation=self.accommodation, number_of_guests=2, status=status,
+                check_in_date=self.today + timedelta(days=i * 3), check_out_date=self.today + timedelta(days=i * 3 + 2),
+                total_price=2000000,
+            )
+            for i in range(count)
+        ])
+
+    def read(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode('utf-8-sig')
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_reservation_csv(self):
+        self.create_reservations(5)
+        response, body = self.read('/api/admin/reservations/export/csv/')
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertIn('attachment; filename="reservations-', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['username'], 'guest')
+        self.assertEqual(rows[0]['accommodation_title'], 'اتاق آزمایشی')
+        self.assertEqual(rows[0]['contact_phone'], '')
+
+    def test_reservation_ndjson_uses_list_filters(self):
+        self.create_reservations(3)
+        self.create_reservations(2, status='cancelled')
+        response, body = self.read('/api/admin/reservations/export/ndjson/?status=cancelled')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['status'] for row in rows], ['cancelled', 'cancelled'])
+        self.assertEqual(rows[0]['total_price'], '2000000')
+
+    def test_availability_export(self):
+        RoomAvailability.objects.bulk_create([
+            RoomAvailability(accommodation=self.accommodation, date=self.today + timedelta(days=i), status='available')
+            for i in range(10)
+        ])
+        end = (self.today + timedelta(days=3)).isoformat()
+        _, body = self.read(f'/api/admin/room-availability/export/ndjson/?accommodation={self.accommodation.id}&end_date={end}')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['date'] for row in rows], [(self.today + timedelta(days=i)).isoformat() for i in range(4)])
+
+    def test_requires_admin(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/admin/reservations/export/csv/').status_code, 403)
+
+    def export_peak_memory(self):
+        tracemalloc.start()
+        try:
+            response = self.client.get('/api/admin/reservations/export/ndjson/')
+            for _ in response.streaming_content:
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    @override_settings(EXPORT_CHUNK_SIZE=100)
+    def test_memory_does_not_grow_with_rows(self):
+        self.create_reservations(200)
+        small = self.export_peak_memory()
+        self.create_reservations(2000)
+        large = self.export_peak_memory()
+        self.assertLess(large, small * 2)
+
+
+class AnalyticsTest(TestCase):
+    """Test the DailyStats rollup, its rebuild command and the analytics endpoint."""
+
+    def setUp(self):
+        def accommodation(title, city, province):
+            return Accommodation.objects.create(
+                title=title, city=city, province=province, address='-', description='-',
+                capacity=4, beds_description='1 double', area=40, price_per_night=1000000,
+                main_image='accommodations/test.jpg'
+            )
+        self.tehran_a = accommodation('Tehran A', 'Tehran', 'Tehran')
+        self.tehran_b = accommodation('Tehran B', 'Tehran', 'Tehran')
+        self.shiraz = accommodation('Shiraz', 'Shiraz', 'Fars')
+        self.guest = User.objects.create_user(username='guest', password='pass-1234')
+        admin = User.objects.create_user(username='admin', password='pass-1234', is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Admin {create_admin_access_token(admin)}')
+        self.start = timezone.localdate() + timedelta(days=10)
+
+    def stay(self, accommodation, offset, nights, total_price, status='confirmed'):
+        return Reservation(
+            user=self.guest, accommodation=accommodation, number_of_guests=2, status=status,
+            check_in_date=self.start + timedelta(days=offset),
+            check_out_date=self.start + timedelta(days=offset + nights),
+            total_price=total_price,
+        )
+
+    def stats(self):
+        return {
+            (row.accommodation_id, (row.date - self.start).days, row.status): (row.booked, int(row.revenue))
+            for row in DailyStats.objects.all()
+        }
+
+    def test_night_revenue_adds_up(self):
+        nights = list(night_revenue(self.start, self.start + timedelta(days=3), 1000001))
+        self.assertEqual([revenue for _, revenue in nights], [333335, 333333, 333333])
+        self.assertEqual(list(night_revenue(self.start, self.start, 100)), [])
+
+    @override_settings(JOBS_ALWAYS_EAGER=True)
+    def test_rollup_follows_reservation_changes(self):
+        reservation = self.stay(self.tehran_a, 0, 2, 3000000, status='pending')
+        reservation.save()
+        self.assertEqual(self.stats(), {
+            (self.tehran_a.id, 0, 'pending'): (1, 1500000),
+            (self.tehran_a.id, 1, 'pending'): (1, 1500000),
+        })
+
+        reservation = Reservation.objects.get(id=reservation.id)
+        reservation.status = 'confirmed'
+        reservation.check_in_date += timedelta(days=1)
+        reservation.check_out_date += timedelta(days=1)
+        reservation.save()
+        self.assertEqual(self.stats(), {
+            (self.tehran_a.id, 1, 'confirmed'): (1, 1500000),
+            (self.tehran_a.id, 2, 'confirmed'): (1, 1500000),
+        })
+
+        reservation.status = 'cancelled'
+        reservation.save()
+        self.assertEqual(self.stats(), {})
+
+        reservation.status = 'confirmed'
+        reservation.save()
+        Reservation.objects.get(id=reservation.id).delete()
+        self.assertEqual(self.stats(), {})
+
+    def test_unchanged_save_enqueues_nothing(self):
+        reservation = self.stay(self.tehran_a, 0, 2, 3000000)
+        reservation.save()
+        reservation = Reservation.objects.get(id=reservation.id)
+        with patch('reservations.signals.enqueue') as enqueue:
+            reservation.number_of_guests = 3
+            reservation.save()
+        enqueue.assert_not_called()
+
+    def test_rebuild_command(self):
+        Reservation.objects.bulk_create([
+            self.stay(self.tehran_a, 0, 3, 3000000),
+            self.stay(self.tehran_a, 5, 1, 900000, status='pending'),
+            self.stay(self.shiraz, 1, 2, 2000000),
+            self.stay(self.shiraz, 4, 2, 2000000, status='cancelled'),
+        ])
+        call_command('rebuild_daily_stats', '--chunk-size', '1', stdout=StringIO())
+        expected = {
+            (self.tehran_a.id, 0, 'confirmed'): (1, 1000000),
+            (self.tehran_a.id, 1, 'confirmed'): (1, 1000000),
+            (self.tehran_a.id, 2, 'confirmed'): (1, 1000000),
+            (self.tehran_a.id, 5, 'pending'): (1, 900000),
+            (self.shiraz.id, 1, 'confirmed'): (1, 1000000),
+            (self.shiraz.id, 2, 'confirmed'): (1, 1000000),
+        }
+        self.assertEqual(self.stats(), expected)
+
+        # A ranged rebuild only replaces nights inside the range
+        DailyStats.objects.filter(date=self.start).update(booked=9)
+        DailyStats.objects.filter(date=self.start + timedelta(days=2)).update(booked=9)
+        call_command(
+            'rebuild_daily_stats', '--start', (self.start + timedelta(days=1)).isoformat(),
+            '--end', (self.start + timedelta(days=3)).isoformat(), stdout=StringIO(),
+        )
+        expected[self.tehran_a.id, 0, 'confirmed'] = (9, 1000000)
+        self.assertEqual(self.stats(), expected)
+
+    def test_report(self):
+        Reservation.objects.bulk_create([
+            self.stay(self.tehran_a, 0, 4, 4000000),
+            self.stay(self.tehran_b, 2, 2, 3000000),
+            self.stay(self.tehran_b, 6, 2, 1000000, status='pending'),
+            self.stay(self.shiraz, 0, 1, 500000),
+        ])
+        call_command('rebuild_daily_stats', stdout=StringIO())
+        end = self.start + timedelta(days=10)
+
+        with self.assertNumQueries(2):
+            report = occupancy_report(self.start, end, group_by='city')
+        by_city = {row['city']: row for row in report['results']}
+        self.assertEqual(by_city['Tehran']['available_nights'], 20)
+        self.assertEqual(by_city['Tehran']['booked_nights'], 6)
+        self.assertEqual(by_city['Tehran']['revenue'], 7000000)
+        self.assertEqual(by_city['Tehran']['occupancy_rate'], 0.3)
+        self.assertEqual(by_city['Tehran']['adr'], round(7000000 / 6, 2))
+        self.assertEqual(by_city['Tehran']['revpar'], 350000)
+        self.assertEqual(by_city['Shiraz']['booked_nights'], 1)
+        self.assertEqual(report['totals']['available_nights'], 30)
+        self.assertEqual(report['totals']['booked_nights'], 7)
+
+        response = self.client.get('/api/admin/analytics/', {
+            'start_date': self.start.isoformat(), 'end_date': end.isoformat(), 'group_by': 'accommodation',
+            'interval': 'day', 'status': 'confirmed,pending', 'city': 'Tehran',
+        })
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()['results']
+        self.assertEqual(len(rows), 20)
+        self.assertEqual({row['accommodation'] for row in rows}, {self.tehran_a.id, self.tehran_b.id})
+        day_six = next(row for row in rows if row['accommodation'] == self.tehran_b.id
+                       and row['period'] == (self.start + timedelta(days=6)).isoformat())
+        self.assertEqual((day_six['booked_nights'], day_six['revenue']), (1, 500000))
+        self.assertEqual(response.json()['totals']['booked_nights'], 8)
+
+        response = self.client.get('/api/admin/analytics/', {
+            'start_date': self.start.isoformat(), 'end_date': end.isoformat(), 'group_by': 'province',
+            'interval': 'month',
+        })
+        self.assertEqual(response.status_code, 200)
+        months = response.json()['results']
+        self.assertEqual(sum(row['booked_nights'] for row in months), 7)
+        self.assertEqual(sum(row['available_nights'] for row in months), 30)
+
+    def test_invalid_parameters(self):
+        for params in [
+            {},
+            {'start_date': '2026-02-01', 'end_date': '2026-01-01'},
+            {'start_date': '2026-01-01', 'end_date': '2026-02-01', 'group_by': 'country'},
+            {'start_date': '2026-01-01', 'end_date': '2026-02-01', 'interval': 'week'},
+            {'start_date': '2026-01-01', 'end_date': '2026-02-01', 'status': 'cancelled'},
+            {'start_date': '2020-01-01', 'end_date': '2026-01-01', 'interval': 'day'},
+        ]:
+            self.assertEqual(self.client.get('/api/admin/analytics/', params).status_code, 400, params)
+
+
+class ReservationSearchTest(TestCase):
+    """Test the normalized search columns and the admin reservation search."""
+
+    def setUp(self):
+        self.hotel = Accommodation.objects.create(
+            title='هتل كوير يزد', city='Yazd', province='Yazd', address='-', description='-',
+            capacity=4, beds_description='1 double', area=40, price_per_night=1000000,
+            main_image='accommodations/test.jpg'
+        )
+        self.ali = User.objects.create_user(username='ali1365', password='pass-1234')
+        self.sara = User.objects.create_user(username='Sara.K', password='pass-1234')
+        admin = User.objects.create_user(username='admin', password='pass-1234', is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Admin {create_admin_access_token(admin)}')
+        self.start = timezone.localdate() + timedelta(days=10)
+        self.ali_stay = self.reserve(self.ali, 0, phone='+98 912 123 4567', email='Ali@Example.com')
+        self.sara_stay = self.reserve(self.sara, 3, phone='۰۹۳۵۷۶۵۴۳۲۱', email='sara@example.org')
+
+    def reserve(self, user, offset, phone=None, email=None):
+        reservation = Reservation(
+            user=user, accommodation=self.hotel, number_of_guests=2,
+            check_in_date=self.start + timedelta(days=offset),
+            check_out_date=self.start + timedelta(days=offset + 2),
+            contact_phone=phone, contact_email=email,
+        )
+        reservation.save()
+        return reservation
+
+    def search(self, term):
+        return set(search_reservations(Reservation.objects.all(), term).values_list('id', flat=True))
+
+    def test_normalization(self):
+        self.assertEqual(normalize_phone('+98 912 123 4567'), '09121234567')
+        self.assertEqual(normalize_phone('0098-912-1234567'), '09121234567')
+        self.assertEqual(normalize_phone('۰۹۳۵ ۷۶۵ ۴۳۲۱'), '09357654321')
+        self.assertEqual(normalize_text('  هتل  كوير\tيزد '), 'هتل کویر یزد')
+        self.assertEqual(self.ali_stay.contact_phone_digits, '09121234567')
+        self.assertEqual(self.ali_stay.contact_email_normalized, 'ali@example.com')
+
+    def test_point_lookups(self):
+        self.assertEqual(self.search(f'#{self.sara_stay.id}'), {self.sara_stay.id})
+        self.assertEqual(self.search('0912 123'), {self.ali_stay.id})
+        self.assertEqual(self.search('+989121234567'), {self.ali_stay.id})
+        self.assertEqual(self.search('۰۹۳۵۷'), {self.sara_stay.id})
+        self.assertEqual(self.search('09'), {self.ali_stay.id, self.sara_stay.id})
+        self.assertEqual(self.search('SARA@example.org'), {self.sara_stay.id})
+
+    def test_text_search(self):
+        self.assertEqual(self.search('sara.k'), {self.sara_stay.id})
+        # Digits that match no id or phone fall back to the text search
+        self.assertEqual(self.search('1365'), {self.ali_stay.id})
+        # Arabic and Persian forms of the same letters match
+        self.assertEqual(self.search('کویر'), {self.ali_stay.id, self.sara_stay.id})
+        self.assertEqual(self.search('example.org'), {self.sara_stay.id})
+        self.assertEqual(self.search('li'), {self.ali_stay.id})
+        self.assertEqual(self.search('kavir'), set())
+
+    def test_index_follows_changes(self):
+        reservation = Reservation.objects.get(id=self.sara_stay.id)
+        reservation.contact_email = 'new@example.net'
+        reservation.save()
+        self.assertEqual(self.search('example.org'), set())
+        self.assertEqual(self.search('example.net'), {self.sara_stay.id})
+        self.assertFalse(ReservationSearchGram.objects.filter(reservation=reservation, gram='org').exists())
+
+        with self.settings(JOBS_ALWAYS_EAGER=True):
+            self.ali.username = 'ali.rezaei'
+            self.ali.save()
+            self.hotel.title = 'Desert Inn'
+            self.hotel.save()
+        self.assertEqual(self.search('rezaei'), {self.ali_stay.id})
+        self.assertEqual(self.search('desert'), {self.ali_stay.id, self.sara_stay.id})
+
+    @override_settings(JOBS_ALWAYS_EAGER=False)
+    def test_reindex_only_on_rename(self):
+        user = User.objects.get(id=self.ali.id)
+        user.first_name = 'Ali'
+        user.save()
+        hotel = Accommodation.objects.get(id=self.hotel.id)
+        hotel.price_per_night = 2000000
+        hotel.description = 'Renovated'
+        hotel.save()
+        self.assertFalse(Job.objects.filter(name='reservations.reindex_search').exists())
+
+        hotel.title = 'Renamed'
+        hotel.save()
+        hotel.save()
+        self.assertEqual(
+            list(Job.objects.filter(name='reservations.reindex_search').values_list('payload', flat=True)),
+            [{'accommodation_id': hotel.id}],
+        )
+
+    def test_reindex_command(self):
+        Reservation.objects.bulk_create([Reservation(
+            user=self.sara, accommodation=self.hotel, number_of_guests=1, contact_phone='09120000000',
+            check_in_date=self.start + timedelta(days=20), check_out_date=self.start + timedelta(days=21),
+        )])
+        self.assertEqual(self.search('0912000'), set())
+        call_command('reindex_reservation_search', '--chunk-size', '2', stdout=StringIO())
+        self.assertEqual(len(self.search('0912000')), 1)
+        self.assertEqual(len(self.search('sara')), 2)
+
+    def test_admin_search(self):
+        response = self.client.get('/api/admin/reservations/', {'search': 'ali1365'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        results = data['results'] if isinstance(data, dict) else data
+        self.assertEqual([row['id'] for row in results], [self.ali_stay.id])
+
+
+class AdminReservationListTest(TestCase):
+    """Test the lean admin reservation list and its sparse fieldsets."""
+
+    def setUp(self):
+        self.accommodation = Accommodation.objects.create(
+            title='اتاق آزمایشی', city='Tehran', province='Tehran', address='-', description='-',
+            capacity=4, beds_description='1 double', area=40, price_per_night=1000000,
+            main_image='accommodations/test.jpg'
+        )
+        self.guest = User.objects.create_user(username='guest', password='pass-1234')
+        admin = User.objects.create_user(username='admin', password='pass-1234', is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Admin {create_admin_access_token(admin)}')
+        today = timezone.localdate()
+        Reservation.objects.bulk_create([
+            Reservation(
+                user=self.guest, accommodation=self.accommodation, number_of_guests=2, status='confirmed',
+                check_in_date=today + timedelta(days=i * 3), check_out_date=today + timedelta(days=i * 3 + 2),
+                total_price=2000000, contact_phone='09120000000',
+            )
+            for i in range(5)
+        ])
+
+    def results(self, params=None):
+        response = self.client.get('/api/admin/reservations/', params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_flat_rows(self):
+        row = self.results()[0]
+        self.assertEqual(row['accommodation'], self.accommodation.id)
+        self.assertEqual(row['accommodation_title'], 'اتاق آزمایشی')
+        self.assertEqual(row['accommodation_city'], 'Tehran')
+        self.assertEqual(row['username'], 'guest')
+        self.assertEqual(row['nights'], 2)
+        self.assertEqual(row['total_price'], '2000000')
+
+    def test_sparse_fieldset(self):
+        rows = self.results({'fields': 'id,nights,status'})
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(set(rows[0]), {'id', 'nights', 'status'})
+        response = self.client.get('/api/admin/reservations/', {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json())
+
+    def test_single_joined_query(self):
+        self.results()
+        with CaptureQueriesContext(connection) as queries:
+            self.results()
+        count_query, page_query = [query['sql'] for query in queries.captured_queries]
+        self.assertNotIn('JOIN', count_query)
+        self.assertIn('accommodations_accommodation', page_query)
+        with CaptureQueriesContext(connection) as queries:
+            self.results({'fields': 'id,status'})
+        page_query = queries.captured_queries[-1]['sql']
+        self.assertNotIn('accommodations_accommodation', page_query)
+        self.assertNotIn('contact_phone', page_query)
+
+
+
+class ReservationSparseFieldsetTest(TestCase):
+    """Test ?fields/omit/expand on the guest reservation endpoints."""
+
+    def setUp(self):
+        self.accommodation = Accommodation.objects.create(
+            title='Sparse', city='Tehran', province='Tehran', address='-', description='-',
+            capacity=4, beds_description='1 double', area=40, price_per_night=1000000,
+            main_image='accommodations/test.jpg',
+        )
+        self.accommodation.amenities.add(Amenity.objects.create(name='Wi-Fi', category='general'))
+        self.guest = User.objects.create_user(username='guest', password='pass-1234')
+        today = timezone.localdate()
+        self.reservation = Reservation.objects.create(
+            user=self.guest, accommodation=self.accommodation, number_of_guests=2, status='confirmed',
+            check_in_date=today + timedelta(days=3), check_out_date=today + timedelta(days=5),
+            total_price=2000000,
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(self.guest).access_token}')
+
+    def get(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), [query['sql'] for query in queries.captured_queries]
+
+    def test_list_fields_skip_accommodation_join(self):
+        data, queries = self.get('/api/reservations/', {'fields': 'id,status,nights'})
+        self.assertEqual(data['results'][0], {'id': self.reservation.id, 'status': 'confirmed', 'nights': 2})
+        self.assertFalse(any('accommodations_accommodation' in sql for sql in queries))
+
+    def test_list_nested_fields_and_expand(self):
+        data, queries = self.get('/api/reservations/', {
+            'fields': 'id,accommodation.title,accommodation.amenities', 'expand': 'accommodation.amenities',
+        })
+        accommodation = data['results'][0]['accommodation']
+        self.assertEqual(set(accommodation), {'title', 'amenities'})
+        self.assertEqual(accommodation['amenities'][0]['name'], 'Wi-Fi')
+        self.assertFalse(any('accommodations_accommodationimage' in sql for sql in queries))
+
+        data, _ = self.get('/api/reservations/')
+        self.assertIn('images', data['results'][0]['accommodation'])
+        self.assertNotIn('amenities', data['results'][0]['accommodation'])
+
+    def test_detail_omit_price_breakdown(self):
+        url = f'/api/reservations/{self.reservation.id}/'
+        data, _ = self.get(url)
+        self.assertEqual(len(data['price_breakdown']), 2)
+        data, queries = self.get(url, {'omit': 'price_breakdown,accommodation_detail.images,accommodation_detail.image_srcsets'})
+        self.assertNotIn('price_breakdown', data)
+        self.assertNotIn('images', data['accommodation_detail'])
+        self.assertFalse(any('accommodations_roomavailability' in sql for sql in queries))
+        self.assertFalse(any('accommodations_accommodationimage' in sql for sql in queries))
+
+    def test_writes_ignore_fieldsets(self):
+        response = self.client.patch(
+            f'/api/reservations/{self.reservation.id}/?fields=id', {'number_of_guests': 3}, format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['number_of_guests'], 3)
+        self.assertIn('price_breakdown', response.json())
+
+
+@override_settings(JOBS_ALWAYS_EAGER=False)
+class AvailabilityJobOrderTest(TestCase):
+    """Test that availability jobs give the same calendar whatever order workers finish them in."""
+
+    def setUp(self):
+        self.accommodation = Accommodation.objects.create(
+            title='Jobs', city='Tehran', province='Tehran', address='-', description='-',
+            capacity=2, beds_description='1 double', area=30, price_per_night=1000000,
+        )
+        self.guest = User.objects.create_user(username='guest', password='pass-1234')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(self.guest).access_token}')
+        self.check_in = timezone.localdate() + timedelta(days=10)
+
+    def book(self, offset=0, nights=2):
+        response = self.client.post('/api/reservations/', {
+            'accommodation': self.accommodation.id,
+            'check_in_date': (self.check_in + timedelta(days=offset)).isoformat(),
+            'check_out_date': (self.check_in + timedelta(days=offset + nights)).isoformat(),
+            'number_of_guests': 1,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['id']
+
+    def run_jobs(self, *names):
+        for name in names:
+            for job in Job.objects.filter(name=name, status=Job.STATUS_QUEUED).order_by('id'):
+                self.assertTrue(claim_job(job.id, worker_id='test'))
+                job.refresh_from_db()
+                execute_job(job)
+
+    def statuses(self):
+        return dict(
+            RoomAvailability.objects.filter(accommodation=self.accommodation)
+            .order_by('date').values_list('date', 'status')
+        )
+
+    def test_release_before_book(self):
+        reservation_id = self.book()
+        response = self.client.patch(f'/api/reservations/{reservation_id}/', {'status': 'cancelled'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.run_jobs('reservations.release_dates', 'reservations.update_availability_status')
+        self.assertEqual(set(self.statuses().values()), {'available'})
+
+    def test_moved_stay_keeps_overlapping_nights(self):
+        reservation_id = self.book(0, 2)
+        response = self.client.patch(f'/api/reservations/{reservation_id}/', {
+            'check_in_date': (self.check_in + timedelta(days=1)).isoformat(),
+            'check_out_date': (self.check_in + timedelta(days=3)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+        # The release of the old nights finishes last and must keep the night the stay still holds
+        self.run_jobs('reservations.update_availability_status', 'reservations.release_dates')
+        self.assertEqual(list(self.statuses().values()), ['available', 'reserved', 'reserved'])
@@ -398,18 +398,7 @@ class UserSyncService:
             logger.info(f"Created new user for national_id: {national_id}")
         
         # Update user fields from Injast data
-        # Name fields are important - update them if available
-        if injast_data.get('email'):
-            user.email = injast_data.get('email')
-        if injast_data.get('first_name'):
-            user.first_name = injast_data.get('first_name')
-        elif user.first_name:  # Keep existing if new one not available
-            pass
-        if injast_data.get('last_name'):
-            user.last_name = injast_data.get('last_name')
-        elif user.last_name:  # Keep existing if new one not available
-            pass
-        user.save()
+        self._apply_profile(user, injast_data)
         
         # Update InjastUser fields
         injast_user.injast_access_token = access_token
@@ -421,4 +410,33 @@ class UserSyncService:
         
         logger.info(f"User synced successfully: {user.username} (national_id: {national_id})")
         return user
-
+    
+    def update_profile(self, injast_user: InjastUser, injast_data: Dict[str, Any]) -> User:
+        """
+        Refresh name/email of an already linked user from Injast data.
+        Used by the background profile sync when the callback could not
+        fetch user data inline.
+        """
+        user = injast_user.user
+        self._apply_profile(user, injast_data)
+        
+        if injast_data.get('mobile_number'):
+            injast_user.mobile_number = injast_data.get('mobile_number')
+        if injast_data.get('mobile_country_code'):
+            injast_user.mobile_country_code = injast_data.get('mobile_country_code')
+        injast_user.last_synced_at = timezone.now()
+        injast_user.save()
+        
+        logger.info(f"User profile refreshed: {user.username} (national_id: {injast_user.national_id})")
+        return user
+    
+    def _apply_profile(self, user: User, injast_data: Dict[str, Any]) -> None:
+        """Copy name/email fields onto the user, keeping existing values when missing."""
+        # Name fields are important - update them if available
+        if injast_data.get('email'):
+            user.email = injast_data.get('email')
+        if injast_data.get('first_name'):
+            user.first_name = injast_data.get('first_name')
+        if injast_data.get('last_name'):
+            user.last_name = injast_data.get('last_name')
+        user.save()
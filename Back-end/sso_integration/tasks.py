@@ -0,0 +1,26 @@
+"""
+Background tasks for Injast SSO integration (run by `manage.py run_workers`).
+"""
+import logging
+from jobs.queue import task
+from .models import InjastUser
+from .services import InjastAPIClient, UserSyncService
+
+logger = logging.getLogger(__name__)
+
+
+@task('sso_integration.sync_user_profile', max_attempts=5)
+def sync_user_profile(job, injast_user_id):
+    """
+    Fetch name/email from Injast for a user whose callback fell back to the
+    token payload. Failures raise so the queue retries with backoff.
+    """
+    injast_user = InjastUser.objects.select_related('user').get(id=injast_user_id)
+    
+    if injast_user.is_token_expired() or not injast_user.injast_access_token:
+        logger.warning(f"Skipping profile sync for {injast_user.national_id}: Injast token expired")
+        return {'synced': False, 'reason': 'token expired'}
+    
+    user_data = InjastAPIClient().get_user_basic(injast_user.injast_access_token)
+    user = UserSyncService().update_profile(injast_user, user_data)
+    return {'synced': True, 'user_id': user.id}
@@ -6,10 +6,11 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.tokens import get_tokens_for_user
 from .serializers import InjastCallbackSerializer, InjastUserSerializer
 from .services import InjastAPIClient, InjastTokenValidator, UserSyncService
 from .models import InjastUser
+from jobs.queue import enqueue
 
 logger = logging.getLogger(__name__)
 
@@ -63,37 +64,25 @@ def injast_callback_view(request):
         token_payload = token_validator.validate_token(access_token)
         
         # Step 3: Fetch user data from Injast (CRITICAL for name/email)
-        # Retry logic to ensure we get name information
+        # A single inline attempt; on failure the profile is synced by a
+        # background job with retries instead of sleeping in the request
         logger.info("Fetching user data from Injast (name is important)")
-        user_data = {}
-        max_retries = 3
-        retry_count = 0
-        
-        while retry_count < max_retries:
-            try:
-                user_data = api_client.get_user_basic(access_token)
-                # If we got data with name fields, break
-                if user_data.get('first_name') or user_data.get('last_name'):
-                    logger.info("Successfully fetched user data with name information")
-                    break
-                else:
-                    logger.warning("User data fetched but missing name fields")
-                    break
-            except Exception as e:
-                retry_count += 1
-                if retry_count < max_retries:
-                    logger.warning(f"Failed to fetch user data (attempt {retry_count}/{max_retries}): {e}")
-                    import time
-                    time.sleep(1)  # Wait 1 second before retry
-                else:
-                    logger.error(f"Failed to fetch user data after {max_retries} attempts: {e}")
-                    logger.warning("⚠️  WARNING: User name/email will not be available without API data")
-                    # Create minimal user_data from token payload
-                    user_data = {
-                        'national_id': token_payload.get('uid') or token_payload.get('nid'),
-                        'mobile_number': token_payload.get('mbn'),
-                        'mobile_country_code': token_payload.get('mbc'),
-                    }
+        profile_fetched = False
+        try:
+            user_data = api_client.get_user_basic(access_token)
+            profile_fetched = True
+            if user_data.get('first_name') or user_data.get('last_name'):
+                logger.info("Successfully fetched user data with name information")
+            else:
+                logger.warning("User data fetched but missing name fields")
+        except Exception as e:
+            logger.warning(f"Failed to fetch user data, scheduling background sync: {e}")
+            # Create minimal user_data from token payload
+            user_data = {
+                'national_id': token_payload.get('uid') or token_payload.get('nid'),
+                'mobile_number': token_payload.get('mbn'),
+                'mobile_country_code': token_payload.get('mbc'),
+            }
         
         # Step 4: Create or update local user
         logger.info("Syncing user to local database")
@@ -103,8 +92,11 @@ def injast_callback_view(request):
             token_payload=token_payload
         )
         
+        if not profile_fetched:
+            enqueue('sso_integration.sync_user_profile', {'injast_user_id': user.injast_user.id})
+        
         # Step 5: Generate local JWT tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = get_tokens_for_user(user)
         
         logger.info(f"SSO login successful for user: {user.username}")
         